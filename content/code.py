@@ -39,7 +39,9 @@ if not get_option(Config, "exploreMode"):
 
     # MIDI controller (does the routing)
     midi_ctr = MidiController(
-        routings = Communication["midi"]["routings"]
+        routings = Communication["midi"]["routings"],
+        max_thru_messages = get_option(Communication["midi"], "thruMaxMessages", 1),
+        max_thru_bytes = get_option(Communication["midi"], "thruMaxBytes", 0)
     )
 
     # Optional Wrapper to include the PyMidiBridge for transfering files.
@@ -58,6 +60,8 @@ if not get_option(Config, "exploreMode"):
     _appl = Controller(
         led_driver = _led_driver, 
         protocol = get_option(Communication, "protocol", None),
+        refresh = get_option(Communication, "refresh", None),
+        polling = get_option(Communication, "polling", None),
         midi = midi,
         config = Config, 
         switches = Switches, 
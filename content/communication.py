@@ -4,19 +4,24 @@
 #
 ##############################################################################################################################################
 
-from pyswitch.clients.kemper import KemperBidirectionalProtocol
+from pyswitch.clients.kemper import KemperBidirectionalProtocol, KemperMappings, KemperEffectSlot
 
 from pyswitch.controller.MidiController import MidiController, MidiRouting
 from pyswitch.hardware.Hardware import Hardware
 
-# MIDI Devices in use (optionally you can specify the in/out channels here, too)
+# MIDI Devices in use (optionally you can specify the in/out channels here, too). With fast_parser = True, incoming 
+# messages are parsed without allocating new message objects (see MidiParser). With out_queue_size (bytes), outgoing 
+# messages are queued and written without blocking (for DIN paced to the baud rate), SET messages triggered by the 
+# user first (see MidiOutputQueue, which also provides queue depth and drop statistics).
 #_DIN_MIDI = Hardware.PA_MIDICAPTAIN_DIN_MIDI(
 #    in_channel = None,  # All
-#    out_channel = 0
+#    out_channel = 0,
+#    #out_queue_size = 512
 #)
 _USB_MIDI = Hardware.PA_MIDICAPTAIN_USB_MIDI(
     in_channel = None,  # All
-    out_channel = 0
+    out_channel = 0,
+    #fast_parser = True
 )
 
 # Communication configuration
@@ -34,10 +39,12 @@ Communication = {
     # the MidiController.PYSWITCH source/target or the application will not be able to communicate!
     "midi": {
         "routings": [
-            # MIDI Through from DIN to USB
+            # MIDI Through from DIN to USB (raw: bytes are forwarded without parsing, which is much cheaper, 
+            # but the channel filters of the devices do not apply)
             #MidiRouting(
             #    source = _DIN_MIDI,
-            #    target = _USB_MIDI
+            #    target = _USB_MIDI,
+            #    raw = True
             #),
             
             ###################################################
@@ -54,5 +61,44 @@ Communication = {
                 target = _USB_MIDI
             ),
         ]
-    }
+
+        # Optional: Budget for MIDI thru (routings without the application involved). Per processing step, up to
+        # this amount of messages (0: unlimited) and bytes (0: unlimited) are forwarded for each source. Raise this 
+        # if thru traffic is bursty (SysEx, clock), default is one message.
+        #"thruMaxMessages": 16,
+        #"thruMaxBytes": 256,
+    },
+
+    # Optional: Sentinel driven refresh for all requested (not bidirectional) parameters. Only the sentinel is requested 
+    # in every update interval. All other parameters are requested once, and again when the sentinel value changes, 
+    # the device does not answer anymore, or the parameter has been set. Parameters which can be changed on the device 
+    # without changing the sentinel have to be listed in "alwaysPoll" to be requested in every update interval.
+    #"refresh": {
+    #    "sentinel": KemperMappings.RIG_DATE(),
+    #    "alwaysPoll": [
+    #        KemperMappings.TUNER_MODE_STATE()
+    #    ]
+    #},
+
+    # Optional: Scheduling of requested (not bidirectional) parameters. Per default, all parameters are requested in 
+    # every update interval (see config.py), all at once. Parameters which rarely change can get a longer interval 
+    # (milliseconds), and with "spread" enabled, the requests are sent one by one, evenly spread over the update interval
+    # to avoid bursts of MIDI traffic. Parameters with higher priority are sent first then (default is 0). 
+    # Parameters listed as members of one of the "batches" are requested together with one request.
+    #"polling": {
+    #    "spread": True,
+    #    "mappings": [
+    #        {
+    #            "mapping": KemperMappings.RIG_NAME(),
+    #            "interval": 1000
+    #        },
+    #        {
+    #            "mapping": KemperMappings.EFFECT_STATE(KemperEffectSlot.EFFECT_SLOT_ID_A),
+    #            "priority": 10
+    #        }
+    #    ],
+    #    "batches": [
+    #        KemperMappings.EFFECT_SLOT_PARAMETERS(KemperEffectSlot.EFFECT_SLOT_ID_A)
+    #    ]
+    #}
 }
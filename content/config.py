@@ -25,10 +25,28 @@ Config = {
     # and other displays if assigned. 200 is the default.
     #"updateInterval": 200,
 
+    # Budget for updating per tick. If set, only this amount of updateables (actions, callbacks, displays etc.) is updated 
+    # per processing tick, or only as many as fit into the given amount of milliseconds. The update is continued in the next 
+    # tick(s). This keeps the switch reaction times even for configurations with many switches. Default is 0 (no limit).
+    #"maxUpdateablesPerTick": 5,
+    #"updateBudgetMillis": 5,
+
     # Amount of bytes that must at least be free at the time processing starts (normally the program requires anther about
     # 10kB for character loading etc., default threshold for the warning is 15kB).
     #"memoryWarnLimitBytes": 1024 * 15,
 
+    # Memory telemetry: The free memory is sampled after every update without collecting garbage first. The last
+    # samples (default: 16) are kept along with the minimum and maximum. Garbage can optionally be collected every
+    # "memoryCollectInterval" samples (default is 0: never).
+    #"memoryTelemetrySamples": 16,
+    #"memoryCollectInterval": 0,
+
+    # Idle time garbage collection: If set, garbage is collected in idle ticks (no switch activity and no MIDI messages)
+    # as soon as more than this amount of bytes has been allocated since the last collection. Optionally, the threshold for 
+    # automatic garbage collections can be set (should be higher, so that automatic collections are rare). Default is 0 (off).
+    #"gcIdleCollectBytes": 1024 * 8,
+    #"gcThresholdBytes": 1024 * 16,
+
     # Enables file transfer via MIDI from and to the device using PyMidiBridge (https://github.com/Tunetown/PyMidiBridge).
     # This costs about 8kB of RAM, so if you run into memory issues, disable this.
     #"enableMidiBridge": True,
@@ -42,8 +60,13 @@ Config = {
     # See https://learn.adafruit.com/welcome-to-circuitpython/advanced-serial-console-on-mac-and-linux 
 
     #"debugStats": True,                              # Show info about runtime and memory usage periodically every update interval
+    #"debugMemory": True,                             # Show detailed memory allocation on every update (collects garbage every time!)
     #"debugStatsInterval": 5000,                      # Update interval for runtime statistics (also affects the performance dot, default is 
                                                       # the "updateInterval" option)
+    #"profileTicks": True,                            # Profile the tick phases (switches, MIDI receive, client, each updateable class, LEDs) 
+                                                      # with p50/p95/p99 histograms (microseconds). Output via "debugStats", low overhead.
+    #"traceLatency": True,                            # Measure the latency from switch pushes to the first MIDI message sent and to the first 
+                                                      # change of the switch's LEDs or labels, per switch. Output via "debugStats".
     #"debugBidirectionalProtocol": True,              # Debug the bidirectional protocol, if any
     #"debugUnparsedMessages": True,                   # Shows all incoming MIDI messages which have not been parsed by the application.
     #"debugSentMessages": True,                       # Shows all sent messages
@@ -5,7 +5,7 @@ from adafruit_midi.control_change import ControlChange
 from adafruit_midi.system_exclusive import SystemExclusive
 from adafruit_midi.program_change import ProgramChange
 
-from ..misc import Colors, PeriodCounter, DEFAULT_SWITCH_COLOR, DEFAULT_LABEL_COLOR, formatted_timestamp, do_print, PYSWITCH_VERSION
+from ..misc import Colors, PeriodCounter, Timers, DEFAULT_SWITCH_COLOR, DEFAULT_LABEL_COLOR, formatted_timestamp, do_print, PYSWITCH_VERSION
 from ..controller.actions.actions import ResetDisplaysAction, PushButtonAction
 from ..controller.callbacks import BinaryParameterCallback, DEFAULT_LED_BRIGHTNESS_OFF, DEFAULT_LED_BRIGHTNESS_ON, DEFAULT_SLOT_DIM_FACTOR_OFF, DEFAULT_SLOT_DIM_FACTOR_ON, Callback, EffectEnableCallback
 from ..controller.Client import ClientParameterMapping
@@ -60,10 +60,12 @@ NRPN_ADDRESS_PAGE_ZERO = const(0x00)            # As of the notes of sumsar
 
 # NRPN Function codes
 NRPN_FUNCTION_REQUEST_SINGLE_PARAMETER = const(0x41)
+NRPN_FUNCTION_REQUEST_MULTI_PARAMETER = const(0x42)
 NRPN_FUNCTION_REQUEST_STRING_PARAMETER = const(0x43)
 NRPN_FUNCTION_REQUEST_EXT_STRING_PARAMETER = const(0x47)
 
 NRPN_FUNCTION_RESPONSE_SINGLE_PARAMETER = const(0x01)
+NRPN_FUNCTION_RESPONSE_MULTI_PARAMETER = const(0x02)
 NRPN_FUNCTION_RESPONSE_STRING_PARAMETER = const(0x03)
 
 NRPN_FUNCTION_SET_SINGLE_PARAMETER = const(0x01)
@@ -93,6 +95,14 @@ NRPN_STRING_PARAMETER_ID_RIG_DATE = const(0x03)
 NRPN_STRING_PARAMETER_ID_AMP_NAME = const(0x10)
 NRPN_STRING_PARAMETER_ID_CABINET_NAME = const(0x20)
 
+# Message key for program change messages (CC messages are keyed by their control number,
+# SysEx messages by function code, instance, address page and address number)
+_MESSAGE_KEY_PROGRAM_CHANGE = const(-1)
+
+# SysEx framing bytes
+_SYSEX_START = const(0xf0)
+_SYSEX_END = const(0xf7)
+
 # Generally used NRPN values
 NRPN_PARAMETER_OFF = const(0)
 NRPN_PARAMETER_ON = const(1)
@@ -1126,6 +1136,40 @@ class KemperNRPNMessage(SystemExclusive):
                 address_number               # Controller LSB (address number of parameter)
             ]
         )
+
+        # Serialized message (built on first send, see __bytes__())
+        self._frame = None
+
+    # Returns the serialized message. adafruit_midi calls this on every send, so the 
+    # bytes are only built once and re-used afterwards.
+    def __bytes__(self):
+        if not self._frame:
+            self._frame = bytearray([_SYSEX_START]) + bytearray(self.manufacturer_id) + bytearray(self.data) + bytearray([_SYSEX_END])
+
+        return self._frame
+
+    # Sets a 14 bit value (used for SET messages). The two value bytes are appended on the 
+    # first call, after that they are just patched in the data and the serialized message.
+    def set_value(self, value):
+        msb = int(floor(value / 128))
+        lsb = int(value % 128)
+
+        data = self.data
+        if not isinstance(data, bytearray):
+            # First call: Fill up message to appropriate length for the specification
+            data = bytearray(data[:6])
+            while len(data) < 8:
+                data.append(0)
+
+            self.data = data
+            self._frame = None
+
+        data[6] = msb
+        data[7] = lsb
+
+        frame = self.__bytes__()
+        frame[-3] = msb
+        frame[-2] = lsb
         
 # Kemper specific SysEx message for extended parameters 
 class KemperNRPNExtendedMessage(SystemExclusive):
@@ -1253,7 +1297,7 @@ class KemperParameterMapping(ClientParameterMapping):
             #
             # The first two values are ignored (the Kemper MIDI specification implies this would contain the product type
             # and device ID as for the request, however the device just sends two zeroes)
-            if midi_message.data[2:6] != response.data[2:6]:
+            if not _data_equals(midi_message.data, response.data, 2, 6):
                 return None
             
             # The values starting from index 6 are the value of the response.
@@ -1303,6 +1347,43 @@ class KemperParameterMapping(ClientParameterMapping):
 
         return None
     
+    # Returns the dispatch key for an incoming MIDI message. Only the parts checked 
+    # by parse_against() are regarded.
+    @staticmethod
+    def message_key(midi_message):
+        if isinstance(midi_message, SystemExclusive):
+            return bytes(midi_message.data[2:6])
+        
+        elif isinstance(midi_message, ControlChange):
+            return midi_message.control
+        
+        elif isinstance(midi_message, ProgramChange):
+            return _MESSAGE_KEY_PROGRAM_CHANGE
+        
+        return None
+
+    # Returns the dispatch keys of all response templates
+    def response_keys(self):
+        response = self.response
+        if not response:
+            return []
+        
+        if not isinstance(response, list):
+            response = [response]
+
+        ret = []
+        for r in response:
+            if not r:
+                continue
+
+            key = self.message_key(r)
+            if key == None:
+                return None
+            
+            ret.append(key)
+
+        return ret
+
     # Must set the passed value(s) on the SET message(s) of the mapping.
     def set_value(self, value):
         if isinstance(self.set, list):
@@ -1319,6 +1400,10 @@ class KemperParameterMapping(ClientParameterMapping):
             # Set value directly (CC takes int values)            
             midi_message.value = value
 
+        elif isinstance(midi_message, KemperNRPNMessage):
+            # Patch the value bytes in place
+            midi_message.set_value(value)
+
         elif isinstance(midi_message, SystemExclusive):            
             # Fill up message to appropriate length for the specification
             data = list(midi_message.data)
@@ -1339,6 +1424,22 @@ class KemperParameterMapping(ClientParameterMapping):
 ####################################################################################################################
 
 
+# Compares the data of two SysEx messages in the range [start, end) without slicing. This also works for the 
+# reusable message views of MidiParser, whose data is a memoryview.
+def _data_equals(data_1, data_2, start, end):
+    if len(data_1) < end or len(data_2) < end:
+        return False
+    
+    for i in range(start, end):
+        if data_1[i] != data_2[i]:
+            return False
+        
+    return True
+
+
+####################################################################################################################
+
+
 # Parser for two-part messages: The result value will be 128 * value1 + value2, 
 # notified when the second message arrives.
 class KemperTwoPartParameterMapping(KemperParameterMapping):
@@ -1375,11 +1476,105 @@ class KemperTwoPartParameterMapping(KemperParameterMapping):
 ####################################################################################################################
 
 
+# Requests several parameters of one address page with one multi parameter request, and fans out the values of 
+# the response (which contains the values of consecutive parameters, starting with the lowest address number 
+# requested) to the member mappings. The members must have single parameter NRPN responses on the same page. 
+# The client only requests the members through it if it is listed in the "batches" polling option (see Client).
+class KemperMultiParameterMapping(KemperParameterMapping):
+
+    def __init__(self, mappings, name = ""):
+        if not mappings:
+            raise Exception() #"No mappings passed")
+
+        address_page = mappings[0].response.data[4]
+        first = mappings[0].response.data[5]
+
+        for m in mappings:
+            if m.response.data[4] != address_page:
+                raise Exception() #"All mappings must be on the same address page")
+            
+            if m.response.data[5] < first:
+                first = m.response.data[5]
+
+        super().__init__(
+            name = name,
+            request = KemperNRPNMessage(
+                NRPN_FUNCTION_REQUEST_MULTI_PARAMETER,
+                address_page,
+                first
+            ),
+            response = KemperNRPNMessage(
+                NRPN_FUNCTION_RESPONSE_MULTI_PARAMETER,
+                address_page,
+                first
+            )
+        )
+
+        self.mappings = mappings
+
+        # Position of the value of each member in the response data
+        self._positions = [6 + 2 * (m.response.data[5] - first) for m in mappings]
+
+    # Sets the values of all members. Returns False if the response does not contain all of them.
+    def parse(self, midi_message):
+        if not isinstance(midi_message, SystemExclusive):
+            return False
+        
+        response = self.response
+        if midi_message.manufacturer_id != response.manufacturer_id:
+            return False
+        
+        data = midi_message.data
+        if not _data_equals(data, response.data, 2, 6):
+            return False
+        
+        positions = self._positions
+        num_data = len(data)
+
+        for pos in positions:
+            if pos + 1 >= num_data:
+                return False
+
+        mappings = self.mappings
+        for i in range(len(mappings)):
+            pos = positions[i]
+            mapping = mappings[i]
+            value = data[pos] * 128 + data[pos + 1]
+
+            mapping.value_changed = (mapping.value != value)
+            mapping.value = value
+
+        return True
+
+
+####################################################################################################################
+
+
+# Mapping instances created by the factories in KemperMappings (see _interned())
+_INTERNED_MAPPINGS = {}
+
+# Decorator for the mapping factories: Returns the same mapping instance for the same 
+# factory and arguments, so all callbacks and display elements addressing a parameter 
+# share one mapping (and with it the request, parsing and the buffered value). 
+def _interned(factory):
+    def wrapper(*args, **kwargs):
+        # The factories take at most one argument, so keyword arguments can just be appended
+        key = (factory, args + tuple(kwargs.values()))
+
+        if key not in _INTERNED_MAPPINGS:
+            _INTERNED_MAPPINGS[key] = factory(*args, **kwargs)
+
+        return _INTERNED_MAPPINGS[key]
+    
+    return wrapper
+
+
 # Defines some useful MIDI mappings
 class KemperMappings:
 
     # Effect slot enable/disable
     @staticmethod
+    @_interned
     def EFFECT_STATE(slot_id):
         return KemperParameterMapping(
             name = "Slot State " + str(slot_id),
@@ -1401,6 +1596,7 @@ class KemperMappings:
     
     # Effect slot type (request only)
     @staticmethod
+    @_interned
     def EFFECT_TYPE(slot_id):
         return KemperParameterMapping(
             name = "Slot Type " + str(slot_id),
@@ -1416,8 +1612,22 @@ class KemperMappings:
             )
         )
 
+    # Effect slot type and state, requested together with one multi parameter request. Listing this in the
+    # "batches" polling option makes the client request EFFECT_TYPE and EFFECT_STATE of the slot through it.
+    @staticmethod
+    @_interned
+    def EFFECT_SLOT_PARAMETERS(slot_id):
+        return KemperMultiParameterMapping(
+            name = "Slot Parameters " + str(slot_id),
+            mappings = [
+                KemperMappings.EFFECT_TYPE(slot_id),
+                KemperMappings.EFFECT_STATE(slot_id)
+            ]
+        )
+
    # Rotary speed (fast/slow)
     @staticmethod
+    @_interned
     def ROTARY_SPEED(slot_id):
         return KemperParameterMapping(
             name = "Rotary Speed " + str(slot_id),
@@ -1440,6 +1650,7 @@ class KemperMappings:
 
     # Freeze for slot
     @staticmethod
+    @_interned
     def FREEZE(slot_id):
         return KemperParameterMapping(
             name = "Freeze " + str(slot_id),
@@ -1460,6 +1671,7 @@ class KemperMappings:
             )
         )
     
+    @_interned
     def DELAY_MIX(slot_id):
         return KemperParameterMapping(
             name = "Mix " + str(slot_id),
@@ -1481,6 +1693,7 @@ class KemperMappings:
         )
 
     # Effect Button I-IIII (set only). num must be a number (1 to 4).
+    @_interned
     def EFFECT_BUTTON(num): 
         return KemperParameterMapping(
             name = "Effect Button " + repr(num),
@@ -1491,6 +1704,7 @@ class KemperMappings:
         )
 
     # Rig name (request only)
+    @_interned
     def RIG_NAME(): 
         return KemperParameterMapping(
             name = "Rig Name",
@@ -1508,6 +1722,7 @@ class KemperMappings:
         )
 
     # Rig date (request only)
+    @_interned
     def RIG_DATE(): 
         return KemperParameterMapping(
             name = "Rig Date",
@@ -1525,6 +1740,7 @@ class KemperMappings:
         )
 
     # Switch tuner mode on/off (no receive possible when not in bidirectional mode)
+    @_interned
     def TUNER_MODE_STATE(): 
         return KemperParameterMapping(
             name = "Tuner Mode",
@@ -1540,6 +1756,7 @@ class KemperMappings:
         )
 
     # Tuner note (only sent in bidirectional mode)
+    @_interned
     def TUNER_NOTE(): 
         return KemperParameterMapping(
             name = "Tuner Note",
@@ -1551,6 +1768,7 @@ class KemperMappings:
         )
 
     # Tuner deviance from "in tune" (only sent in bidirectional mode)
+    @_interned
     def TUNER_DEVIANCE(): 
         return KemperParameterMapping(
             name = "Tuner Deviance",
@@ -1562,6 +1780,7 @@ class KemperMappings:
         )
 
     # Switch tuner mode on/off (no receive possible!)
+    @_interned
     def TAP_TEMPO(): 
         return KemperParameterMapping(
             name = "Tap Tempo",
@@ -1571,6 +1790,7 @@ class KemperMappings:
             )
         )
 
+    @_interned
     def MORPH_BUTTON(): 
         return KemperParameterMapping(
             name = "Morph Button",
@@ -1590,6 +1810,7 @@ class KemperMappings:
             )
         )
     
+    @_interned
     def MORPH_PEDAL(): 
         return KemperParameterMapping(
             name = "Morph Pedal",
@@ -1610,6 +1831,7 @@ class KemperMappings:
         )
 
     # Rig volume
+    @_interned
     def RIG_VOLUME(): 
         return KemperParameterMapping(
             name = "Rig Volume",
@@ -1631,6 +1853,7 @@ class KemperMappings:
         )
 
     # Amp name (request only)
+    @_interned
     def AMP_NAME(): 
         return KemperParameterMapping(
             name = "Amp Name",
@@ -1648,6 +1871,7 @@ class KemperMappings:
         )
 
     # Amp on/off
+    @_interned
     def AMP_STATE(): 
         return KemperParameterMapping(
             name = "Amp State",
@@ -1669,6 +1893,7 @@ class KemperMappings:
         )
 
     # Cab name (request only)
+    @_interned
     def CABINET_NAME(): 
         return KemperParameterMapping(
             name = "Cab Name",
@@ -1686,6 +1911,7 @@ class KemperMappings:
         )
     
     # Cab on/off
+    @_interned
     def CABINET_STATE(): 
         return KemperParameterMapping(
             name = "Cab State",
@@ -1706,6 +1932,7 @@ class KemperMappings:
             )
         )
 
+    @_interned
     def NEXT_BANK(): 
         return KemperTwoPartParameterMapping(
             name = "Next Bank",
@@ -1724,6 +1951,7 @@ class KemperMappings:
             ]
         )
 
+    @_interned
     def PREVIOUS_BANK():
         return KemperTwoPartParameterMapping(
             name = "Prev Bank",
@@ -1743,6 +1971,7 @@ class KemperMappings:
         )
 
     # Selects a rig of the current bank. Rig index must be in range [0..4]
+    @_interned
     def RIG_SELECT(rig):
         return KemperTwoPartParameterMapping(
             name = "Rig Select",
@@ -1772,6 +2001,7 @@ class KemperMappings:
         )
     
     # Selects a rig of a specific bank. Rig index must be in range [0..4]
+    @_interned
     def BANK_AND_RIG_SELECT(rig):
         return KemperTwoPartParameterMapping(
             name = "Rig+Bank",
@@ -1802,6 +2032,7 @@ class KemperMappings:
         )
 
     # Used for state sensing in bidirection communication
+    @_interned
     def BIDIRECTIONAL_SENSING():
         return KemperParameterMapping(
             name = "Sense",
@@ -1824,6 +2055,7 @@ class KemperMappings:
     #    response = Start()
     #)
 
+    @_interned
     def TEMPO_DISPLAY():
         return KemperParameterMapping(
             name = "Tempo",
@@ -1871,6 +2103,26 @@ _SELECTED_PARAMETER_SET_ID = const(0x02)
 _SELECTED_PARAMETER_SET = _PARAMETER_SET_2
 
 
+# Compiles a parameter set to a tuple of sets: 
+#   - Mapping keys of all mappings (see ClientParameterMapping.key), so membership is one hash lookup
+#   - Message keys of all response messages (see KemperParameterMapping.message_key), to recognize the 
+#     parameter messages pushed by the device
+def _compile_parameter_set(mappings):
+    mapping_keys = set()
+    message_keys = set()
+
+    for mapping in mappings:
+        mapping_keys.add(mapping.key)
+        message_keys.update(mapping.response_keys())
+
+    return (mapping_keys, message_keys)
+
+_SELECTED_PARAMETER_SET_KEYS, _SELECTED_PARAMETER_SET_MESSAGE_KEYS = _compile_parameter_set(_SELECTED_PARAMETER_SET)
+
+# Interval of the status sensing messages sent by the device
+_SENSING_INTERVAL_MILLIS = const(500)
+
+
 # Implements the internal Kemper bidirectional communication protocol
 class KemperBidirectionalProtocol: #(BidirectionalProtocol):
     
@@ -1886,19 +2138,19 @@ class KemperBidirectionalProtocol: #(BidirectionalProtocol):
         self._mapping_sense = KemperMappings.BIDIRECTIONAL_SENSING()
 
         # Re-send the beacon after half of the lease time have passed
-        self.resend_period = PeriodCounter(time_lease_seconds * 1000 * 0.5)
+        self.resend_period = PeriodCounter(time_lease_seconds * 1000 * 0.5, callback = self._send_keep_alive)
 
         # Period for initial beacons (those shall not be sent too often)
-        self.init_period = PeriodCounter(5000)
+        self.init_period = PeriodCounter(5000, callback = self._initialize)
 
         # Period after which communication will be regarded as broken when no sensing message comes in
         # (the device sends this roughly every 500ms so we wait 1.5 seconds which should be sufficient)
-        self.sensing_period = PeriodCounter(1500)
-        self.sensing_period.reset()
+        self.sensing_period = PeriodCounter(1500, callback = self._connection_lost)
 
         self.debug = False   # This is set by the BidirectionalClient constructor
         self._count_relevant_messages = 0
         self._has_been_running = False
+        self._started = False
         
     # Called before usage, with a midi handler.
     def init(self, midi, client):
@@ -1907,7 +2159,7 @@ class KemperBidirectionalProtocol: #(BidirectionalProtocol):
 
     # Must return (boolean) if the passed mapping is handled in the bidirectional protocol
     def is_bidirectional(self, mapping):
-        return mapping in _SELECTED_PARAMETER_SET
+        return mapping.key in _SELECTED_PARAMETER_SET_KEYS
 
     # Must return a color representation for the current state
     def get_color(self):
@@ -1918,32 +2170,56 @@ class KemperBidirectionalProtocol: #(BidirectionalProtocol):
     def feedback_value(self, mapping):
         return self.is_bidirectional(mapping)
 
-    # Initialize the communication and keeps it alive when time lease exceeds
+    # Initialize the communication on the first call. Everything else (re-initialization, keep-alive and 
+    # sensing timeouts) is driven by the timer callbacks of the period counters (see Timers).
     def update(self):
-        if self.state == self._STATE_OFFLINE:
-            if self.init_period.exceeded:
-                if self.debug:                     # pragma: no cover
-                    self._print("Initialize")
+        if self._started:
+            return
+        
+        self._started = True
+        self._initialize()
+
+    # Timer callback: Sends the init beacon, repeatedly until the device answers
+    def _initialize(self):
+        if self.state != self._STATE_OFFLINE:
+            return
+        
+        if self.debug:                     # pragma: no cover
+            self._print("Initialize")
 
-                if self._has_been_running:
-                    self._client.notify_connection_lost()                    
+        if self._has_been_running:
+            self._client.notify_connection_lost()                    
 
-                self._send_beacon(
-                    init = True
-                )
+        self._send_beacon(
+            init = True
+        )
+
+        self.init_period.reset()
+
+    # Timer callback: Keeps the communication alive before the time lease exceeds
+    def _send_keep_alive(self):
+        if self.state != self._STATE_RUNNING:
+            return
+        
+        if self.debug:                     # pragma: no cover
+            self._print("Send keep-alive message")
 
-        elif self.state == self._STATE_RUNNING:
-            if self.sensing_period.exceeded:
-                self.state = self._STATE_OFFLINE
+        self._send_beacon()
 
-                if self.debug:                     # pragma: no cover
-                    self._print("Lost connection")                
+        self.resend_period.reset()
+
+    # Timer callback: No sensing message has been received for too long
+    def _connection_lost(self):
+        if self.state != self._STATE_RUNNING:
+            return
+        
+        self.state = self._STATE_OFFLINE
+        Timers.cancel(self.resend_period)
 
-            elif self.resend_period.exceeded:
-                if self.debug:                     # pragma: no cover
-                    self._print("Send keep-alive message")
+        if self.debug:                     # pragma: no cover
+            self._print("Lost connection")                
 
-                self._send_beacon()
+        self._initialize()
 
     # Receive sensing messages and re-init (with init = 1 again) when they stop appearing for longer then 1 second
     def receive(self, midi_message):
@@ -1957,6 +2233,11 @@ class KemperBidirectionalProtocol: #(BidirectionalProtocol):
         if self.debug:                     # pragma: no cover
             self._count_relevant_messages += 1
 
+        # Parameters of the selected set are pushed by the device whether they are used or not. Those 
+        # which no request has been registered for end up here and are just swallowed.
+        if KemperParameterMapping.message_key(midi_message) in _SELECTED_PARAMETER_SET_MESSAGE_KEYS:
+            return True
+
         # Check if the message belongs to the status sense mapping. The following have to match:
         #   2: function code, (0x7e)
         #   3: instance ID,   (0x00)
@@ -1964,10 +2245,11 @@ class KemperBidirectionalProtocol: #(BidirectionalProtocol):
         #
         # The first two values are ignored (the Kemper MIDI specification implies this would contain the product type
         # and device ID as for the request, however the device just sends two zeroes)
-        if midi_message.data[2:5] != self._mapping_sense.response.data[2:5]:
+        if not _data_equals(midi_message.data, self._mapping_sense.response.data, 2, 5):
             return False
         
         if self.state != self._STATE_RUNNING:
+            Timers.cancel(self.init_period)
             self.resend_period.reset()
             
             if self.debug:                     # pragma: no cover
@@ -1997,6 +2279,22 @@ class KemperBidirectionalProtocol: #(BidirectionalProtocol):
             )
         )
 
+    # Prints the parameter set and the resulting traffic of the device (called by the client on startup 
+    # with all registered mappings, if debugging is enabled)
+    def print_budget(self, mappings):              # pragma: no cover
+        keys = _SELECTED_PARAMETER_SET_KEYS
+
+        covered = 0
+        for mapping in mappings:
+            if mapping.key in keys:
+                covered += 1
+
+        self._print(
+            "Parameter set " + hex(_SELECTED_PARAMETER_SET_ID) + ": " + repr(covered) + " of " + repr(len(mappings)) + 
+            " registered mappings pushed. Device sends " + repr(1000 / _SENSING_INTERVAL_MILLIS) + " msgs/sec sensing, plus changes of " + 
+            repr(len(_SELECTED_PARAMETER_SET)) + " parameters"
+        )
+
     # Encode time lease (this is done in 2 second steps for the Kemper)
     def _encode_time_lease(self, time_lease_seconds):
         return int(time_lease_seconds / 2)
@@ -1,4 +1,5 @@
-from ..misc import EventEmitter, PeriodCounter, Updateable, get_option, compare_midi_messages, stringify_midi_message, do_print
+from ..misc import EventEmitter, PeriodCounter, Timers, Updateable, TickClock, get_option, compare_midi_messages, get_midi_message_key, stringify_midi_message, do_print
+from .RuntimeMeasurement import SwitchLatency
 #from ..stats import RuntimeStatistics
 
 
@@ -12,6 +13,27 @@ class ClientParameterMapping:
         self.response = response  # Response template MIDI message for parsing the received answer        
         self.value = value        # Value of the parameter (buffer). After receiving an answer, the value 
                                   # is buffered here.                                  
+        self.value_changed = True # Set before listeners are notified: If the value differs from the one before
+
+        self._key = None          # Identity key (determined on first access, see key property)
+
+    # Returns a hashable identity key for the mapping. Two mappings have the same key if they
+    # are regarded as equal (see __eq__). The key is determined once on first access and stays 
+    # stable afterwards (SET messages change their contents with every value set).
+    @property
+    def key(self):
+        if self._key == None:
+            if self.response != None:
+                self._key = (self.__class__, get_midi_message_key(self.response))
+            elif self.set != None:
+                self._key = (self.__class__, get_midi_message_key(self.set))
+            elif self.request != None:
+                self._key = (self.__class__, get_midi_message_key(self.request))
+            else:
+                # Mappings without any messages are never equal to others
+                self._key = (self.__class__, id(self))
+            
+        return self._key
 
     def __eq__(self, other):
         if not other:
@@ -82,6 +104,20 @@ class ClientParameterMapping:
     # this returns True which is valid for mappings with one response.
     def result_finished(self):
         return True
+
+    # Must return a hashable key for the passed incoming MIDI message, which is used by the Client 
+    # to dispatch the message only to the requests able to parse it. Has to be consistent with
+    # the keys returned by response_keys(). If None is returned, the message is only passed to
+    # mappings without response keys.
+    @staticmethod
+    def message_key(midi_message):
+        return None
+
+    # Must return a list of message keys (see message_key()) for all messages the mapping is 
+    # able to parse. Per default, this returns None which means the mapping is not indexed and
+    # has to inspect all incoming messages.
+    def response_keys(self):
+        return None
     
 
 ############################################################################################################
@@ -90,7 +126,24 @@ class ClientParameterMapping:
 # Implements all MIDI communication to and from the client device
 class Client: #(ClientRequestListener):
 
-    def __init__(self, midi, config):
+    # refresh: Optional dict for sentinel driven refreshing (see communication.py):
+    #     "sentinel":   Mapping which is requested periodically (in every update interval). All other mappings 
+    #                   are only requested until a value has been received, and again when the value of the 
+    #                   sentinel changes.
+    #     "alwaysPoll": Optional list of mappings which are requested periodically anyway.
+    #
+    # polling: Optional dict for request scheduling (see communication.py):
+    #     "mappings":   Optional list of dicts with per-mapping settings:
+    #                   "mapping":  The mapping
+    #                   "interval": Minimum milliseconds between two requests (the callbacks only request
+    #                               in every update interval, so this is rounded up to multiples of it)
+    #                   "priority": Requests with higher priority are sent first when spreading (default 0)
+    #     "spread":     If True, requests are not sent immediately but spread evenly over the update
+    #                   interval, to avoid bursts of MIDI messages.
+    #     "batches":    Optional list of mappings requesting several others at once. These must have a list of 
+    #                   their members in the mappings attribute, and set the values of the members when parsing.
+    #                   The members are only requested through their batch then.
+    def __init__(self, midi, config, refresh = None, polling = None):
         self.midi = midi
         
         self.debug_unparsed_messages = get_option(config, "debugUnparsedMessages", False)
@@ -98,17 +151,70 @@ class Client: #(ClientRequestListener):
         self.debug_exclude_types = get_option(config, "excludeMessageTypes", None)
         self._debug_mapping = get_option(config, "debugMapping", None)
         
-        # List of ClientRequest objects    
-        self._requests = []
+        # ClientRequest objects by mapping key
+        self._requests = {}
 
-        self._max_request_lifetime = get_option(config, "maxRequestLifetimeMillis", 2000)
+        # Dispatch index for incoming messages: Message key -> list of ClientRequest objects
+        self._dispatch = {}
+
+        # Message key functions of all indexed mapping types (normally only one)
+        self._message_key_functions = []
 
-        # Helper to only clean up hanging requests from time to time as this is not urgent at all
-        self._cleanup_terminated_period = PeriodCounter(self._max_request_lifetime / 2)    
+        # Requests whose mappings do not provide response keys (these get all messages)
+        self._unindexed_requests = []
 
+        # Requests which have not been answered in this time are terminated (by a timer, see ClientRequest)
+        self._max_request_lifetime = get_option(config, "maxRequestLifetimeMillis", 2000)
+
+        # Sentinel driven refresh
+        self._sentinel = get_option(refresh, "sentinel", None)
+        self._sentinel_key = self._sentinel.key if self._sentinel else None
+        self._sentinel_value = None
+        self._always_poll = set([m.key for m in get_option(refresh, "alwaysPoll", [])])
+
+        if self._sentinel:
+            # The sentinel is polled by its own timer, started on the first request
+            self._sentinel_period = PeriodCounter(get_option(config, "updateInterval", 200), self._poll_sentinel)
+            self._sentinel_polling = False
+
+        # Mappings whose values have been received since the last change of the sentinel: 
+        # Mapping key -> list of listeners which have been notified about the value
+        self._refreshed = {}
+
+        # Per-mapping poll settings: Mapping key -> (interval, priority)
+        self._poll_settings = {}
+        for entry in get_option(polling, "mappings", []):
+            self._poll_settings[entry["mapping"].key] = (
+                get_option(entry, "interval", 0),
+                get_option(entry, "priority", 0)
+            )
+
+        # Batch mappings by the keys of their members
+        self._batches = {}
+        for batch in get_option(polling, "batches", []):
+            for mapping in batch.mappings:
+                self._batches[mapping.key] = batch
+
+        # Earliest time of the next request for mappings with a poll interval: Mapping key -> millis
+        self._next_poll = {}
+
+        # Mappings with poll settings whose values have been received: Mapping key -> list of listeners
+        # which have been notified about the value
+        self._polled = {}
+
+        # Request scheduler: Requests to be sent are queued here, and sent one by one by a timer callback
+        self._send_queue = None
+        if get_option(polling, "spread", False):
+            self._send_queue = []
+            self._send_timer = PeriodCounter(0, self._send_next)
+            self._send_scheduled = False
+            self._spread_interval = get_option(config, "updateInterval", 200)
+            self._spread_end = 0
+
+    # Returns a list of all pending requests
     @property
     def requests(self):
-        return self._requests
+        return list(self._requests.values())
 
     # Register the mapping and listener in advance (only plays a role for bidirectional parameters,
     # here this is redundant)
@@ -116,12 +222,22 @@ class Client: #(ClientRequestListener):
         if not mapping.request and mapping.response:
             self._register_mapping(mapping, listener, False)
 
+    # Called by the controller when all mappings have been registered
+    def finish_registration(self):
+        pass
+
     # Sends the SET message of a mapping. Value has to be a list if the mapping's set field is a list, too!
+    # SET messages are user triggered, so they are sent with priority (only relevant for output queues).
     def set(self, mapping, value):
         if not mapping.set:
             return
         
         mapping.set_value(value)
+
+        # The value has to be requested again to get the feedback of the device
+        self._refreshed.pop(mapping.key, None)
+        self._next_poll.pop(mapping.key, None)
+        self._polled.pop(mapping.key, None)
                 
         if isinstance(mapping.set, list):
             for m in mapping.set:
@@ -131,12 +247,16 @@ class Client: #(ClientRequestListener):
                 if self._debug_sent_messages:   # pragma: no cover
                     self.print_message(m)
 
-                self.midi.send(m)
+                self.midi.send(m, priority = True)
         else:
             if self._debug_sent_messages:       # pragma: no cover
                 self.print_message(mapping.set)
                 
-            self.midi.send(mapping.set)
+            self.midi.send(mapping.set, priority = True)
+
+        # Latency tracing (only has an effect while a switch push is processed, and if the message has not been 
+        # queued: Output queues record the latency when the message has been written)
+        SwitchLatency.midi_sent()
 
     # Send the request message of a mapping. Calls the passed listener when the answer has arrived.
     #@RuntimeStatistics.measure
@@ -144,7 +264,71 @@ class Client: #(ClientRequestListener):
         if not mapping.request or not mapping.response:
             return            
         
+        if self._sentinel:
+            if not self._sentinel_polling:
+                self._poll_sentinel()
+
+            # Only the sentinel is polled, the others are requested until they have been received
+            if mapping.key in self._refreshed:
+                self._notify_buffered(self._refreshed, mapping, listener)
+                return
+
+        if self._poll_settings and not self._poll_due(mapping):
+            self._notify_buffered(self._polled, mapping, listener)
+            return
+
+        batch = self._batches.get(mapping.key, None)
+        if batch:
+            # Only the batch request is sent (once for all its members). The client listens to it and 
+            # notifies the member requests.
+            self._register_mapping(mapping, listener, False)
+            self._register_mapping(batch, self, True)
+            return
+
         self._register_mapping(mapping, listener, True)
+
+    # Called when a batch request has been answered (see "batches" polling option), or the sentinel
+    # value has been received. The values of batch members have already been set by the batch mapping.
+    def parameter_changed(self, batch):
+        if batch.key == self._sentinel_key:
+            if batch.value != self._sentinel_value:
+                # Everything has to be requested again
+                self._sentinel_value = batch.value
+                self._refreshed.clear()
+
+            return
+
+        for mapping in batch.mappings:
+            request = self.get_matching_request(mapping)
+            if not request or request.finished:
+                continue
+
+            self._set_received(mapping, request.listeners)
+            request.notify_listeners()
+
+            if request.lifetime:
+                request.listeners = None
+                self._remove_request(request)
+
+    # Called when a batch request or the sentinel request has been terminated
+    def request_terminated(self, batch):
+        if batch.key == self._sentinel_key:
+            # Device seems to be offline: Request everything again (those requests will be terminated, too)
+            self._sentinel_value = None
+            self._refreshed.clear()
+
+            request = self.get_matching_request(batch)
+            if request:
+                self._remove_request(request)
+            return
+        
+        for mapping in batch.mappings:
+            request = self.get_matching_request(mapping)
+            if not request:
+                continue
+
+            request.terminate()
+            self._remove_request(request)
         
     # Registers a mapping request or adds the listener to an existing one. Optionally sends the
     # request message. Internal use only.
@@ -157,12 +341,13 @@ class Client: #(ClientRequestListener):
             
             req.add_listener(listener)
 
-            # Add to list
-            self._requests.append(req)
+            # Add to registry and dispatch index
+            self._requests[mapping.key] = req
+            self._index_request(req)
             
             # Send 
             if send:           
-                req.send()
+                self._send_request(req)
 
         else:
             # Existing request: Add listener
@@ -176,29 +361,71 @@ class Client: #(ClientRequestListener):
             self._max_request_lifetime if mapping.request else 0
         )
 
+    # Adds the request to the dispatch index, according to the response keys of its mapping
+    def _index_request(self, request):
+        mapping = request.mapping
+        keys = mapping.response_keys()
+
+        request.message_keys = keys
+
+        if keys == None:
+            self._unindexed_requests.append(request)
+            return
+        
+        key_function = mapping.__class__.message_key
+        if key_function not in self._message_key_functions:
+            self._message_key_functions.append(key_function)
+
+        dispatch = self._dispatch
+        for key in keys:
+            if key in dispatch:
+                dispatch[key].append(request)
+            else:
+                dispatch[key] = [request]
+
     # Receive MIDI messages
     #@RuntimeStatistics.measure
     def receive(self, midi_message):
-        if self._cleanup_terminated_period.exceeded:
-            self._cleanup_hanging_requests()
-
         if not midi_message:
             return False
         
         # See if one of the waiting requests matches
-        do_cleanup = False
+        finished = None
 
         parsed = False
-        for request in self._requests:
+        dispatch = self._dispatch
+        for key_function in self._message_key_functions:
+            key = key_function(midi_message)
+            if key == None or key not in dispatch:
+                continue
+
+            for request in dispatch[key]:
+                # The request clears its listeners when finished, so they have to be remembered before
+                listeners = request.listeners
+                if request.parse(midi_message):
+                    parsed = True
+                    self._set_received(request.mapping, listeners)
+
+                if request.finished:
+                    if not finished:
+                        finished = []
+                    finished.append(request)
+
+        for request in self._unindexed_requests:
+            listeners = request.listeners
             if request.parse(midi_message):
                 parsed = True
+                self._set_received(request.mapping, listeners)
 
             if request.finished:
-                do_cleanup = True
+                if not finished:
+                    finished = []
+                finished.append(request)
 
-        # Check for finished requests
-        if do_cleanup:
-            self._cleanup_requests()
+        # Remove finished requests
+        if finished:
+            for request in finished:
+                self._remove_request(request)
 
         # Debug unparsed messages
         if not parsed and self.debug_unparsed_messages:           # pragma: no cover
@@ -206,28 +433,151 @@ class Client: #(ClientRequestListener):
 
         return parsed
             
+    # Returns if a mapping has to be requested now according to its poll interval. Requests already
+    # pending are always due, so further listeners can be added to them.
+    def _poll_due(self, mapping):
+        key = mapping.key
+
+        settings = self._poll_settings.get(key, None)
+        if not settings or not settings[0]:
+            return True
+        
+        if key in self._requests:
+            return True
+
+        now = TickClock.now()
+        if now < self._next_poll.get(key, 0):
+            return False
+        
+        self._next_poll[key] = now + settings[0]
+        return True
+
+    # Sends a request, or queues it if requests are spread over time
+    def _send_request(self, request):
+        queue = self._send_queue
+        if queue == None:
+            request.send()
+            return
+        
+        queue.append(request)
+
+        if not self._send_scheduled:
+            # Send in the next tick, when all requests of the current update pass have been queued
+            self._send_timer.interval = 0
+            self._send_timer.reset()
+            self._send_scheduled = True
+
+    # Timer callback: Sends the next queued request, and schedules the following one so that all queued
+    # requests are sent until the end of the current spreading interval.
+    def _send_next(self):
+        self._send_scheduled = False
+        queue = self._send_queue
+        
+        now = TickClock.now()
+        if now >= self._spread_end:
+            self._spread_end = now + self._spread_interval
+
+        while queue:
+            request = self._pop_next_request()
+
+            # Requests can have been answered or terminated while being queued
+            if not request.finished:
+                request.send()
+                break
+
+        if not queue:
+            return
+        
+        self._send_timer.interval = int((self._spread_end - now) / (len(queue) + 1))
+        self._send_timer.reset()
+        self._send_scheduled = True
+
+    # Removes the queued request with the highest priority (the oldest one of those) from the queue
+    def _pop_next_request(self):
+        queue = self._send_queue
+        settings = self._poll_settings
+
+        index = 0
+        priority = None
+
+        for i in range(len(queue)):
+            s = settings.get(queue[i].mapping.key, None)
+            p = s[1] if s else 0
+
+            if priority == None or p > priority:
+                index = i
+                priority = p
+
+        return queue.pop(index)
+
+    # Timer callback: Requests the sentinel value, and schedules the next request
+    def _poll_sentinel(self):
+        self._sentinel_polling = True
+        self._register_mapping(self._sentinel, self, True)
+        self._sentinel_period.reset()
+
+    # Remembers that the value of a mapping has been received, together with the listeners notified about it 
+    # (only used for sentinel driven refresh and mappings with poll settings)
+    def _set_received(self, mapping, listeners):
+        key = mapping.key
+
+        if self._sentinel and key != self._sentinel_key and key not in self._always_poll:
+            self._refreshed[key] = list(listeners)
+
+        if key in self._poll_settings:
+            self._polled[key] = list(listeners)
+
+    # Mappings are shared by several listeners, which request them one after another. If a mapping is not 
+    # requested because its value is buffered, this notifies listeners which have not seen the value yet.
+    def _notify_buffered(self, received, mapping, listener):
+        listeners = received.get(mapping.key, None)
+        if listeners == None or listener in listeners:
+            return
+        
+        listeners.append(listener)
+
+        # The listener has not seen the value yet, however it has not changed since it has been received
+        mapping.value_changed = False
+        listener.parameter_changed(mapping)
+
     # Returns a matching request from the list if any, or None if no matching
     # request has been found.
     #@RuntimeStatistics.measure
     def get_matching_request(self, mapping):
-        for request in self._requests:
-            if request.mapping == mapping:
-                return request
-            
-        return None
+        return self._requests.get(mapping.key, None)
+
+    # Removes a request from the registry and the dispatch index
+    def _remove_request(self, request):
+        key = request.mapping.key
+        if self._requests.get(key, None) == request:
+            del self._requests[key]
+
+        # No need to watch the lifetime anymore
+        if request.lifetime:
+            Timers.cancel(request.lifetime)
+
+        # Not sent yet: No need to send it anymore
+        queue = self._send_queue
+        if queue and request in queue:
+            queue.remove(request)
+
+        keys = request.message_keys
+        if keys == None:
+            if request in self._unindexed_requests:
+                self._unindexed_requests.remove(request)
+            return
 
-    # Remove all finished requests, and terminate the ones which took too long already
-    def _cleanup_requests(self):
-        self._requests = [i for i in self._requests if not i.finished]
-            
-    # Terminate any requests which took too long from time to time
-    def _cleanup_hanging_requests(self):
-        # Terminate requests if they waited too long
-        for request in self._requests:
-            if request.lifetime and request.lifetime.exceeded:
-                request.terminate()
+        dispatch = self._dispatch
+        for key in keys:
+            if key not in dispatch:
+                continue
 
-        self._cleanup_requests()
+            requests = dispatch[key]
+            if request in requests:
+                requests.remove(request)
+
+            if not requests:
+                del dispatch[key]
 
     # Print info about the passed message
     def print_message(self, midi_message):  # pragma: no cover
@@ -248,6 +598,9 @@ class ClientRequest(EventEmitter):
         
         self.client = client
         self.mapping = mapping
+
+        # Keys of the request in the dispatch index of the client (set by the client)
+        self.message_keys = None
         
         self.lifetime = self._init_lifetime(max_request_lifetime)
 
@@ -256,16 +609,25 @@ class ClientRequest(EventEmitter):
         if not max_request_lifetime > 0:            
             return None
             
-        lifetime = PeriodCounter(max_request_lifetime)
+        lifetime = PeriodCounter(max_request_lifetime, callback = self._lifetime_exceeded)
         lifetime.reset()
 
         return lifetime
 
+    # Timer callback: The request took too long, so it is terminated and removed from the client
+    def _lifetime_exceeded(self):
+        self.terminate()
+        self.client._remove_request(self)
+
     # Sends the request
     def send(self):
         if not self.mapping.request:
             return
 
+        # Requests can be queued before sending, so the lifetime starts now
+        if self.lifetime:
+            self.lifetime.reset()
+
         if isinstance(self.mapping.request, list):
             for m in self.mapping.request:
                 if not m:
@@ -301,12 +663,16 @@ class ClientRequest(EventEmitter):
             return False
 
         mapping = self.mapping
+        previous = mapping.value
+
         if not mapping.parse(midi_message):
             return False
 
         if not mapping.result_finished():
             return
 
+        mapping.value_changed = (mapping.value != previous)
+
         if self.client._debug_mapping == mapping:    # pragma: no cover
             do_print(mapping.name + ": Received value '" + repr(mapping.value) + "' from " + stringify_midi_message(midi_message))
 
@@ -333,19 +699,64 @@ class ClientRequest(EventEmitter):
 
 class BidirectionalClient(Client, Updateable):
 
-    def __init__(self, midi, config, protocol):
-        Client.__init__(self, midi, config)
+    def __init__(self, midi, config, protocol, refresh = None, polling = None):
+        Client.__init__(self, midi, config, refresh, polling)
 
         self.protocol = protocol
         self.protocol.debug = get_option(config, "debugBidirectionalProtocol")
         self.protocol.init(midi, self)
 
+        # Registered mappings by key (only collected for the startup traffic report when debugging)
+        self._registered = {} if self.protocol.debug else None
+
+        self._poll_interval = get_option(config, "updateInterval", 200)
+
     # Register the mapping and listener in advance (only plays a role for bidirectional parameters)
     def register(self, mapping, listener):
+        if self._registered != None:
+            self._registered[mapping.key] = mapping
+
         if self.protocol.is_bidirectional(mapping):
             mapping.request = None
     
         Client.register(self, mapping, listener)
+
+    # Prints the startup traffic report when debugging
+    def finish_registration(self):               # pragma: no cover
+        if self._registered == None:
+            return
+        
+        mappings = list(self._registered.values())
+        self._registered = None
+
+        if hasattr(self.protocol, "print_budget"):
+            self.protocol.print_budget(mappings)
+
+        self._print_polling_budget(mappings)
+
+    # Prints the amount of messages per second needed to poll the mappings which are not bidirectional
+    def _print_polling_budget(self, mappings):  # pragma: no cover
+        num_polled = 0
+        messages_per_second = 0
+
+        for mapping in mappings:
+            if not mapping.request:
+                continue
+
+            num_polled += 1
+            num_messages = (len(mapping.request) if isinstance(mapping.request, list) else 1)
+            num_messages += (len(mapping.response) if isinstance(mapping.response, list) else 1)
+
+            # Mappings with an own poll interval (see Client) are requested less often
+            settings = self._poll_settings.get(mapping.key, None)
+            interval = max(self._poll_interval, settings[0] if settings else 0)
+
+            messages_per_second += num_messages * 1000 / interval
+
+        do_print(
+            "Polling " + repr(num_polled) + " of " + repr(len(mappings)) + " mappings: " + 
+            repr(messages_per_second) + " msgs/sec (" + repr(self._poll_interval) + "ms interval)"
+        )
         
     # Receive messages (also passes messages to the protocol)
     #@RuntimeStatistics.measure
@@ -381,6 +792,7 @@ class BidirectionalClient(Client, Updateable):
             if not req:
                 raise Exception() #"No request for mapping: " + repr(mapping))
             
+            req.mapping.value_changed = (req.mapping.value != value)
             req.mapping.value = value
             req.notify_listeners()
 
@@ -391,7 +803,7 @@ class BidirectionalClient(Client, Updateable):
     # Calls request_terminated() on all listeners of requests with bidirectional mappings
     def notify_connection_lost(self):
         protocol = self.protocol
-        for r in self.requests:
+        for r in self._requests.values():
             if protocol.is_bidirectional(r.mapping):
                 r.notify_terminated()
         
@@ -423,6 +835,11 @@ class BidirectionalClient(Client, Updateable):
 #    def init(self, midi, client):
 #        pass
 #
+#    # Optional: If implemented, the client passes all registered mappings (unique) here after registration,
+#    # if debugging is enabled, so the protocol can print the resulting traffic.
+#    def print_budget(self, mappings):
+#        pass
+#
 #    # Must return (boolean) if the passed mapping is handled in the bidirectional protocol
 #    def is_bidirectional(self, mapping):
 #        return False
@@ -1,10 +1,10 @@
-from gc import collect, mem_free
+from gc import collect, mem_free, mem_alloc, threshold
 
 from .FootSwitchController import FootSwitchController
-from .RuntimeMeasurement import RuntimeMeasurement
+from .RuntimeMeasurement import RuntimeMeasurement, RuntimeHistogram, TickProfiler, SwitchLatency
 from .actions.Action import Action
 from .Client import Client, BidirectionalClient
-from ..misc import Updater, PeriodCounter, get_option, do_print, format_size, fill_up_to
+from ..misc import Updater, PeriodCounter, Timers, TickClock, get_option, do_print, format_size, fill_up_to, get_current_millis
 from ..stats import Memory #, RuntimeStatistics
 
 
@@ -13,6 +13,15 @@ class Controller(Updater): #ClientRequestListener
 
     # IDs for all available measurements (for statistics)
     STAT_ID_TICK_TIME = 1             # Time one processing loop takes overall
+    STAT_ID_GC_TIME = 2               # Time the garbage collections in idle ticks take (only available if gcIdleCollectBytes is set)
+
+    # Names of the tick phases measured by the profiler (can also be passed to get_measurement(). Updateables
+    # are profiled by their class name additionally, for example "BidirectionalClient" or "UiController".)
+    PHASE_SWITCHES = "Switches"           # Switch scanning
+    PHASE_MIDI_RECEIVE = "MIDI Receive"   # Receiving MIDI messages
+    PHASE_CLIENT = "Client"               # Parsing received messages by the client
+    PHASE_TIMERS = "Timers"               # Timer callbacks
+    PHASE_LEDS = "LEDs"                   # Writing LED changes
 
     # config:   Configuration dictionary. 
     # switches: [           list of switch definitions
@@ -33,7 +42,7 @@ class Controller(Updater): #ClientRequestListener
     #                },
     #                ...
     #           ]
-    def __init__(self, led_driver, midi, protocol = None, config = {}, switches = [], ui = None, period_counter = None):
+    def __init__(self, led_driver, midi, protocol = None, config = {}, switches = [], ui = None, period_counter = None, refresh = None, polling = None):
         Updater.__init__(self)
 
         # Flag which is used by display elements to show the user there is not enough memory left
@@ -52,8 +61,20 @@ class Controller(Updater): #ClientRequestListener
         # Max. number of MIDI messages being parsed before the next switch state evaluation
         self._max_consecutive_midi_msgs = get_option(config, "maxConsecutiveMidiMessages", 10)   
 
+        # Budget for updating the updateables per tick (0: Unlimited). If a budget is set, the updateables are 
+        # updated round robin, continuing in the next tick(s) until all of them have been updated.
+        self._max_updateables_per_tick = get_option(config, "maxUpdateablesPerTick", 0)
+        self._update_budget_millis = get_option(config, "updateBudgetMillis", 0)
+        self._next_updateable = 0
+
         # Statistical measurement for tick time (always active)
-        self._init_measurement(get_option(config, "debugStatsInterval", update_interval))
+        stats_interval = get_option(config, "debugStatsInterval", update_interval)
+        self._init_measurement(stats_interval)
+
+        # Per phase tick profiler (optional)
+        self._profiler = None
+        if get_option(config, "profileTicks", False):
+            self._init_profiler(stats_interval)
 
         # Limit of minimum free memory before low_memory_warning is set to True (the check is done before ticks
         # are running so this should be enough to operate all configurations imaginable. Normally you need about 
@@ -63,6 +84,34 @@ class Controller(Updater): #ClientRequestListener
         # Print debug info        
         self._debug_stats = get_option(config, "debugStats", False)        
 
+        # Detailed memory output on every update (collects garbage each time, so only use this for debugging)
+        self._debug_memory = get_option(config, "debugMemory", False)
+
+        # Idle time garbage collection: When more than this amount of bytes has been allocated since the last 
+        # collection, garbage is collected in the next idle tick (no switch activity and no MIDI messages). 
+        # This keeps the collections away from processing switch pushes. 0 disables the scheduler.
+        self._gc_idle_collect_bytes = get_option(config, "gcIdleCollectBytes", 0)
+        self._gc_last_alloc = mem_alloc()
+        self._tick_idle = False
+
+        self._measurement_gc_time = None
+        if self._gc_idle_collect_bytes:
+            self._measurement_gc_time = RuntimeMeasurement(interval_millis = stats_interval, name = "GC")
+            self._measurement_gc_time.add_listener(self)
+            self.add_updateable(self._measurement_gc_time)
+
+        # Optional threshold for automatic garbage collections (should be higher than gcIdleCollectBytes
+        # so that automatic collections are rare)
+        gc_threshold = get_option(config, "gcThresholdBytes", 0)
+        if gc_threshold:
+            threshold(gc_threshold)
+
+        # Low overhead memory telemetry, sampled after every update pass
+        Memory.start_telemetry(
+            num_samples = get_option(config, "memoryTelemetrySamples", 16),
+            collect_interval = get_option(config, "memoryCollectInterval", 0)
+        )
+
         # Clear MIDI buffers on startup
         self._clear_buffer = get_option(config, "clearBuffers", True)
 
@@ -76,7 +125,7 @@ class Controller(Updater): #ClientRequestListener
             self.period = PeriodCounter(update_interval)        
 
         # Initialize client access.
-        self._init_client(config, protocol)
+        self._init_client(config, protocol, refresh, polling)
 
         # Set up the screen elements
         if self.ui:
@@ -86,14 +135,23 @@ class Controller(Updater): #ClientRequestListener
         # Set up switches
         self._init_switches(switches)
 
+        # Latency tracing per switch (optional)
+        self._latency_measurements = None
+        if get_option(config, "traceLatency", False):
+            self._init_latency_tracing(stats_interval)
+
+        # All mappings have been registered by the UI and switches now
+        self.client.finish_registration()
+
     # Client access. When no protocol is passed, every value will be requested periodically. If a protocol
-    # is passed, bidirectional communication is used according to the protocol.
-    def _init_client(self, config, protocol):
+    # is passed, bidirectional communication is used according to the protocol. refresh optionally sets up
+    # sentinel driven refreshing of the requested values, polling the scheduling of requests (see Client).
+    def _init_client(self, config, protocol, refresh, polling):
         if protocol:
-            self.client = BidirectionalClient(self._midi, config, protocol)
+            self.client = BidirectionalClient(self._midi, config, protocol, refresh, polling)
             self.add_updateable(self.client)
         else:
-            self.client = Client(self._midi, config)
+            self.client = Client(self._midi, config, refresh, polling)
 
     # Initialize switches
     def _init_switches(self, switches):
@@ -133,30 +191,101 @@ class Controller(Updater): #ClientRequestListener
 
     # Single tick in the processing loop. Must return True to keep the loop alive.
     def tick(self):
+        # Take the time for all timing in this tick
+        TickClock.tick()
+
+        # Will be set to False as soon as switches or MIDI messages are processed
+        self._tick_idle = True
+
         # If enabled, remember the tick starting time for statistics
         self._measurement_tick_time.start()       
 
-        # Update all Updateables in periodic intervals, less frequently than every tick.        
-        if self.period.exceeded:
-            self.update()
+        profiler = self._profiler
+        if profiler:
+            profiler.start()
 
-            Memory.watch("Controller: update", only_if_changed = True)
+        # Memoize the enabled states of actions during the tick
+        Action.start_enabled_memo()
+
+        # Fire all timers which are due
+        if profiler:
+            profiler.enter(self._phase_timers)
+
+        Timers.process()
+
+        # Update all Updateables in periodic intervals, less frequently than every tick. If an update
+        # pass has not been finished in the last tick (due to the budget), it is continued here.
+        if self._next_updateable or self.period.exceeded:
+            if self.update():
+                if self._debug_memory:
+                    Memory.watch("Controller: update", only_if_changed = True)
+                else:
+                    Memory.sample()
 
         # Receive all available MIDI messages
         self._receive_midi_messages()
 
+        # Write LED changes (only once per tick)
+        if profiler:
+            profiler.enter(self._phase_leds)
+
+        if self.led_driver.show() and self._latency_measurements:
+            SwitchLatency.display_updated()
+
+        if profiler:
+            profiler.finish()
+
+        # Collect garbage if this is an idle tick
+        if self._tick_idle and self._gc_idle_collect_bytes:
+            self._collect_garbage_if_needed()
+
+        Action.stop_enabled_memo()
+        TickClock.stop()
+
         # Output statistical info if enabled
         self._measurement_tick_time.finish()        
 
         return True
 
     # We do not use the default Updater implementation to check for MIDI messages in between.
+    # If a budget is configured, only a part of the updateables is updated, and the next call 
+    # continues where this one stopped. Returns if the update pass has been completed.
     def update(self):
-        for u in self.updateables:
+        updateables = self.updateables
+        max_items = self._max_updateables_per_tick
+        budget = self._update_budget_millis
+
+        if budget:
+            start = get_current_millis()
+
+        profiler = self._profiler
+
+        cnt = 0
+        while self._next_updateable < len(updateables):
             # Receive MIDI messages in between updates, too
             self._receive_midi_messages()
 
-            u.update()
+            updateable = updateables[self._next_updateable]
+
+            if profiler:
+                profiler.enter(profiler.get(updateable.__class__.__name__, self))
+
+            updateable.update()
+            
+            self._next_updateable += 1
+            cnt += 1
+
+            if max_items and cnt >= max_items:
+                break
+
+            if budget and get_current_millis() - start >= budget:
+                break
+
+        if self._next_updateable < len(updateables):
+            return False
+        
+        self._next_updateable = 0
+        return True
 
     # Receive MIDI messages, and in between check for switch state changes
     def _receive_midi_messages(self):
@@ -164,16 +293,26 @@ class Controller(Updater): #ClientRequestListener
         cnt = 0
         client = self.client
         max_msgs = self._max_consecutive_midi_msgs
+        profiler = self._profiler
 
         while True:
             # Detect switch state changes
             self._process_switches()
 
+            if profiler:
+                profiler.enter(self._phase_midi_receive)
+
             midimsg = self._midi.receive()
 
             # Process the midi message
+            if profiler:
+                profiler.enter(self._phase_client)
+
             client.receive(midimsg)
 
+            if midimsg:
+                self._tick_idle = False
+
             cnt = cnt + 1
             if not midimsg or cnt > max_msgs:
                 break  
@@ -185,12 +324,34 @@ class Controller(Updater): #ClientRequestListener
     def _process_switches(self):
         #self._measurement_switch_jitter.finish()
 
+        if self._profiler:
+            self._profiler.enter(self._phase_switches)
+
         # Update switch states
         for switch in self.switches:
-            switch.process()
+            if switch.process():
+                self._tick_idle = False
 
         #self._measurement_switch_jitter.start()
 
+    # Collects garbage if enough memory has been allocated since the last collection
+    def _collect_garbage_if_needed(self):
+        allocated = mem_alloc()
+
+        # An automatic collection has freed memory in the meantime: Take this as new baseline
+        if allocated < self._gc_last_alloc:
+            self._gc_last_alloc = allocated
+            return
+
+        if allocated - self._gc_last_alloc < self._gc_idle_collect_bytes:
+            return
+        
+        self._measurement_gc_time.start()
+        collect()
+        self._measurement_gc_time.finish()
+
+        self._gc_last_alloc = mem_alloc()
+
     # Returns how many NeoPixels are needed overall
     def _get_num_pixels(self, switches):
         ret = 0
@@ -252,16 +413,63 @@ class Controller(Updater): #ClientRequestListener
         #self._measurement_switch_jitter.add_listener(self)
         #self.add_updateable(self._measurement_switch_jitter)
 
-    # Returns a measurement by ID (currently we only support the tick time measurement)
+    # Set up the tick profiler. Each phase is measured by a RuntimeHistogram which is created on first usage.
+    def _init_profiler(self, interval_millis):
+        profiler = TickProfiler(interval_millis)
+
+        self._phase_switches = profiler.get(self.PHASE_SWITCHES, self)
+        self._phase_midi_receive = profiler.get(self.PHASE_MIDI_RECEIVE, self)
+        self._phase_client = profiler.get(self.PHASE_CLIENT, self)
+        self._phase_timers = profiler.get(self.PHASE_TIMERS, self)
+        self._phase_leds = profiler.get(self.PHASE_LEDS, self)
+
+        self._profiler = profiler
+        self.add_updateable(profiler)
+
+    # Set up latency tracing for all switches. For each switch, two measurements are created, named by 
+    # the switch name with " MIDI" (push to first MIDI message sent) and " Display" (push to LEDs written) 
+    # appended.
+    def _init_latency_tracing(self, interval_millis):
+        self._latency_measurements = {}
+
+        for switch in self.switches:
+            latency = SwitchLatency(interval_millis, switch.id)
+
+            for m in [latency.midi, latency.display]:
+                m.add_listener(self)
+                self.add_updateable(m)
+
+                self._latency_measurements[m.name] = m
+
+            switch.latency = latency
+
+    # Returns a measurement by ID. Profiler phases and switch latencies can be addressed by their name.
     def get_measurement(self, id):
         if id == self.STAT_ID_TICK_TIME:
             return self._measurement_tick_time
+        
+        if id == self.STAT_ID_GC_TIME:
+            return self._measurement_gc_time
+        
+        if not isinstance(id, str):
+            return None
+        
+        if self._profiler and id in self._profiler.phases:
+            return self._profiler.phases[id]
+        
+        if self._latency_measurements:
+            return self._latency_measurements.get(id, None)
 
     # Callback called when the measurement wants to show something
     def measurement_updated(self, measurement):
         if not self._debug_stats: 
             return
         
+        if isinstance(measurement, RuntimeHistogram):
+            # Profiler phases and latencies: No garbage collection here as there are lots of them
+            do_print(fill_up_to(str(measurement.name), 30, '.') + ": Max " + repr(measurement.value) + "us, Avg " + repr(measurement.average) + "us, p50 " + repr(measurement.percentile(50)) + "us, p95 " + repr(measurement.percentile(95)) + "us, p99 " + repr(measurement.percentile(99)) + "us, Calls: " + repr(measurement.calls))
+            return
+
         collect()
-        do_print(fill_up_to(str(measurement.name), 30, '.') + ": Max " + repr(measurement.value) + "ms, Avg " + repr(measurement.average) + "ms, Calls: " + repr(measurement.calls) + ", Free: " + format_size(mem_free()))
+        do_print(fill_up_to(str(measurement.name), 30, '.') + ": Max " + repr(measurement.value) + "ms, Avg " + repr(measurement.average) + "ms, Calls: " + repr(measurement.calls) + ", Free: " + format_size(mem_free()) + " (Min " + format_size(Memory.MIN_FREE_BYTES) + ")")
 
@@ -162,6 +162,10 @@ class ExploreModeController(Updater):
         # Update actions
         self.update()
 
+        # Write LED changes
+        if self.led_driver:
+            self.led_driver.show()
+
         return True
 
     # Called by ExplorePixelAction: Enlightens the next switch according to the passed step value. 
@@ -1,4 +1,4 @@
-from ..misc import Colors, get_option
+from ..misc import Colors, TickClock, get_option
 
 
 # Controller class for a Foot Switch. Each foot switch has three Neopixels.
@@ -30,6 +30,9 @@ class FootSwitchController: #ConditionListener
         self._appl = appl
         self._pushed_state = False
 
+        # Optional latency tracing (SwitchLatency instance, set by the Controller)
+        self.latency = None
+
         self._colors = [(0, 0, 0) for i in range(len(self.pixels))]
         self._brightnesses = [0 for i in range(len(self.pixels))]        
 
@@ -48,7 +51,8 @@ class FootSwitchController: #ConditionListener
             
             action.update_displays()
         
-    # Process the switch: Check if it is currently pushed, set state accordingly
+    # Process the switch: Check if it is currently pushed, set state accordingly. Returns if
+    # the switch is active (currently pushed or just released).
     def process(self):
         # Is the switch currently pushed? If not, return false.
         if not self.pushed:
@@ -62,21 +66,35 @@ class FootSwitchController: #ConditionListener
 
                     action.release()
 
-            return
+                return True
+
+            return False
 
         # Switch is pushed: Has it been pushed before already? 
         if self._pushed_state:
-            return 
+            return True
         
         # Mark as pushed (prevents redundant messages in the following ticks, when the switch can still be down)
         self._pushed_state = True
 
+        # Mark the push time for latency tracing (the exact time of the event if the model provides it, 
+        # or the tick time). Actions and callbacks can access it via their switch.
+        latency = self.latency
+        if latency:
+            timestamp = getattr(self._switch, "timestamp", None)
+            latency.press(timestamp if timestamp != None else TickClock.now())
+
         # Process all push actions assigned to the switch     
         for action in self.actions:
             if not action.enabled:
                 continue
 
             action.push()
+
+        if latency:
+            latency.end_press()
+
+        return True
         
     # Return if the (hardware) switch is currently pushed
     @property
@@ -146,16 +164,26 @@ class FootSwitchController: #ConditionListener
         if len(brightnesses) != len(self.pixels):
             raise Exception() #"Invalid amount of colors: " + repr(len(brightnesses)))
         
+        leds = self._appl.led_driver.leds
+        changed = False
+
         for i in range(len(self.pixels)):
             pixel = self.pixels[i]
-            self._appl.led_driver.leds[pixel] = (
+            color = (
                 int(self._colors[i][0] * brightnesses[i]),   # R
                 int(self._colors[i][1] * brightnesses[i]),   # G
                 int(self._colors[i][2] * brightnesses[i])    # B
             )
 
+            if leds[pixel] != color:
+                leds[pixel] = color
+                changed = True
+
         self._brightnesses = brightnesses
 
+        if changed and self.latency:
+            self.latency.leds_changed()
+
 
 ################################################################################################
 
@@ -171,4 +199,7 @@ class FootSwitchController: #ConditionListener
 #    @property
 #    def pushed(self):
 #        return False
+#
+#    # Optional: Timestamp (milliseconds, see get_current_millis()) of the state change last returned by pushed
+#    timestamp = None
     
@@ -1,6 +1,7 @@
 from os import stat, rename
 from adafruit_midi.system_exclusive import SystemExclusive
-from pymidibridge import PyMidiBridge
+from pymidibridge import PyMidiBridge, PMB_MANUFACTURER_ID
+from .MidiParser import SystemExclusiveView
 from ..misc import do_print
 
 
@@ -19,14 +20,18 @@ class MidiBridgeWrapper:
             event_handler = self                 # handle errors and messages here directly 
         )
 
-    def send(self, midi_message):
-        self._midi.send(midi_message)
+    def send(self, midi_message, priority = False):
+        self._midi.send(midi_message, priority)
 
     def receive(self):
         msg = self._midi.receive()
         
         if msg:
-            self._bridge.receive(msg)
+            # The bridge works on slices of the data, so reusable message views (see MidiParser) are copied
+            if isinstance(msg, SystemExclusiveView) and msg.manufacturer_id == PMB_MANUFACTURER_ID:
+                self._bridge.receive(msg.copy())
+            else:
+                self._bridge.receive(msg)
 
         return msg
     
@@ -11,6 +11,8 @@ from adafruit_midi.midi_message import MIDIUnknownEvent
 from adafruit_midi.control_change import ControlChange
 from adafruit_midi.program_change import ProgramChange
 from adafruit_midi.system_exclusive import SystemExclusive
+
+from .MidiParser import get_data_length
 #from adafruit_midi.mtc_quarter_frame import MtcQuarterFrame
 #from adafruit_midi.channel_pressure import ChannelPressure
 #from adafruit_midi.note_off import NoteOff
@@ -36,7 +38,7 @@ from adafruit_midi.system_exclusive import SystemExclusive
 
 # Describes a routing from source to target, which must be MidiDevices definitions.
 class MidiRouting:
-    def __init__(self, source, target):
+    def __init__(self, source, target, raw = False):
         # Source MIDI device (can be either a AdafruitXXXMidiDevice or 
         # MidiController.PYSWITCH for the application itself)
         self.source = source    
@@ -44,6 +46,12 @@ class MidiRouting:
         # Target MIDI device (can be either a AdafruitXXXMidiDevice or 
         # MidiController.PYSWITCH for the application itself)
         self.target = target    
+
+        # Raw passthrough (only for routings without the application involved): The bytes are forwarded 
+        # without parsing them into messages (see MidiRawPassthrough). Channel filters of the devices do not 
+        # apply then. Only used if all routings of the source are raw, and the source does not feed the 
+        # application.
+        self.raw = raw
         
 
 ##################################################################################################
@@ -57,60 +65,374 @@ class MidiController:
     # Used as source/target for routings to/from the application itself
     APPLICATION = 1
 
-    # routings must be a list of MidiRouting instances
-    def __init__(self, routings):
-        self._routings_from_appl = [x for x in routings if x.source == MidiController.APPLICATION]
-        self._routings_to_appl = [x for x in routings if x.target == MidiController.APPLICATION]
-        self._routings_external = [x for x in routings if x.source != MidiController.APPLICATION and x.target != MidiController.APPLICATION]
+    # Buffer size for raw passthrough if max_thru_bytes is not set
+    DEFAULT_RAW_BUFFER_SIZE = 64
+
+    # Maximum amount of application messages held back while a raw passthrough forwards a SysEx message 
+    # in parts (further messages are dropped)
+    MAX_HELD_BACK_MESSAGES = 20
+
+    # routings must be a list of MidiRouting instances. The routings are compiled to per source target lists here,
+    # so every source is only read once per receive() call.
+    #
+    # For sources which do not feed the application (MIDI thru), up to max_thru_messages messages (0: unlimited) 
+    # or max_thru_bytes bytes (0: unlimited) are forwarded per source on each receive() call. For raw routings,
+    # max_thru_bytes is the buffer size.
+    def __init__(self, routings, max_thru_messages = 1, max_thru_bytes = 0):
+        self._max_thru_messages = max_thru_messages
+        self._max_thru_bytes = max_thru_bytes
+
+        # Targets of the application's messages
+        self._appl_targets = []
+
+        # Sources feeding the application (round robin), with their external targets (MIDI thru)
+        self._appl_sources = []
+        self._appl_source_targets = []
+        self._next_appl_source = 0
+
+        # Sources only feeding external targets, with their targets
+        self._external_sources = []
+        self._external_source_targets = []
+
+        for r in routings:
+            if r.source == MidiController.APPLICATION:
+                if not r.target in self._appl_targets:
+                    self._appl_targets.append(r.target)
+
+            elif r.target == MidiController.APPLICATION:
+                if not r.source in self._appl_sources:
+                    self._appl_sources.append(r.source)
+                    self._appl_source_targets.append([])
+
+        for r in routings:
+            if r.source == MidiController.APPLICATION or r.target == MidiController.APPLICATION:
+                continue
+
+            if r.source in self._appl_sources:
+                targets = self._appl_source_targets[self._appl_sources.index(r.source)]
+            else:
+                if not r.source in self._external_sources:
+                    self._external_sources.append(r.source)
+                    self._external_source_targets.append([])
+
+                targets = self._external_source_targets[self._external_sources.index(r.source)]
+
+            if not r.target in targets:
+                targets.append(r.target)
+
+        # Raw passthrough for sources which only have raw routings
+        self._raw_passthroughs = []
+
+        # Raw passthroughs which share targets with the application (see send())
+        self._appl_raw_passthroughs = []
+
+        for i in reversed(range(len(self._external_sources))):
+            source = self._external_sources[i]
+
+            raw = True
+            for r in routings:
+                if r.source == source and not r.raw:
+                    raw = False
+                    break
+            
+            if not raw:
+                continue
+
+            passthrough = MidiRawPassthrough(
+                source = source,
+                targets = self._external_source_targets[i],
+                buffer_size = max_thru_bytes if max_thru_bytes else self.DEFAULT_RAW_BUFFER_SIZE
+            )
+
+            self._raw_passthroughs.append(passthrough)
+
+            for target in self._external_source_targets[i]:
+                if target in self._appl_targets:
+                    self._appl_raw_passthroughs.append(passthrough)
+                    break
 
-    def send(self, midi_message):
-        # Send to all routings which have APPLICATION as source
-        for r in self._routings_from_appl:        
-            r.target.send(midi_message)
+            del self._external_sources[i]
+            del self._external_source_targets[i]
 
+        # Output queues of all targets (devices with out_queue_size set)
+        self._output_queues = []
+
+        for r in routings:
+            if r.target == MidiController.APPLICATION:
+                continue
+
+            queue = getattr(r.target, "output_queue", None)
+            if queue and not queue in self._output_queues:
+                self._output_queues.append(queue)
+
+        # Application messages held back while a SysEx message is forwarded in parts: (message, priority)
+        self._held_back = []
+
+    # Send to all routings which have APPLICATION as source. priority messages (user triggered) are 
+    # written before all others by targets with an output queue.
+    #
+    # While a raw passthrough to one of the targets has forwarded only a part of a SysEx message, the messages
+    # are held back and sent (in order) after the end of the SysEx has been forwarded.
+    def send(self, midi_message, priority = False):
+        if self._held_back or self._raw_sysex_open():
+            if len(self._held_back) < self.MAX_HELD_BACK_MESSAGES:
+                self._held_back.append((midi_message, priority))
+            return
+        
+        self._send(midi_message, priority)
+
+    # Sends to all targets of the application
+    def _send(self, midi_message, priority):
+        if priority:
+            for target in self._appl_targets:
+                target.send(midi_message, True)
+        else:
+            for target in self._appl_targets:
+                target.send(midi_message)
+
+    # Output queues of the targets (for statistics)
+    @property
+    def output_queues(self):
+        return self._output_queues
+
+    # Returns the next message for the application, or None if no message is available. The sources feeding the 
+    # application are read round robin (starting after the one which delivered the last message), so no source
+    # can starve the others.
     def receive(self):
+        # Write queued output
+        for queue in self._output_queues:
+            queue.process()
+
         # Process routings without APPLICATION involved 
         self._process_external_routings()
 
+        # Send held back application messages as soon as no SysEx message is open anymore
+        if self._held_back and not self._raw_sysex_open():
+            for (midi_message, priority) in self._held_back:
+                self._send(midi_message, priority)
+
+            self._held_back.clear()
+
         # Process routings targeting APPLICATION
-        for r in self._routings_to_appl:
-            msg = r.source.receive()
+        sources = self._appl_sources
+        num_sources = len(sources)
+        
+        for i in range(num_sources):
+            index = (self._next_appl_source + i) % num_sources
+
+            msg = sources[index].receive()
 
             if msg:
+                # Forward to external targets of the source, if any
+                self._forward(msg, self._appl_source_targets[index])
+
                 # Return first message for APPLICATION in the queue (next ticks will deliver the next messages)
-                return msg                
+                self._next_appl_source = (index + 1) % num_sources
+                return msg
     
-    # Process all routings where APPLICATION is not involved (this processes one message of each source every time)
+    # Returns if a raw passthrough to one of the application's targets has left a SysEx message open
+    def _raw_sysex_open(self):
+        for p in self._appl_raw_passthroughs:
+            if p.sysex_open:
+                return True
+            
+        return False
+
+    # Process all sources which do not feed APPLICATION (this drains each source up to the message/byte budget)
     def _process_external_routings(self):
-        routings = self._routings_external
-        if not routings:
-            return
+        for p in self._raw_passthroughs:
+            p.process()
+
+        sources = self._external_sources
+        max_msgs = self._max_thru_messages
+        max_bytes = self._max_thru_bytes
         
-        # Get all sources messages
-        sources = []
-        results = []
+        for i in range(len(sources)):
+            source = sources[i]
+            targets = self._external_source_targets[i]
 
-        for r in routings:
-            if r.source in sources:
-                continue
+            cnt = 0
+            size = 0
 
-            sources.append(r.source)
-            results.append(r.source.receive())
-            
-        # Distribute messages
-        for r in routings:
-            for i in range(len(sources)):
-                if sources[i] != r.source:
-                    continue
+            while True:
+                msg = source.receive()
+                if not msg:
+                    break
+
+                self._forward(msg, targets)
 
-                msg = results[i]
+                cnt += 1
+                if max_msgs and cnt >= max_msgs:
+                    break
+
+                if max_bytes:
+                    size += self._get_message_size(msg)
+                    if size >= max_bytes:
+                        break
+
+    # Returns the (approximate) size of a message in bytes
+    def _get_message_size(self, msg):
+        if isinstance(msg, SystemExclusive):
+            return len(msg.manufacturer_id) + len(msg.data) + 2
         
-                if not msg:
-                    continue
-                
-                if isinstance(msg, MIDIUnknownEvent):
-                    continue
+        return 3
+
+    # Sends a message to all passed targets
+    def _forward(self, msg, targets):
+        if isinstance(msg, MIDIUnknownEvent):
+            return
                 
-                r.target.send(msg)
+        for target in targets:
+            target.send(msg)
+
+
+##################################################################################################
+
+
+# Raw MIDI thru for one source: Reads the available bytes into a reusable buffer and writes them to the 
+# targets without parsing messages. The source must implement read_raw(buffer) and the targets write_raw(buffer).
+#
+# Only complete messages are written, so messages sent to the same targets by others (the application, 
+# for example) cannot end up inside a message: Incomplete messages are held back until the rest has arrived.
+# If a held back message relies on running status, its status byte is written before it. SysEx messages longer 
+# than the buffer are forwarded in parts. In this case, sysex_open is set until the end of the SysEx has been 
+# written, and MidiController holds back the application's messages to the same targets meanwhile. Messages 
+# of other sources are not held back.
+class MidiRawPassthrough:
+
+    def __init__(self, source, targets, buffer_size = 64):
+        self._source = source
+        self._targets = targets
+
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._status_buffer = bytearray(1)
+
+        # Amount of held back bytes at the start of the buffer
+        self._pending = 0
+
+        # Parser state at the end of the buffered data
+        self._status = 0          # Running status (0: None)
+        self._remaining = 0       # Data bytes missing for the current message
+        self._sysex = False       # Inside a SysEx message
+
+        # Running status valid for the first byte in the buffer
+        self._start_status = 0
+
+        # The written data ends inside a SysEx message (forwarded in parts)
+        self.sysex_open = False
+
+    # Forwards all available bytes (up to the buffer size). Returns the amount of bytes read.
+    def process(self):
+        view = self._view
+        pending = self._pending
+
+        num = self._source.read_raw(view[pending:])
+        if not num:
+            return 0
+        
+        end = pending + num
+        boundary = self._scan(pending, end)
+
+        sysex_open = False
+
+        if boundary == 0 and end == len(view):
+            # Buffer full without any complete message: Forward anyway
+            boundary = end
+            self._boundary_status = self._status
+            sysex_open = self._sysex
+
+        if boundary > 0:
+            self._write(view[:boundary])
+            self.sysex_open = sysex_open
+
+            # Move held back bytes to the start of the buffer
+            tail = end - boundary
+            if tail:
+                self._buffer[:tail] = view[boundary:end]
+
+            self._pending = tail
+            self._start_status = self._boundary_status
+        else:
+            self._pending = end
+
+        return num
+    
+    # Writes the passed chunk to all targets
+    def _write(self, chunk):
+        prefix = chunk[0] < 0x80 and self._start_status
+
+        if prefix:
+            self._status_buffer[0] = self._start_status
+
+        for target in self._targets:
+            if prefix:
+                target.write_raw(self._status_buffer)
+
+            target.write_raw(chunk)
+
+    # Parses the buffer from start to end (continuing the state). Returns the position after the last complete 
+    # message in the buffer (0 if none), and stores the running status valid there in self._boundary_status.
+    def _scan(self, start, end):
+        buffer = self._buffer
+
+        status = self._status
+        remaining = self._remaining
+        sysex = self._sysex
+
+        boundary = 0
+        boundary_status = self._start_status
+
+        for i in range(start, end):
+            b = buffer[i]
+
+            if b >= 0xf8:
+                # Real time messages can occur anywhere
+                if remaining == 0 and not sysex:
+                    boundary = i + 1
+                    boundary_status = status
+
+            elif b == 0xf0:
+                sysex = True
+                status = 0
+                remaining = 0
+
+            elif b == 0xf7:
+                sysex = False
+                remaining = 0
+                boundary = i + 1
+                boundary_status = status
+
+            elif b >= 0x80:
+                sysex = False
+                status = b if b < 0xf0 else 0
+                remaining = get_data_length(b)
+
+                if remaining == 0:
+                    boundary = i + 1
+                    boundary_status = status
+
+            elif not sysex:
+                if remaining == 0:
+                    if not status:
+                        # Stray data byte: Just pass it on
+                        boundary = i + 1
+                        boundary_status = status
+                        continue
+
+                    # Running status
+                    remaining = get_data_length(status)
+
+                remaining -= 1
+
+                if remaining == 0:
+                    boundary = i + 1
+                    boundary_status = status
+
+        self._status = status
+        self._remaining = remaining
+        self._sysex = sysex
+        self._boundary_status = boundary_status
+
+        return boundary
 
-                break
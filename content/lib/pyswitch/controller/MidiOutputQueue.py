@@ -0,0 +1,189 @@
+from ..misc import TickClock
+from .RuntimeMeasurement import SwitchLatency
+
+
+# Non-blocking output queue for a MIDI device. Messages are stored serialized in preallocated ring buffers and
+# written by process(), which must be called regularly (this is done by MidiController.receive()). If a data
+# rate is set, only as many bytes are written as the port can take in the time passed since the last call
+# (DIN MIDI with 31250 baud takes about 3 bytes per millisecond), so writing never blocks for long.
+#
+# Priority messages (user triggered SET messages) are written before all others. Messages are never split up
+# by other messages, and if a SysEx message is queued in parts (raw MIDI thru), no priority message is written 
+# before its end. If a message does not fit into the queue anymore, it is dropped.
+#
+# Switch latencies (see SwitchLatency) are recorded when the priority message triggered by the switch has been 
+# written completely, not when it is queued.
+class MidiOutputQueue:
+
+    # write:                   Function taking a buffer, writing it to the port
+    # size:                    Size of each of the two queues (priority and normal) in bytes
+    # bytes_per_millisecond:   Data rate of the port (0: Unlimited, all queued messages are written on process())
+    # max_burst_bytes:         Maximum bytes written at once (should be the size of the hardware FIFO of the port)
+    def __init__(self, write, size = 512, bytes_per_millisecond = 0, max_burst_bytes = 32):
+        self._write = write
+        self._bytes_per_millisecond = bytes_per_millisecond
+        self._max_burst_bytes = max_burst_bytes
+
+        self._queue_priority = _MessageRing(size)
+        self._queue_normal = _MessageRing(size)
+
+        # Message currently being written
+        self._out = bytearray(size)
+        self._out_view = memoryview(self._out)
+        self._out_pos = 0
+        self._out_len = 0
+        self._sysex_open = False      # A SysEx message of the normal queue has not been terminated yet
+
+        # Latency traces of the queued priority messages (None for messages not accounted to a switch), 
+        # and the one of the message currently being written
+        self._priority_traces = []
+        self._out_trace = None
+
+        # Data rate limiting
+        self._credit = 0
+        self._last_time = TickClock.now()
+
+        # Statistics
+        self.num_sent = 0             # Messages written completely
+        self.num_dropped = 0          # Messages dropped because the queue was full
+        self.max_depth = 0            # Maximum amount of bytes queued
+
+    # Amount of bytes currently queued
+    @property
+    def depth(self):
+        return self._queue_priority.fill + self._queue_normal.fill + self._out_len - self._out_pos
+
+    # Adds a serialized message to the queue. Returns if the message has been queued.
+    def send(self, data, priority = False):
+        queue = self._queue_priority if priority else self._queue_normal
+
+        if not queue.push(data):
+            self.num_dropped += 1
+            return False
+
+        if priority:
+            self._priority_traces.append(SwitchLatency.midi_queued())
+
+        depth = self.depth
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+        return True
+
+    # Writes as many bytes as the data rate allows
+    def process(self):
+        budget = self._get_budget()
+
+        while budget > 0:
+            if self._out_pos >= self._out_len:
+                # Get next message (priority first)
+                self._out_pos = 0
+                self._out_len = 0 if self._sysex_open else self._queue_priority.pop_into(self._out)
+
+                if self._out_len:
+                    self._out_trace = self._priority_traces.pop(0)
+                else:
+                    self._out_len = self._queue_normal.pop_into(self._out)
+
+                    if not self._out_len:
+                        return
+                    
+                    self._update_sysex_state()
+
+            end = min(self._out_len, self._out_pos + budget)
+
+            self._write(self._out_view[self._out_pos:end])
+
+            budget -= end - self._out_pos
+            if self._bytes_per_millisecond:
+                self._credit -= end - self._out_pos
+
+            self._out_pos = end
+
+            if self._out_pos >= self._out_len:
+                self.num_sent += 1
+
+                if self._out_trace:
+                    self._out_trace.midi_written()
+                    self._out_trace = None
+
+    # Determines if the current message (from the normal queue) leaves a SysEx message open
+    def _update_sysex_state(self):
+        out = self._out
+
+        for i in reversed(range(self._out_len)):
+            b = out[i]
+            if b == 0xf0:
+                self._sysex_open = True
+                return
+            
+            if b == 0xf7 or (b >= 0x80 and b < 0xf8):
+                self._sysex_open = False
+                return
+
+    # Returns how many bytes can be written now
+    def _get_budget(self):
+        if not self._bytes_per_millisecond:
+            return len(self._out)
+
+        now = TickClock.now()
+
+        self._credit = min(self._credit + (now - self._last_time) * self._bytes_per_millisecond, self._max_burst_bytes)
+        self._last_time = now
+
+        return int(self._credit)
+
+
+##################################################################################################
+
+
+# Ring buffer holding serialized messages (each prefixed by its length as two bytes)
+class _MessageRing:
+
+    def __init__(self, size):
+        self._buffer = bytearray(size)
+        self._read_pos = 0
+        self.fill = 0
+
+    # Adds a message. Returns False if there is not enough space.
+    def push(self, data):
+        buffer = self._buffer
+        size = len(buffer)
+        length = len(data)
+
+        if self.fill + length + 2 > size:
+            return False
+
+        pos = (self._read_pos + self.fill) % size
+
+        buffer[pos] = length >> 8
+        buffer[(pos + 1) % size] = length & 0xff
+
+        pos = (pos + 2) % size
+        for i in range(length):
+            buffer[pos] = data[i]
+            pos = (pos + 1) % size
+
+        self.fill += length + 2
+        return True
+
+    # Removes the next message and copies it to the start of target. Returns its length (0 if empty).
+    def pop_into(self, target):
+        if not self.fill:
+            return 0
+
+        buffer = self._buffer
+        size = len(buffer)
+        pos = self._read_pos
+
+        length = (buffer[pos] << 8) + buffer[(pos + 1) % size]
+
+        pos = (pos + 2) % size
+        for i in range(length):
+            target[i] = buffer[pos]
+            pos = (pos + 1) % size
+
+        self._read_pos = pos
+        self.fill -= length + 2
+
+        return length
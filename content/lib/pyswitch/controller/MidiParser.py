@@ -0,0 +1,290 @@
+from adafruit_midi.midi_message import MIDIUnknownEvent
+from adafruit_midi.control_change import ControlChange
+from adafruit_midi.program_change import ProgramChange
+from adafruit_midi.system_exclusive import SystemExclusive
+
+
+# Returns the amount of data bytes for a status byte (SysEx and real time messages return 0)
+def get_data_length(status):
+    if status < 0xc0 or (status >= 0xe0 and status < 0xf0) or status == 0xf2:
+        return 2
+
+    if status < 0xe0 or status == 0xf1 or status == 0xf3:
+        return 1
+
+    return 0
+
+
+##################################################################################################
+
+
+# Reusable message views returned by MidiParser. They inherit from the adafruit_midi message classes, so they can be
+# used like the original messages, but they are only valid until the next message has been received from the parser.
+# Copy them if you need to keep them.
+
+# SysEx view: manufacturer_id is a bytes object, data a memoryview into the parser's buffer.
+class SystemExclusiveView(SystemExclusive):
+    def __init__(self):
+        self.manufacturer_id = None
+        self.data = None
+        self._frame = None
+
+    # Serialized message
+    def __bytes__(self):
+        return bytes(self._frame)
+
+    # Returns a copy which is independent of the parser's buffer
+    def copy(self):
+        return SystemExclusive(
+            manufacturer_id = self.manufacturer_id,
+            data = bytes(self.data)
+        )
+
+
+# Control change view
+class ControlChangeView(ControlChange):
+    def __init__(self):
+        self.channel = 0
+        self.control = 0
+        self.value = 0
+
+
+# Program change view
+class ProgramChangeView(ProgramChange):
+    def __init__(self):
+        self.channel = 0
+        self.patch = 0
+
+
+# View for all other messages (only the status is available)
+class UnknownEventView(MIDIUnknownEvent):
+    def __init__(self):
+        self.channel = None
+        self.status = 0
+
+
+##################################################################################################
+
+
+# Lightweight MIDI parser which can be used instead of adafruit_midi.MIDI.receive(). It reads all bytes currently
+# available from the port into a preallocated ring buffer, and hands out reusable message views instead of creating
+# new message objects. SysEx messages are assembled in a preallocated buffer (longer messages are dropped).
+#
+# in_channel can be None (all channels), a channel number or a tuple of channel numbers.
+class MidiParser:
+
+    def __init__(self, port_in, in_channel = None, buffer_size = 100, max_sysex_size = 128):
+        self._port_in = port_in
+
+        if in_channel == None or isinstance(in_channel, tuple):
+            self._in_channels = in_channel
+        else:
+            self._in_channels = (in_channel,)
+
+        # Ring buffer for incoming bytes
+        self._ring = bytearray(buffer_size)
+        self._ring_view = memoryview(self._ring)
+        self._read_pos = 0        # Position of the next byte to parse
+        self._fill = 0            # Amount of bytes not parsed yet
+
+        # SysEx assembly
+        self._sysex = bytearray(max_sysex_size)
+        self._sysex_view = memoryview(self._sysex)
+        self._sysex_len = 0
+        self._in_sysex = False
+        self._sysex_overflow = False
+
+        # Parser state for other messages
+        self._running_status = 0  # Running status (channel messages only)
+        self._current_status = 0  # Status of the message currently being parsed (0: None)
+        self._remaining = 0       # Data bytes missing for the current message
+        self._data_1 = 0          # First data byte of the current message
+
+        # Reusable message views
+        self._view_sysex = SystemExclusiveView()
+        self._view_cc = ControlChangeView()
+        self._view_pc = ProgramChangeView()
+        self._view_unknown = UnknownEventView()
+
+    # Returns the next message, or None if no complete message is available. The message is only valid
+    # until the next call.
+    def receive(self):
+        self._read_port()
+
+        ring = self._ring
+        size = len(ring)
+
+        while self._fill > 0:
+            b = ring[self._read_pos]
+
+            self._read_pos = (self._read_pos + 1) % size
+            self._fill -= 1
+
+            msg = self._parse(b)
+            if msg:
+                return msg
+
+        return None
+
+    # Reads all available bytes from the port into the ring buffer (as far as there is space)
+    def _read_port(self):
+        ring_view = self._ring_view
+        size = len(ring_view)
+
+        while self._fill < size:
+            write_pos = (self._read_pos + self._fill) % size
+            space = min(size - self._fill, size - write_pos)
+
+            num = self._port_in.readinto(ring_view[write_pos:write_pos + space])
+            if not num:
+                return
+
+            self._fill += num
+
+            if num < space:
+                return
+
+    # Parses one byte. Returns a message view if a message is complete.
+    def _parse(self, b):
+        # Real time messages can occur anywhere
+        if b >= 0xf8:
+            return self._get_unknown(b, None)
+
+        # SysEx start
+        if b == 0xf0:
+            self._in_sysex = True
+            self._sysex_overflow = False
+            self._sysex[0] = b
+            self._sysex_len = 1
+
+            self._running_status = 0
+            self._current_status = 0
+            return None
+
+        if self._in_sysex:
+            if b < 0x80:
+                self._append_sysex(b)
+                return None
+
+            self._in_sysex = False
+
+            if b == 0xf7:
+                self._append_sysex(b)
+
+                if self._sysex_overflow:
+                    return None
+
+                return self._get_sysex()
+
+            # Any other status byte terminates the SysEx message (which is dropped)
+
+        if b >= 0x80:
+            if b == 0xf7:
+                return None
+
+            self._running_status = b if b < 0xf0 else 0
+            self._remaining = get_data_length(b)
+
+            if self._remaining == 0:
+                self._current_status = 0
+                return self._get_unknown(b, None)
+
+            self._current_status = b
+            return None
+
+        # Data byte
+        if not self._current_status:
+            if not self._running_status:
+                # Stray data byte
+                return None
+
+            self._current_status = self._running_status
+            self._remaining = get_data_length(self._running_status)
+
+        self._remaining -= 1
+
+        if self._remaining > 0:
+            self._data_1 = b
+            return None
+
+        status = self._current_status
+        self._current_status = 0
+
+        if get_data_length(status) == 1:
+            return self._get_message(status, b, 0)
+
+        return self._get_message(status, self._data_1, b)
+
+    # Adds a byte to the SysEx buffer
+    def _append_sysex(self, b):
+        if self._sysex_len >= len(self._sysex):
+            self._sysex_overflow = True
+            return
+
+        self._sysex[self._sysex_len] = b
+        self._sysex_len += 1
+
+    # Returns the SysEx view for the assembled message
+    def _get_sysex(self):
+        length = self._sysex_len
+        sysex = self._sysex
+
+        id_length = 3 if length > 1 and sysex[1] == 0 else 1
+        if length < id_length + 2:
+            return None
+
+        view = self._view_sysex
+
+        # The manufacturer ID is only re-created if it changes
+        manufacturer_id = view.manufacturer_id
+        if not manufacturer_id or len(manufacturer_id) != id_length or not self._sysex_equals(manufacturer_id, 1):
+            view.manufacturer_id = bytes(sysex[1:1 + id_length])
+
+        frame = self._sysex_view[:length]
+
+        view._frame = frame
+        view.data = frame[1 + id_length:length - 1]
+
+        return view
+
+    # Returns if the passed bytes are equal to the SysEx buffer at the passed position
+    def _sysex_equals(self, data, pos):
+        sysex = self._sysex
+        for i in range(len(data)):
+            if sysex[pos + i] != data[i]:
+                return False
+
+        return True
+
+    # Returns a view for a channel or system common message, or None if filtered
+    def _get_message(self, status, data_1, data_2):
+        if status >= 0xf0:
+            return self._get_unknown(status, None)
+
+        channel = status & 0x0f
+        if self._in_channels != None and not channel in self._in_channels:
+            return None
+
+        msg_type = status & 0xf0
+
+        if msg_type == 0xb0:
+            view = self._view_cc
+            view.channel = channel
+            view.control = data_1
+            view.value = data_2
+            return view
+
+        if msg_type == 0xc0:
+            view = self._view_pc
+            view.channel = channel
+            view.patch = data_1
+            return view
+
+        return self._get_unknown(status, channel)
+
+    # Returns the view for unknown messages
+    def _get_unknown(self, status, channel):
+        view = self._view_unknown
+        view.status = status
+        view.channel = channel
+        return view
@@ -1,4 +1,4 @@
-from ..misc import EventEmitter, Updateable, get_current_millis
+from ..misc import EventEmitter, Updateable, TickClock, get_current_millis, get_current_micros
 
 # Measurement of runtimes 
 class RuntimeMeasurement(EventEmitter, Updateable):  
@@ -29,7 +29,7 @@ class RuntimeMeasurement(EventEmitter, Updateable):
         return self._time_num
 
     def update(self):
-        current = get_current_millis()
+        current = TickClock.now()
         if self._last_output + self.interval_millis < current:
             self._last_output = current
 
@@ -49,7 +49,7 @@ class RuntimeMeasurement(EventEmitter, Updateable):
 
     # Start the measurement
     def start(self):
-        self.start_time = get_current_millis()
+        self.start_time = self._time()
 
     # Adds the current diff to the haystack
     def finish(self):
@@ -57,10 +57,17 @@ class RuntimeMeasurement(EventEmitter, Updateable):
         if start == 0:
             return
         
-        now = get_current_millis()
+        now = self._time()
         self.end_time = now
         
-        diff = now - start
+        self.add(now - start)
+
+    # Returns the current timestamp in the unit of the measurement
+    def _time(self):
+        return get_current_millis()
+
+    # Adds a measured time (milliseconds)
+    def add(self, diff):
         if diff > self.value:
             self.value = diff
 
@@ -71,6 +78,238 @@ class RuntimeMeasurement(EventEmitter, Updateable):
 ################################################################################
 
 
+# Runtime measurement which additionally counts the times in a fixed set of buckets, so percentiles
+# can be determined without storing the single values. Histograms measure in microseconds, as most 
+# of the profiled phases take well below one millisecond.
+class RuntimeHistogram(RuntimeMeasurement):
+
+    # Upper bounds of the buckets in microseconds. Times above the last bound go into an extra bucket.
+    BUCKET_BOUNDS = (0, 50, 100, 200, 300, 500, 800, 1000, 2000, 3000, 5000, 8000, 12000, 20000, 30000, 50000, 80000, 120000, 200000)
+
+    def __init__(self, interval_millis, name = None):
+        self.buckets = [0 for i in range(len(self.BUCKET_BOUNDS) + 1)]
+        
+        # Time accumulated in the current tick (used by TickProfiler)
+        self.tick_time = 0
+        self.tick_entered = False
+
+        super().__init__(interval_millis, name)
+
+    # Initialize the instance
+    def reset(self):
+        super().reset()
+
+        buckets = self.buckets
+        for i in range(len(buckets)):
+            buckets[i] = 0
+
+    # Returns the current timestamp in microseconds
+    def _time(self):
+        return get_current_micros()
+
+    # Adds a measured time (microseconds)
+    def add(self, diff):
+        super().add(diff)
+
+        bounds = self.BUCKET_BOUNDS
+        num_bounds = len(bounds)
+        
+        i = 0
+        while i < num_bounds and diff > bounds[i]:
+            i += 1
+
+        self.buckets[i] += 1
+
+    # Returns the upper bucket bound (microseconds) below which the passed percentage (0..100) of the 
+    # measured times are. Returns None if nothing has been measured, or -1 if the percentile is in the 
+    # overflow bucket.
+    def percentile(self, percent):
+        num = self._time_num
+        if num == 0:
+            return None
+        
+        limit = num * percent / 100
+        bounds = self.BUCKET_BOUNDS
+        buckets = self.buckets
+        
+        cnt = 0
+        for i in range(len(bounds)):
+            cnt += buckets[i]
+            if cnt and cnt >= limit:
+                return bounds[i]
+            
+        return -1
+
+
+################################################################################
+
+
+# Profiler for the phases of a processing tick. The time between two calls of enter() is accounted to the 
+# phase entered before, so there is only one clock read per phase change. At the end of the tick, the 
+# accumulated time of each phase is added to the phase's histogram.
+class TickProfiler(Updateable):
+
+    def __init__(self, interval_millis):
+        self.interval_millis = interval_millis
+        self.phases = {}
+
+        self._current = None
+        self._last_time = 0
+        self._entered = []
+
+    # Returns the histogram for the given phase name (created on first usage). listener will be
+    # added to new histograms, if passed.
+    def get(self, name, listener = None):
+        phase = self.phases.get(name, None)
+        if not phase:
+            phase = RuntimeHistogram(interval_millis = self.interval_millis, name = name)
+            if listener:
+                phase.add_listener(listener)
+                
+            self.phases[name] = phase
+        
+        return phase
+
+    # Must be called at the start of each tick
+    def start(self):
+        self._current = None
+        self._last_time = get_current_micros()
+
+    # Enters a phase (RuntimeHistogram as returned by get()). The time since the last phase change is accounted 
+    # to the phase entered before. If None is passed, the following time is not accounted to any phase.
+    def enter(self, phase):
+        now = get_current_micros()
+        
+        current = self._current
+        if current:
+            current.tick_time += now - self._last_time
+
+        self._last_time = now
+        self._current = phase
+
+        if phase and not phase.tick_entered:
+            phase.tick_entered = True
+            self._entered.append(phase)
+
+    # Must be called at the end of each tick. Adds the accumulated times to the histograms.
+    def finish(self):
+        self.enter(None)
+
+        entered = self._entered
+        for phase in entered:
+            phase.add(phase.tick_time)
+            phase.tick_time = 0
+            phase.tick_entered = False
+
+        entered.clear()
+
+    # Updates all phase histograms (triggers the output)
+    def update(self):
+        for phase in self.phases.values():
+            phase.update()
+
+
+################################################################################
+
+
+# Latency tracing for a switch: Measures the time from detecting a push until the first MIDI message has 
+# been sent, and until the first change of the switch's LEDs or labels is visible (this can also be caused 
+# by the feedback of the device). The switch (FootSwitchController) marks the push, the MIDI controller, the
+# switch, its actions and the Controller report the outputs.
+class SwitchLatency:
+
+    # Trace of the switch whose actions are currently processed (only set during press handling)
+    current = None
+
+    # Traces whose LEDs have changed, waiting for the next LED output
+    _pending_display = []
+
+    def __init__(self, interval_millis, name):
+        self.midi = RuntimeHistogram(interval_millis = interval_millis, name = name + " MIDI")
+        self.display = RuntimeHistogram(interval_millis = interval_millis, name = name + " Display")
+
+        self.press_time = 0       # Microseconds
+        self._midi_pending = False
+
+        # Waiting for the first display change after the push
+        self.display_pending = False
+
+    # Marks the switch as pushed at the passed timestamp (milliseconds). All MIDI messages sent until end_press() 
+    # is called are accounted to this switch.
+    def press(self, timestamp):
+        self.press_time = timestamp * 1000
+        self._midi_pending = True
+        self.display_pending = True
+
+        SwitchLatency.current = self
+
+    # Ends the press handling
+    def end_press(self):
+        SwitchLatency.current = None
+
+    # Must be called whenever a MIDI message has been written to the port
+    @staticmethod
+    def midi_sent():
+        trace = SwitchLatency.midi_queued()
+        if trace:
+            trace.midi_written()
+
+    # Must be called whenever a MIDI message has been queued for output. Returns the trace the message is accounted
+    # to (None if no switch is processed or its first message has already been sent), which has to be notified by
+    # midi_written() when the message has actually been written.
+    @staticmethod
+    def midi_queued():
+        trace = SwitchLatency.current
+        if not trace or not trace._midi_pending:
+            return None
+        
+        trace._midi_pending = False
+        return trace
+
+    # Records the MIDI latency of the switch
+    def midi_written(self):
+        self.midi.add(get_current_micros() - self.press_time)
+
+    # Must be called when the LEDs of the switch have changed. The latency is recorded when the LEDs have 
+    # actually been written (see display_updated()).
+    def leds_changed(self):
+        if not self.display_pending:
+            return
+        
+        if not self in SwitchLatency._pending_display:
+            SwitchLatency._pending_display.append(self)
+
+    # Must be called when a label of the switch has changed (labels are shown with the next refresh of the 
+    # display, which is not controlled by the application, so this is the last point which can be traced)
+    def label_changed(self):
+        if not self.display_pending:
+            return
+        
+        self._display_written(get_current_micros())
+
+    # Must be called whenever the LEDs have actually been written
+    @staticmethod
+    def display_updated():
+        pending = SwitchLatency._pending_display
+        if not pending:
+            return
+        
+        now = get_current_micros()
+        for trace in pending:
+            if trace.display_pending:
+                trace._display_written(now)
+
+        pending.clear()
+
+    # Records the display latency
+    def _display_written(self, now):
+        self.display_pending = False
+        self.display.add(now - self.press_time)
+
+
+################################################################################
+
+
 # Listener for runtime measurement changes
 #class RuntimeMeasurementListener:
 #    def measurement_updated(self, measurement):
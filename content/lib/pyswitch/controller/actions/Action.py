@@ -8,6 +8,11 @@ class Action(Updateable):
     
     _next_id = 0   # Global counted action ids (internal, just used for debugging!)
 
+    # Memoization of the enabled state of all actions (see enabled). The memo is only active inside 
+    # Controller.tick(), and is invalidated whenever enabled states could have changed.
+    _enabled_epoch = None      # Current epoch (None: No memoization)
+    _last_enabled_epoch = 0
+
     # config: {
     #      "callback":             Callback instance to update the display and LEDs. Must contain an update_displays(action) function. Optional. 
     #
@@ -23,6 +28,7 @@ class Action(Updateable):
     def __init__(self, config = {}):
         self.uses_switch_leds = get_option(config, "useSwitchLeds", False)
         self._initialized = False
+        self.switch = None
 
         self.label = get_option(config, "display", None)
         self.callback = get_option(config, "callback", None)
@@ -32,6 +38,12 @@ class Action(Updateable):
         self._enable_callback = get_option(config, "enableCallback", None)
         self._last_enabled = -1
 
+        self._enabled = True
+        self._enabled_memo_epoch = None
+
+        # Cached LED segments (see _get_led_segments())
+        self._led_segments = None
+
     # Must be called before usage
     def init(self, appl, switch):
         self.appl = appl
@@ -60,7 +72,38 @@ class Action(Updateable):
     @property
     def enabled(self):
         ec = self._enable_callback
-        return ec.enabled(self) if ec else True
+        if not ec:
+            return True
+        
+        epoch = Action._enabled_epoch
+        if epoch == None:
+            return ec.enabled(self)
+        
+        if self._enabled_memo_epoch != epoch:
+            self._enabled = ec.enabled(self)
+            self._enabled_memo_epoch = epoch
+
+        return self._enabled
+
+    # Starts memoization of enabled states (called by the Controller at the beginning of each tick)
+    @staticmethod
+    def start_enabled_memo():
+        Action._last_enabled_epoch = (Action._last_enabled_epoch + 1) & 0x3fffffff
+        Action._enabled_epoch = Action._last_enabled_epoch
+
+    # Invalidates all memoized enabled states. Must be called whenever anything enable callbacks 
+    # can depend on has changed (action states, parameter values).
+    @staticmethod
+    def invalidate_enabled():
+        if Action._enabled_epoch == None:
+            return
+        
+        Action.start_enabled_memo()
+
+    # Stops memoization of enabled states (called by the Controller at the end of each tick)
+    @staticmethod
+    def stop_enabled_memo():
+        Action._enabled_epoch = None
         
     # Color of the switch segment(s) for the action (Difficult to do with multicolor, 
     # but this property is just needed to have a setter so this is not callable)
@@ -118,6 +161,9 @@ class Action(Updateable):
         if self._last_enabled != self.enabled:
             self._last_enabled = self.enabled
             
+            # The LED segments of the switch have to be re-assigned
+            self._reset_led_segments()
+
             if self.callback:
                 self.callback.reset()
 
@@ -138,18 +184,51 @@ class Action(Updateable):
             return
         
         cb = self.callback
-        if cb:
+        if not cb:
+            return
+        
+        # Latency tracing: Label changes are reported to the switch (LEDs are reported by the switch itself)
+        latency = getattr(self.switch, "latency", None)
+        label = self.label
+
+        if latency and label and latency.display_pending:
+            text = label.text
+            back_color = label.back_color
+
+            cb.update_displays(self)
+
+            if label.text != text or label.back_color != back_color:
+                latency.label_changed()
+        else:
             cb.update_displays(self)
     
     # Reset the action
     def reset(self):
         pass                                      # pragma: no cover
 
-    # Returns the switch LED segments to use
+    # Returns the switch LED segments to use. These are calculated once and cached until the enabled
+    # state of any action of the switch flips (detected in update(), which resets the caches of all 
+    # actions of the switch).
     def _get_led_segments(self):
-        if not self.switch.pixels or not self.uses_switch_leds or not self.enabled:
+        if not self.enabled:
             return []
         
+        if not self.switch.pixels or not self.uses_switch_leds:
+            return []
+        
+        if self._led_segments == None:
+            self._led_segments = self._calculate_led_segments()
+
+        return self._led_segments
+
+    # Resets the cached LED segments of all actions of the switch
+    def _reset_led_segments(self):
+        for a in self.switch.actions:
+            for s in a.get_all_actions():
+                s._led_segments = None
+
+    # Calculates the switch LED segments to use
+    def _calculate_led_segments(self):
         actions_using_leds = self._get_actions_using_leds()
 
         ret = []
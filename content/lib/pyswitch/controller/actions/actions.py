@@ -52,6 +52,9 @@ class PushButtonAction(Action):
             return
         
         self._state = state
+
+        # Enable callbacks can depend on the state        
+        Action.invalidate_enabled()
         
         if self.callback:
             self.callback.state_changed_by_user(self)
@@ -62,7 +65,11 @@ class PushButtonAction(Action):
     # parameters that have to be requested first. When the answer comes in, the state 
     # is set here again, but no functional update is done.
     def feedback_state(self, state):
+        if state == self._state:
+            return
+        
         self._state = state
+        Action.invalidate_enabled()
 
     # Button pushed
     def push(self):
@@ -114,12 +121,12 @@ class PushButtonAction(Action):
 
         elif mode == self.ONE_SHOT:
             # Do not use the child classes set() method: We do not want an "off" message to be sent here.
-            self._state = False
+            self.feedback_state(False)
             self.update_displays()
 
     # Reset the action: Set False state without sending anything
     def reset(self):
-        self._state = False
+        self.feedback_state(False)
         self.update_displays()
 
 
@@ -137,7 +144,7 @@ class HoldAction(Action, Updater):
     #      "actions":               Default list of actions (can be conditional). Mandatory.
     #      "actionsHold":           List of actions to perform on holding the switch (can be conditional). Optional.
     #      "holdTimeMillis":        Optional hold time in milliseconds. Default is DEFAULT_HOLD_TIME_MILLIS.
-    #                               Note that the sensing here is done only every processing update interval!
+    #                               Holding is detected by a timer (see Timers), so this is precise up to one tick.
     # }
     def __init__(self, config = {}, period_counter_hold = None):
         Action.__init__(self, config)
@@ -152,7 +159,7 @@ class HoldAction(Action, Updater):
         self._period_hold = period_counter_hold
         if not self._period_hold:
             hold_time_ms = get_option(config, "holdTimeMillis", self.DEFAULT_HOLD_TIME_MILLIS)
-            self._period_hold = PeriodCounter(hold_time_ms)
+            self._period_hold = PeriodCounter(hold_time_ms, callback = self._hold_time_exceeded)
         
     # Set up action instances
     def init(self, appl, switch):
@@ -182,6 +189,12 @@ class HoldAction(Action, Updater):
 
         return ret
     
+    # Called by the timer as soon as the hold time is over, so holding is detected precisely 
+    # and not only in the next update
+    def _hold_time_exceeded(self):
+        if self._active and self.enabled:
+            self._check_hold()
+
     # Checks hold time and triggers hold action if exceeded.
     def _check_hold(self):
         if self._period_hold.exceeded:
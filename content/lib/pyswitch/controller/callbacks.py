@@ -1,5 +1,6 @@
 from micropython import const
 from ..misc import DEFAULT_SWITCH_COLOR, Updateable 
+from .actions.Action import Action
 #from ...stats import RuntimeStatistics
 
 
@@ -54,17 +55,28 @@ class Callback(Updateable):
 
             m.value = mapping.value
 
+        # Enable callbacks can depend on the value
+        if mapping.value_changed:
+            Action.invalidate_enabled()
+
         if self._listener:
             self._listener.parameter_changed(mapping)
 
     def request_terminated(self, mapping):
         # Clear value before calling the listener
+        changed = False
         for m in self._mappings:
             if m != mapping:
                 continue
 
+            if m.value != None:
+                changed = True
+
             m.value = None
 
+        if changed:
+            Action.invalidate_enabled()
+
         if self._listener:
             self._listener.request_terminated(mapping)
 
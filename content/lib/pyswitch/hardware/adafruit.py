@@ -1,4 +1,5 @@
 import board
+from micropython import const
 
 # Display driver
 from busio import SPI, UART
@@ -8,6 +9,9 @@ from adafruit_midi import MIDI
 
 from adafruit_midi.midi_message import MIDIUnknownEvent
 
+from ..controller.MidiParser import MidiParser
+from ..controller.MidiOutputQueue import MidiOutputQueue
+
 try:
     from fourwire import FourWire
 except ImportError:
@@ -19,8 +23,12 @@ from adafruit_bitmap_font import bitmap_font
 # Neopixel driver
 from adafruit_misc.neopixel import NeoPixel
 
-# Switch driver
+# Switch drivers
 from digitalio import DigitalInOut, Direction, Pull
+from keypad import Keys, Event
+from supervisor import ticks_ms
+
+from ..misc import get_current_millis
 
 
 # TFT driver class
@@ -113,7 +121,51 @@ class AdafruitNeoPixelDriver:
     # https://docs.circuitpython.org/projects/neopixel/en/latest/
     # https://learn.adafruit.com/adafruit-neopixel-uberguide/python-circuitpython
     def init(self, num_leds):
-        self.leds = NeoPixel(self._port, num_leds)
+        self.leds = AdafruitNeoPixelFrameBuffer(
+            NeoPixel(self._port, num_leds, auto_write = False)
+        )
+
+    # Writes the LED colors to the strip, if anything has changed. Called once per tick. Returns if 
+    # the LEDs have been written.
+    def show(self):
+        return self.leds.show()
+
+
+# Frame buffer for NeoPixels with dirty tracking. With auto_write, each pixel assignment would write 
+# the whole strip, so here only changed pixels are passed on, and the strip is written by show().
+class AdafruitNeoPixelFrameBuffer:
+
+    # pixels: NeoPixel instance with auto_write disabled
+    def __init__(self, pixels):
+        self._pixels = pixels
+        self._frame = [(0, 0, 0) for i in range(len(pixels))]
+        
+        self.dirty = False
+
+    def __len__(self):
+        return len(self._frame)
+
+    def __getitem__(self, index):
+        return self._frame[index]
+
+    def __setitem__(self, index, color):
+        if self._frame[index] == color:
+            return
+        
+        self._frame[index] = color
+        self._pixels[index] = color
+        
+        self.dirty = True
+
+    # Writes the strip if any pixel has changed since the last call. Returns if the strip has been written.
+    def show(self):
+        if not self.dirty:
+            return False
+        
+        self._pixels.show()
+        self.dirty = False
+
+        return True
 
 
 ##################################################################################################
@@ -150,7 +202,141 @@ class AdafruitSwitch: #(SwitchDriver):
 ##################################################################################################
 
 
-# USB MIDI Device
+# Event driven switch input for a set of GPIO pins, based on the keypad module. keypad.Keys scans and 
+# debounces the pins in the background and queues press/release events, so no GPIO has to be read 
+# in the processing loop. Use one instance per device, shared by all its AdafruitKeypadSwitch instances.
+#
+# Only the switches which are initialized (used by the configuration) are scanned. keypad.Keys is created
+# on the first call to process(), so all switches have to be initialized before.
+class AdafruitKeypad:
+
+    # Event timestamps (supervisor.ticks_ms()) wrap around at 2^29
+    _TICKS_MASK = const(0x1fffffff)
+
+    # max_events: Size of the event queue of keypad.Keys. If it overflows, all switch states are re-synced.
+    def __init__(self, max_events = 64):
+        self._max_events = max_events
+
+        self._ports = []
+        self._switches = []
+
+        self._keys = None
+        self._event = None
+
+    # Registers a switch. Returns the key number.
+    def add(self, switch, port):
+        if self._keys:
+            raise Exception() #"Keypad already running, switches must be added before")
+
+        self._ports.append(port)
+        self._switches.append(switch)
+
+        return len(self._ports) - 1
+
+    # Creates the keys scanner for all added switches
+    def _init_keys(self):
+        self._keys = Keys(
+            self._ports, 
+            value_when_pressed = False,     # Inverse logic!
+            pull = True,
+            max_events = self._max_events
+        )
+
+        # Re-used for all events
+        self._event = Event()
+
+    # Distributes all queued events to the switches. The event timestamps are converted to 
+    # milliseconds on the clock of the processing loop (see get_current_millis()).
+    def process(self):
+        if not self._keys:
+            if not self._ports:
+                return
+            
+            self._init_keys()
+        
+        events = self._keys.events
+        event = self._event
+
+        if events.overflowed:
+            # Events got lost: Start over with the current states
+            events.clear()
+            self._keys.reset()
+
+            for switch in self._switches:
+                switch.reset()
+
+        now = get_current_millis()
+        ticks = ticks_ms()
+
+        while events.get_into(event):
+            self._switches[event.key_number].add_event(
+                event.pressed, 
+                now - ((ticks - event.timestamp) & self._TICKS_MASK)
+            )
+
+
+# Switch using an AdafruitKeypad. Can be used instead of AdafruitSwitch.
+class AdafruitKeypadSwitch: #(SwitchDriver):
+
+    # keypad: AdafruitKeypad instance (shared between all switches of the device)
+    # port: The board GPIO pin definition to be used for this switch (for example board.GP1)
+    def __init__(self, keypad, port):
+        self._keypad = keypad
+        self._port = port
+        self._added = False
+
+        self._state = False
+        self._pending = []
+
+        # Timestamp (milliseconds, see get_current_millis()) of the last state change delivered by pushed
+        self.timestamp = None
+
+    # Adds the switch to the keypad (only switches which are used are scanned)
+    def init(self):
+        if self._added:
+            return
+        
+        self._keypad.add(self, self._port)
+        self._added = True
+
+    # Representational string for debug output (optional)
+    def __repr__(self):
+        return repr(self._port)
+
+    # Called by the keypad for each event of the switch. Only the last press/release pair is kept.
+    def add_event(self, pressed, timestamp):
+        pending = self._pending
+        if len(pending) >= 2:
+            pending.pop(0)
+
+        pending.append((pressed, timestamp))
+
+    # Called by the keypad when events got lost. keypad.Keys reports the current state as new event afterwards.
+    def reset(self):
+        self._pending = []
+        self._state = False
+
+    # Return if the switch is pushed. Queued events are delivered one per call, so even very 
+    # short pushes between two calls are not lost.
+    @property
+    def pushed(self):
+        if not self._pending:
+            self._keypad.process()
+
+            if not self._pending:
+                return self._state
+            
+        (self._state, self.timestamp) = self._pending.pop(0)
+        
+        return self._state
+
+
+##################################################################################################
+
+
+# USB MIDI Device. If fast_parser is set, incoming messages are parsed by MidiParser (which returns 
+# reusable message views) instead of adafruit_midi. If out_queue_size is set, outgoing messages are 
+# queued (see MidiOutputQueue) instead of being written immediately.
 class AdfruitUsbMidiDevice:
     def __init__(self, 
                  port_in,
@@ -158,8 +344,17 @@ class AdfruitUsbMidiDevice:
                  in_buf_size,
                  in_channel = None,  # All
                  out_channel = 0,                 
+                 fast_parser = False,
+                 out_queue_size = 0
         ):
 
+        self._parser = MidiParser(port_in, in_channel = in_channel, buffer_size = in_buf_size) if fast_parser else None
+
+        self._port_in = port_in
+        self._port_out = port_out
+
+        self.output_queue = MidiOutputQueue(port_out.write, size = out_queue_size) if out_queue_size else None
+
         self._midi = MIDI(
             midi_out = port_out,
             out_channel = out_channel,
@@ -171,20 +366,45 @@ class AdfruitUsbMidiDevice:
     def __repr__(self):
         return "USB"
 
-    def send(self, midi_message):
+    # priority is only relevant if the output queue is enabled
+    def send(self, midi_message, priority = False):
         if isinstance(midi_message, MIDIUnknownEvent):
             return
         
-        self._midi.send(midi_message)
+        if self.output_queue:
+            self.output_queue.send(self._encode(midi_message), priority)
+        else:
+            self._midi.send(midi_message)
 
     def receive(self):
+        if self._parser:
+            return self._parser.receive()
+        
         return self._midi.receive()
 
+    # Reads the available raw bytes into the passed buffer (used for raw MIDI thru). Returns the amount of bytes read.
+    def read_raw(self, buffer):
+        return self._port_in.readinto(buffer) or 0
+    
+    # Writes raw bytes (used for raw MIDI thru)
+    def write_raw(self, buffer):
+        if self.output_queue:
+            self.output_queue.send(buffer)
+        else:
+            self._port_out.write(buffer)
+
+    # Serializes a message with the output channel applied (like adafruit_midi does when sending)
+    def _encode(self, midi_message):
+        midi_message.channel = self._midi.out_channel
+        return midi_message.__bytes__()
+
     
 ##################################################################################################
 
 
-# DIN MIDI Device
+# DIN MIDI Device. If fast_parser is set, incoming messages are parsed by MidiParser (which returns 
+# reusable message views) instead of adafruit_midi. If out_queue_size is set, outgoing messages are 
+# queued (see MidiOutputQueue) and written paced to the baud rate, so sending does not block.
 class AdfruitDinMidiDevice:
     def __init__(self, 
                  gpio_in, 
@@ -194,6 +414,9 @@ class AdfruitDinMidiDevice:
                  timeout,
                  in_channel = None,   # All
                  out_channel = 0, 
+                 fast_parser = False,
+                 out_queue_size = 0,
+                 out_fifo_size = 32
         ):
 
         midi_uart = UART(
@@ -203,6 +426,17 @@ class AdfruitDinMidiDevice:
             timeout = timeout
         ) 
 
+        self._uart = midi_uart
+
+        # One byte takes 10 bits on the wire (start, 8 data, stop)
+        self.output_queue = MidiOutputQueue(
+            midi_uart.write, 
+            size = out_queue_size, 
+            bytes_per_millisecond = baudrate / 10000,
+            max_burst_bytes = out_fifo_size
+        ) if out_queue_size else None
+        self._parser = MidiParser(midi_uart, in_channel = in_channel, buffer_size = in_buf_size) if fast_parser else None
+
         self._midi = MIDI(
             midi_out = midi_uart, 
             out_channel = out_channel,
@@ -214,11 +448,34 @@ class AdfruitDinMidiDevice:
     def __repr__(self):
         return "DIN"
 
-    def send(self, midi_message):
+    # priority is only relevant if the output queue is enabled
+    def send(self, midi_message, priority = False):
         if isinstance(midi_message, MIDIUnknownEvent):
             return
         
-        self._midi.send(midi_message)
+        if self.output_queue:
+            self.output_queue.send(self._encode(midi_message), priority)
+        else:
+            self._midi.send(midi_message)
 
     def receive(self):
-        return self._midi.receive()
\ No newline at end of file
+        if self._parser:
+            return self._parser.receive()
+        
+        return self._midi.receive()
+
+    # Reads the available raw bytes into the passed buffer (used for raw MIDI thru). Returns the amount of bytes read.
+    def read_raw(self, buffer):
+        return self._uart.readinto(buffer) or 0
+    
+    # Writes raw bytes (used for raw MIDI thru)
+    def write_raw(self, buffer):
+        if self.output_queue:
+            self.output_queue.send(buffer)
+        else:
+            self._uart.write(buffer)
+
+    # Serializes a message with the output channel applied (like adafruit_midi does when sending)
+    def _encode(self, midi_message):
+        midi_message.channel = self._midi.out_channel
+        return midi_message.__bytes__()
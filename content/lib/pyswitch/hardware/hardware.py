@@ -8,7 +8,7 @@
 import board
 from usb_midi import ports
 
-from .adafruit import AdafruitSwitch, AdfruitDinMidiDevice, AdfruitUsbMidiDevice
+from .adafruit import AdafruitSwitch, AdafruitKeypad, AdafruitKeypadSwitch, AdfruitDinMidiDevice, AdfruitUsbMidiDevice
 
 #################################################################################################################################
 
@@ -38,6 +38,13 @@ class Hardware:
     PA_MIDICAPTAIN_NANO_SWITCH_A = { "model": AdafruitSwitch(board.GP9),  "pixels": (6, 7, 8), "name": "A"  }
     PA_MIDICAPTAIN_NANO_SWITCH_B = { "model": AdafruitSwitch(board.GP10), "pixels": (9, 10, 11), "name": "B"  }
 
+    # Event driven variant (keypad module). Do not mix with the definitions above!
+    _PA_MIDICAPTAIN_NANO_KEYPAD = AdafruitKeypad()
+    PA_MIDICAPTAIN_NANO_KEYPAD_SWITCH_1 = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_NANO_KEYPAD, board.GP1),  "pixels": (0, 1, 2), "name": "1" }
+    PA_MIDICAPTAIN_NANO_KEYPAD_SWITCH_2 = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_NANO_KEYPAD, board.GP25), "pixels": (3, 4, 5), "name": "2"  }
+    PA_MIDICAPTAIN_NANO_KEYPAD_SWITCH_A = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_NANO_KEYPAD, board.GP9),  "pixels": (6, 7, 8), "name": "A"  }
+    PA_MIDICAPTAIN_NANO_KEYPAD_SWITCH_B = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_NANO_KEYPAD, board.GP10), "pixels": (9, 10, 11), "name": "B"  }
+
     # PaintAudio MIDI Captain Mini (6 Switches)
     # Board Infos
     # Raspberry Pi Pico (RP2040)
@@ -65,6 +72,15 @@ class Hardware:
     PA_MIDICAPTAIN_MINI_SWITCH_B = { "model": AdafruitSwitch(board.GP10), "pixels": (12, 13, 14), "name": "B"  }
     PA_MIDICAPTAIN_MINI_SWITCH_C = { "model": AdafruitSwitch(board.GP11), "pixels": (15, 16, 17), "name": "C"  }
 
+    # Event driven variant (keypad module). Do not mix with the definitions above!
+    _PA_MIDICAPTAIN_MINI_KEYPAD = AdafruitKeypad()
+    PA_MIDICAPTAIN_MINI_KEYPAD_SWITCH_1 = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_MINI_KEYPAD, board.GP1),  "pixels": (0, 1, 2), "name": "1"  }
+    PA_MIDICAPTAIN_MINI_KEYPAD_SWITCH_2 = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_MINI_KEYPAD, board.GP25), "pixels": (3, 4, 5), "name": "2"  }
+    PA_MIDICAPTAIN_MINI_KEYPAD_SWITCH_3 = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_MINI_KEYPAD, board.GP24), "pixels": (6, 7, 8), "name": "3"  }
+    PA_MIDICAPTAIN_MINI_KEYPAD_SWITCH_A = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_MINI_KEYPAD, board.GP9),  "pixels": (9, 10, 11), "name": "A"  }
+    PA_MIDICAPTAIN_MINI_KEYPAD_SWITCH_B = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_MINI_KEYPAD, board.GP10), "pixels": (12, 13, 14), "name": "B"  }
+    PA_MIDICAPTAIN_MINI_KEYPAD_SWITCH_C = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_MINI_KEYPAD, board.GP11), "pixels": (15, 16, 17), "name": "C"  }
+
     # PaintAudio MIDI Captain (10 Switches) EXPERIMENTAL/UNTESTED! 
     # Thanks to @Erikcb on the Kemper Forums!
     # Board Infos
@@ -101,23 +117,41 @@ class Hardware:
     PA_MIDICAPTAIN_10_SWITCH_D    = { "model": AdafruitSwitch(board.GP18), "pixels": (24, 25, 26), "name": "D"  }
     PA_MIDICAPTAIN_10_SWITCH_DOWN = { "model": AdafruitSwitch(board.GP19), "pixels": (27, 28, 29), "name": "Dn"  }
 
+    # Event driven variant (keypad module). Do not mix with the definitions above!
+    _PA_MIDICAPTAIN_10_KEYPAD = AdafruitKeypad()
+    PA_MIDICAPTAIN_10_KEYPAD_SWITCH_1    = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_10_KEYPAD, board.GP1),  "pixels": (0, 1, 2), "name": "1"  }
+    PA_MIDICAPTAIN_10_KEYPAD_SWITCH_2    = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_10_KEYPAD, board.GP25), "pixels": (3, 4, 5), "name": "2"  }
+    PA_MIDICAPTAIN_10_KEYPAD_SWITCH_3    = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_10_KEYPAD, board.GP24), "pixels": (6, 7, 8), "name": "3"  }
+    PA_MIDICAPTAIN_10_KEYPAD_SWITCH_4    = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_10_KEYPAD, board.GP23), "pixels": (9, 10, 11), "name": "4"  }
+    PA_MIDICAPTAIN_10_KEYPAD_SWITCH_UP   = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_10_KEYPAD, board.GP20), "pixels": (12, 13, 14), "name": "Up"  }
+    PA_MIDICAPTAIN_10_KEYPAD_SWITCH_A    = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_10_KEYPAD, board.GP9),  "pixels": (15, 16, 17), "name": "A"  }
+    PA_MIDICAPTAIN_10_KEYPAD_SWITCH_B    = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_10_KEYPAD, board.GP10), "pixels": (18, 19, 20), "name": "B"  }
+    PA_MIDICAPTAIN_10_KEYPAD_SWITCH_C    = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_10_KEYPAD, board.GP11), "pixels": (21, 22, 23), "name": "C"  }
+    PA_MIDICAPTAIN_10_KEYPAD_SWITCH_D    = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_10_KEYPAD, board.GP18), "pixels": (24, 25, 26), "name": "D"  }
+    PA_MIDICAPTAIN_10_KEYPAD_SWITCH_DOWN = { "model": AdafruitKeypadSwitch(_PA_MIDICAPTAIN_10_KEYPAD, board.GP19), "pixels": (27, 28, 29), "name": "Dn"  }
+
 ###########################################################################################################################
 
     # USB Midi in/out for PA MIDICaptain devices. No UART, so ports have to be adafruit MIDI ports from 
-    # the usb_midi module.
+    # the usb_midi module. fast_parser enables the allocation free MidiParser for incoming messages,
+    # out_queue_size (bytes) the non-blocking output queue.
     @staticmethod
-    def PA_MIDICAPTAIN_USB_MIDI(in_channel = None, out_channel = 0, in_buf_size = 100):
+    def PA_MIDICAPTAIN_USB_MIDI(in_channel = None, out_channel = 0, in_buf_size = 100, fast_parser = False, out_queue_size = 0):
         return AdfruitUsbMidiDevice(
             port_in = ports[0],
             port_out = ports[1],
             in_channel = in_channel,
             out_channel = out_channel,
-            in_buf_size = in_buf_size
+            in_buf_size = in_buf_size,
+            fast_parser = fast_parser,
+            out_queue_size = out_queue_size
         )
 
     # DIN Midi in/out for PA MIDICaptain devices. Uses UART mode so the ports must be board GPIO pins.
+    # fast_parser enables the allocation free MidiParser for incoming messages, out_queue_size (bytes) the 
+    # non-blocking output queue which is written paced to the baud rate.
     @staticmethod
-    def PA_MIDICAPTAIN_DIN_MIDI(in_channel = None, out_channel = 0, in_buf_size = 100):
+    def PA_MIDICAPTAIN_DIN_MIDI(in_channel = None, out_channel = 0, in_buf_size = 100, fast_parser = False, out_queue_size = 0):
         return AdfruitDinMidiDevice(
             gpio_in = board.GP16,
             gpio_out = board.GP17,
@@ -125,6 +159,8 @@ class Hardware:
             out_channel = out_channel,
             baudrate = 31250,
             timeout = 0.001,
-            in_buf_size = in_buf_size
+            in_buf_size = in_buf_size,
+            fast_parser = fast_parser,
+            out_queue_size = out_queue_size
         )
 
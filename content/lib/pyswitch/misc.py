@@ -1,4 +1,4 @@
-from time import monotonic, localtime
+from time import monotonic_ns, localtime
 
 from .controller.MidiController import SystemExclusive, ControlChange, ProgramChange, MIDIUnknownEvent #, MidiClockMessage, Start, 
 
@@ -51,9 +51,36 @@ def get_option(config, name, default = False):
 def do_print(msg):  # pragma: no cover
     print(msg)
 
-# Returns a current timestmap in integer milliseconds
+# Returns a current timestmap in integer milliseconds. This uses integer nanoseconds, because the float 
+# returned by monotonic() loses precision when the device is running for some hours.
 def get_current_millis():
-    return int(monotonic() * 1000)
+    return monotonic_ns() // 1000000
+
+# Returns a current timestamp in integer microseconds (for measuring short durations)
+def get_current_micros():
+    return monotonic_ns() // 1000
+
+# Shared time base for the processing loop. The Controller takes the time once per tick, and all consumers
+# which do not measure durations inside the tick (period counters, timers) use it instead of reading the 
+# clock again. Outside of ticks, the clock is read on every call.
+class TickClock:
+    millis = None     # Time of the current tick in milliseconds (None if no tick is running)
+
+    # Takes the time for a new tick (called by the Controller at the beginning of each tick)
+    @staticmethod
+    def tick():
+        TickClock.millis = get_current_millis()
+
+    # Called by the Controller at the end of each tick
+    @staticmethod
+    def stop():
+        TickClock.millis = None
+
+    # Returns the current tick time (milliseconds)
+    @staticmethod
+    def now():
+        t = TickClock.millis
+        return t if t != None else get_current_millis()
     
 # Returns a readable string with the current timestamp (local time)
 def formatted_timestamp():
@@ -119,6 +146,33 @@ def compare_midi_messages(a, b):
     else:
         return a == b
 
+# Message type IDs for get_midi_message_key()
+_MESSAGE_KEY_TYPE_SYSEX = 1
+_MESSAGE_KEY_TYPE_CC = 2
+_MESSAGE_KEY_TYPE_PC = 3
+_MESSAGE_KEY_TYPE_UNKNOWN = 4
+
+# Returns a hashable key for a MIDI message (or list of messages), which is equal for 
+# two messages exactly when compare_midi_messages() regards them as equal.
+def get_midi_message_key(midi_message):
+    if isinstance(midi_message, list):
+        return tuple([get_midi_message_key(m) for m in midi_message])
+    
+    if isinstance(midi_message, SystemExclusive):
+        return (_MESSAGE_KEY_TYPE_SYSEX, bytes(midi_message.manufacturer_id), bytes(midi_message.data))
+
+    elif isinstance(midi_message, ControlChange):
+        return (_MESSAGE_KEY_TYPE_CC, midi_message.control)
+    
+    elif isinstance(midi_message, ProgramChange):
+        return (_MESSAGE_KEY_TYPE_PC, midi_message.patch)
+
+    elif isinstance(midi_message, MIDIUnknownEvent):
+        return (_MESSAGE_KEY_TYPE_UNKNOWN, midi_message.status)
+
+    else:
+        return midi_message
+
 # Size (bytes) output formatting 
 # Taken from https://stackoverflow.com/questions/1094841/get-a-human-readable-version-of-a-file-size 
 def format_size(num, fill_up_to_num = 0, suffix = "B"):
@@ -201,22 +255,74 @@ class EventEmitter:
 
 # Periodic update helper    
 class PeriodCounter:
-    def __init__(self, interval_millis):
+
+    # callback: Optional callable. If set, it is called once (by Timers.process()) as soon as the period 
+    #           is exceeded after reset() has been called, so the counter does not have to be polled.
+    def __init__(self, interval_millis, callback = None):
         self.interval = int(interval_millis)
+        self.callback = callback
 
         self._last_reset = 0
 
     # Resets the period counter to the current time
     def reset(self):
-        self._last_reset = get_current_millis()
+        self._last_reset = TickClock.now()
+
+        if self.callback:
+            Timers.schedule(self, self._last_reset + self.interval)
 
     # Returns if the period has been exceeded. If yes, it lso resets
     # the period to the current time.
     @property
     def exceeded(self):
-        current_time = get_current_millis()
+        current_time = TickClock.now()
         if self._last_reset + self.interval < current_time:
             self._last_reset = current_time
             return True
         return False
             
+
+
+###############################################################################################################
+
+
+# Central deadline handling for period counters with callbacks. Instead of polling each counter, the pending
+# deadlines are kept sorted, and process() (called once per tick by the Controller) only has to check the 
+# earliest one. Pending deadlines cost nothing until they are due.
+class Timers:
+    _scheduled = []    # List of [deadline, counter], sorted by deadline
+
+    # Schedules the callback of a period counter. Replaces a former deadline of the counter.
+    @staticmethod
+    def schedule(counter, deadline):
+        Timers.cancel(counter)
+
+        scheduled = Timers._scheduled
+        
+        i = len(scheduled)
+        while i > 0 and scheduled[i - 1][0] > deadline:
+            i -= 1
+
+        scheduled.insert(i, [deadline, counter])
+
+    # Removes the deadline of a period counter, if any
+    @staticmethod
+    def cancel(counter):
+        scheduled = Timers._scheduled
+
+        for i in range(len(scheduled)):
+            if scheduled[i][1] is counter:
+                scheduled.pop(i)
+                return
+
+    # Calls the callbacks of all counters which are due
+    @staticmethod
+    def process():
+        scheduled = Timers._scheduled
+        if not scheduled:
+            return
+        
+        current_time = TickClock.now()
+        
+        while scheduled and scheduled[0][0] < current_time:
+            scheduled.pop(0)[1].callback()
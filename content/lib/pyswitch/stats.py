@@ -20,6 +20,18 @@ class Memory:
     # Zoom facor for allocated bytes
     #ALLOCATED_BYTES_ZOOM = None
 
+    # Telemetry: Minimum and maximum free bytes sampled (see sample())
+    MIN_FREE_BYTES = -1
+    MAX_FREE_BYTES = -1
+
+    # Telemetry ring buffers and state
+    _samples_free = None
+    _samples_alloc = None
+    _sample_index = 0
+    _num_samples = 0
+    _collect_interval = 0
+    _samples_since_collect = 0
+
     # Initialize memory watching. Must be called for any measurements to take place.
     @staticmethod
     def start(prefix = None): #, zoom = 3):
@@ -66,6 +78,64 @@ class Memory:
 
         do_print(prefix_out + descr + alloc_out + " " + alloc_vis + " -> " + free_out + " " + free_perc_out + " " + free_vis)        
 
+    # Initialize low overhead memory telemetry. In contrast to watch(), sample() does not collect garbage
+    # before reading the memory state. The last num_samples samples are kept in a ring buffer, along with
+    # the overall minimum and maximum free bytes. If collect_interval is set, garbage is collected every 
+    # collect_interval samples (0: Never).
+    @staticmethod
+    def start_telemetry(num_samples = 16, collect_interval = 0):
+        Memory._samples_free = [0 for i in range(num_samples)]
+        Memory._samples_alloc = [0 for i in range(num_samples)]
+        Memory._sample_index = 0
+        Memory._num_samples = 0
+
+        Memory._collect_interval = collect_interval
+        Memory._samples_since_collect = 0
+
+        Memory.MIN_FREE_BYTES = -1
+        Memory.MAX_FREE_BYTES = -1
+
+    # Records the current memory state (only if telemetry has been started)
+    @staticmethod
+    def sample():
+        samples_free = Memory._samples_free
+        if not samples_free:
+            return
+        
+        if Memory._collect_interval:
+            Memory._samples_since_collect += 1
+
+            if Memory._samples_since_collect >= Memory._collect_interval:
+                collect()
+                Memory._samples_since_collect = 0
+
+        free_bytes = mem_free()
+        
+        index = Memory._sample_index
+        samples_free[index] = free_bytes
+        Memory._samples_alloc[index] = mem_alloc()
+
+        Memory._sample_index = (index + 1) % len(samples_free)
+        if Memory._num_samples < len(samples_free):
+            Memory._num_samples += 1
+
+        if Memory.MIN_FREE_BYTES < 0 or free_bytes < Memory.MIN_FREE_BYTES:
+            Memory.MIN_FREE_BYTES = free_bytes
+
+        if free_bytes > Memory.MAX_FREE_BYTES:
+            Memory.MAX_FREE_BYTES = free_bytes
+
+    # Returns the recorded telemetry samples as list of (free bytes, allocated bytes) tuples, oldest first
+    @staticmethod
+    def samples():
+        if not Memory._samples_free:
+            return []
+        
+        size = len(Memory._samples_free)
+        start = (Memory._sample_index - Memory._num_samples) % size
+
+        return [(Memory._samples_free[(start + i) % size], Memory._samples_alloc[(start + i) % size]) for i in range(Memory._num_samples)]
+
     # Returns free bytes of memory
     @staticmethod
     def _get_free_bytes():
@@ -88,7 +88,7 @@ class MockMidiController:
         
         return None
     
-    def send(self, midi_message):
+    def send(self, midi_message, priority = False):
         self.messages_sent.append(midi_message)
 
 
@@ -117,10 +117,16 @@ class MockPeriodCounter():
 class MockNeoPixelDriver:
     def __init__(self):
         self.leds = None
+        self.num_show_calls = 0
+        self.output_show = True
         
     def init(self, num_leds):
         self.leds = [None for i in range(num_leds)]
 
+    def show(self):
+        self.num_show_calls += 1
+        return self.output_show
+
 
 ##################################################################################################################################
 
@@ -185,6 +191,48 @@ class MockParameterMapping(ClientParameterMapping):
             return super().result_finished()
     
 
+# Creates a mock mapping with a SysEx request and response, and a matching answer message which 
+# sets the passed id as value. Returns a tuple (mapping, answer).
+def create_mapping(id):
+    mapping = MockParameterMapping(
+        set = MockAdafruitMIDIControlChange.ControlChange(id, 0),
+        request = MockAdafruitMIDISystemExclusive.SystemExclusive(
+            manufacturer_id = [0x00, 0x10, 0x20],
+            data = [0x05, 0x07, id]
+        ),
+        response = MockAdafruitMIDISystemExclusive.SystemExclusive(
+            manufacturer_id = [0x00, 0x10, 0x20],
+            data = [0x00, 0x00, id]
+        )
+    )
+
+    answer = MockAdafruitMIDISystemExclusive.SystemExclusive(
+        manufacturer_id = [0x00, 0x10, 0x20],
+        data = [0x00, 0x00, id, 0x45]
+    )
+
+    mapping.outputs_parse = [{ "message": answer, "value": id }]
+
+    return (mapping, answer)
+
+
+# Creates a mock controller with a mock MIDI controller and period counter and the passed switch 
+# definitions. Returns a tuple (appl, midi, period).
+def create_appl(config = {}, switches = []):
+    midi = MockMidiController()
+    period = MockPeriodCounter()
+
+    appl = MockController(
+        led_driver = MockNeoPixelDriver(),
+        midi = midi,
+        config = config,
+        period_counter = period,
+        switches = switches
+    )
+
+    return (appl, midi, period)
+
+
 ##################################################################################################################################
 
 
@@ -14,6 +14,9 @@ class MockTime:
     def monotonic():
         return MockTime.mock["monotonicReturn"]
 
+    def monotonic_ns():
+        return int(round(MockTime.mock["monotonicReturn"] * 1000000000))
+
     def localtime():
         return MockTime.mock["localtimeReturn"]
     
@@ -42,7 +45,7 @@ class MockAdafruitMIDI:
             
             return None
         
-        def send(self, midi_message):
+        def send(self, midi_message, priority = False):
             self.messages_sent.append(midi_message)
             
 
@@ -86,6 +89,7 @@ class MockGC:
 
         def reset(self):
             self.collect_calls = 0
+            self.threshold = None
             self._output_mem_free = 1024 * 20  # 20kB
             self.output_mem_alloc = 0
 
@@ -119,6 +123,9 @@ class MockGC:
     def mem_alloc(self):
         return self.mock.output_mem_alloc
 
+    def threshold(self, value):
+        self.mock.threshold = value
+
 
 class MockDisplayIO:
     class Group:
@@ -229,6 +236,8 @@ class MockDisplayShapes:
 
 
 class MockMidiBridge:
+    PMB_MANUFACTURER_ID = b'\x00\xac\xdc'
+
     class PyMidiBridge:
         def __init__(self, midi, storage, event_handler = None, read_chunk_size = 1024):
             self.messages_received = []
@@ -254,3 +263,52 @@ class MockOs:
 
     def stat(path):
         return MockOs._StatMock(MockOs.STAT_SIZE_OUTPUTS[path] if path in MockOs.STAT_SIZE_OUTPUTS else -1)
+
+
+class MockKeypad:
+    class Event:
+        def __init__(self, key_number = 0, pressed = True, timestamp = None):
+            self.key_number = key_number
+            self.pressed = pressed
+            self.timestamp = timestamp
+
+    class EventQueue:
+        def __init__(self):
+            self.queue = []
+            self.overflowed = False
+
+        def get_into(self, event):
+            if not self.queue:
+                return False
+            
+            e = self.queue.pop(0)
+            event.key_number = e.key_number
+            event.pressed = e.pressed
+            event.timestamp = e.timestamp
+            return True
+        
+        def clear(self):
+            self.queue = []
+            self.overflowed = False
+
+    class Keys:
+        def __init__(self, pins, value_when_pressed, pull = True, max_events = 64):
+            self.pins = pins
+            self.value_when_pressed = value_when_pressed
+            self.pull = pull
+            self.max_events = max_events
+
+            self.events = MockKeypad.EventQueue()
+            self.num_reset_calls = 0
+
+        def reset(self):
+            self.num_reset_calls += 1
+
+
+class MockSupervisor:
+    mock = {
+        "ticksMsReturn": 0
+    }
+
+    def ticks_ms():
+        return MockSupervisor.mock["ticksMsReturn"]
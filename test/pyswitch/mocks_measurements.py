@@ -45,5 +45,69 @@ class MockRuntimeMeasurement(Updateable):
         self.listeners.append(listener)
 
 
+class MockRuntimeHistogram(MockRuntimeMeasurement):
+
+    def percentile(self, percent):
+        return 0
+
+
+class MockTickProfiler(Updateable):
+
+    def __init__(self, interval_millis = 0):
+        self.phases = {}
+
+    def get(self, name, listener = None):
+        if not name in self.phases:
+            self.phases[name] = MockRuntimeHistogram(name = name)
+        return self.phases[name]
+
+    def start(self):
+        pass
+
+    def enter(self, phase):
+        pass
+
+    def finish(self):
+        pass
+
+
+class MockSwitchLatency:
+
+    def __init__(self, interval_millis, name):
+        self.midi = MockRuntimeHistogram(interval_millis, name + " MIDI")
+        self.display = MockRuntimeHistogram(interval_millis, name + " Display")
+        self.display_pending = False
+
+    def press(self, timestamp):
+        pass
+
+    def end_press(self):
+        pass
+
+    def leds_changed(self):
+        pass
+
+    def label_changed(self):
+        pass
+
+    @staticmethod
+    def midi_sent():
+        pass
+
+    @staticmethod
+    def midi_queued():
+        return None
+
+    def midi_written(self):
+        pass
+
+    @staticmethod
+    def display_updated():
+        pass
+
+
 class MockMeasurements:
     RuntimeMeasurement = MockRuntimeMeasurement    
+    RuntimeHistogram = MockRuntimeHistogram
+    TickProfiler = MockTickProfiler
+    SwitchLatency = MockSwitchLatency
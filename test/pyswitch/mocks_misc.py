@@ -22,11 +22,13 @@ class MockMisc:
         return MockMisc.msgs[len(MockMisc.msgs)-1]
 
     compare_midi_messages = misc.compare_midi_messages
+    get_midi_message_key = misc.get_midi_message_key
     stringify_midi_message = misc.stringify_midi_message
     format_size = misc.format_size
     get_option = misc.get_option
     fill_up_to = misc.fill_up_to
     get_current_millis = misc.get_current_millis
+    get_current_micros = misc.get_current_micros
 
     DEFAULT_SWITCH_COLOR = misc.DEFAULT_SWITCH_COLOR
     DEFAULT_LABEL_COLOR = misc.DEFAULT_LABEL_COLOR
@@ -36,3 +38,5 @@ class MockMisc:
     Updateable = misc.Updateable
     EventEmitter = misc.EventEmitter
     PeriodCounter = misc.PeriodCounter
+    Timers = misc.Timers
+    TickClock = misc.TickClock
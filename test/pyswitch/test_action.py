@@ -18,6 +18,7 @@ with patch.dict(sys.modules, {
 }):
     from adafruit_midi.system_exclusive import SystemExclusive
     from lib.pyswitch.controller.actions.Action import Action
+    from lib.pyswitch.controller.Client import Client
     from lib.pyswitch.misc import Updater
     
     from .mocks_ui import *
@@ -38,9 +39,21 @@ class MockFootSwitch:
     def __init__(self, id = ""):
         self.id = id
         self.actions = []
-        self.pixels = []
+        self._pixels = []
         self.colors = []
 
+    @property
+    def pixels(self):
+        return self._pixels
+    
+    # Changing the pixels invalidates the cached LED segments of the actions
+    @pixels.setter
+    def pixels(self, pixels):
+        self._pixels = pixels
+
+        for action in self.actions:
+            action._reset_led_segments()
+
 
 class MockAction(Action):
     def __init__(self, config = {}, use_leds = False):
@@ -56,6 +69,27 @@ class MockAction(Action):
         self.num_update_displays_calls += 1
 
 
+class MockLabelCallback(MockActionCallback):
+    def __init__(self):
+        super().__init__()
+
+        self.text = ""
+
+    def update_displays(self, action):
+        super().update_displays(action)
+
+        action.label.text = self.text
+
+
+class MockLatency:
+    def __init__(self):
+        self.display_pending = False
+        self.num_label_changed_calls = 0
+
+    def label_changed(self):
+        self.num_label_changed_calls += 1
+
+
 #################################################################################
 
 
@@ -75,6 +109,120 @@ class TestAction(unittest.TestCase):
         self.assertEqual(action_1.enabled, False)
 
 
+    def test_enabled_memo(self):
+        cb = MockEnabledCallback(output = True)
+
+        action_1 = MockAction(config = {
+            "enableCallback": cb
+        })
+
+        action_1.init(MockController(), MockFootSwitch())
+
+        Action.start_enabled_memo()
+        try:
+            self.assertEqual(action_1.enabled, True)
+            self.assertEqual(action_1.enabled, True)
+            self.assertEqual(len(cb.enabled_calls), 1)
+
+            # Memoized until invalidated
+            cb.output = False
+            self.assertEqual(action_1.enabled, True)
+            self.assertEqual(len(cb.enabled_calls), 1)
+
+            Action.invalidate_enabled()
+
+            self.assertEqual(action_1.enabled, False)
+            self.assertEqual(action_1.enabled, False)
+            self.assertEqual(len(cb.enabled_calls), 2)
+
+        finally:
+            Action.stop_enabled_memo()
+
+        # No memoization
+        self.assertEqual(action_1.enabled, False)
+        self.assertEqual(action_1.enabled, False)
+        self.assertEqual(len(cb.enabled_calls), 4)
+
+        # Invalidating does not start memoization
+        Action.invalidate_enabled()
+
+        self.assertEqual(action_1.enabled, False)
+        self.assertEqual(len(cb.enabled_calls), 5)
+
+
+    def test_enabled_memo_values(self):
+        mapping_1 = MockParameterMapping(
+            request = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x00, 0x00, 0x08]
+            ),
+            response = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x00, 0x00, 0x09]
+            )
+        )
+
+        answer_1 = SystemExclusive(
+            manufacturer_id = [0x00, 0x10, 0x20],
+            data = [0x00, 0x00, 0x09, 0x01]
+        )
+
+        mapping_1.outputs_parse = [
+            {
+                "message": answer_1,
+                "value": 1
+            }
+        ]
+
+        cb = MockEnabledCallback(output = True, mappings = [mapping_1])
+
+        action_1 = MockAction(config = {
+            "enableCallback": cb
+        })
+
+        action_1.init(MockController(), MockFootSwitch())
+
+        client = Client(MockMidiController(), {})
+
+        Action.start_enabled_memo()
+        try:
+            self.assertEqual(action_1.enabled, True)
+            self.assertEqual(len(cb.enabled_calls), 1)
+
+            # New value: Invalidated
+            client.request(mapping_1, cb)
+            client.receive(answer_1)
+
+            self.assertEqual(action_1.enabled, True)
+            self.assertEqual(len(cb.enabled_calls), 2)
+
+            # Same value again: Still memoized
+            client.request(mapping_1, cb)
+            client.receive(answer_1)
+
+            self.assertEqual(action_1.enabled, True)
+            self.assertEqual(len(cb.enabled_calls), 2)
+
+            # Changed value
+            mapping_1.outputs_parse[0]["value"] = 2
+
+            client.request(mapping_1, cb)
+            client.receive(answer_1)
+
+            self.assertEqual(action_1.enabled, True)
+            self.assertEqual(len(cb.enabled_calls), 3)
+
+            # Terminated request clears the value
+            client.request(mapping_1, cb)
+            client.get_matching_request(mapping_1).terminate()
+
+            self.assertEqual(action_1.enabled, True)
+            self.assertEqual(len(cb.enabled_calls), 4)
+
+        finally:
+            Action.stop_enabled_memo()
+
+
     def test_enabled_callback_mappings(self):
         mapping_1 = MockParameterMapping(
             response = SystemExclusive(
@@ -126,6 +274,37 @@ class TestAction(unittest.TestCase):
         self.assertEqual(action_1.num_update_displays_calls, 1)
 
 
+    def test_latency_label(self):
+        cb = MockLabelCallback()
+
+        action_1 = MockAction(config = {
+            "callback": cb,
+            "display": MockDisplayLabel()
+        })
+
+        switch = MockFootSwitch()
+        switch.latency = MockLatency()
+
+        action_1.init(MockController(), switch)
+
+        # No push pending
+        cb.text = "foo"
+        action_1.update_displays()
+
+        self.assertEqual(action_1.label.text, "foo")
+        self.assertEqual(switch.latency.num_label_changed_calls, 0)
+
+        # Push pending: Only changes are reported
+        switch.latency.display_pending = True
+
+        action_1.update_displays()
+        self.assertEqual(switch.latency.num_label_changed_calls, 0)
+
+        cb.text = "bar"
+        action_1.update_displays()
+        self.assertEqual(switch.latency.num_label_changed_calls, 1)
+
+
     #######################################################################################################
 
 
@@ -373,6 +552,8 @@ class TestAction(unittest.TestCase):
 
         # Disable action 1
         cb_1.output = False
+        action_1.update()
+
         self.assertEqual(action_1._get_led_segments(), [])
         self.assertEqual(action_2._get_led_segments(), [0, 1, 2, 3, 4])
         self.assertEqual(action_4._get_led_segments(), [5])
@@ -380,6 +561,9 @@ class TestAction(unittest.TestCase):
         # Disable action 2
         cb_1.output = True
         cb_2.output = False
+        action_1.update()
+        action_2.update()
+
         self.assertEqual(action_1._get_led_segments(), [0, 1, 2, 3, 4])
         self.assertEqual(action_2._get_led_segments(), [])
         self.assertEqual(action_4._get_led_segments(), [5])
@@ -391,6 +575,96 @@ class TestAction(unittest.TestCase):
         self.assertEqual(action_1._get_led_segments(), [])
         
 
+########################################################################################
+
+
+    def test_led_segments_cached(self):
+        appl = MockController()
+        switch = MockFootSwitch()
+        
+        cb_1 = MockEnabledCallback(output = True)
+
+        action_1 = MockAction(use_leds = True, config = { "enableCallback": cb_1 })
+        action_2 = MockAction(use_leds = True)
+
+        action_1.init(appl, switch)
+        action_2.init(appl, switch)
+
+        switch.actions = [
+            action_1,
+            action_2
+        ]
+        switch.pixels = [11, 13, 15]
+
+        self.assertEqual(action_1._get_led_segments(), [0, 1])
+        self.assertEqual(action_2._get_led_segments(), [2])
+
+        # Cached: Changes are not regarded until the enabled state flip is detected by update()
+        cb_1.output = False
+        
+        self.assertEqual(action_1._get_led_segments(), [])
+        self.assertEqual(action_2._get_led_segments(), [2])
+
+        action_1.update()
+
+        self.assertEqual(action_1._get_led_segments(), [])
+        self.assertEqual(action_2._get_led_segments(), [0, 1, 2])
+
+        # No flip: Stays cached
+        action_2.update()
+        segments = action_2._get_led_segments()
+
+        action_1.update()
+        action_2.update()
+
+        self.assertIs(action_2._get_led_segments(), segments)
+
+        cb_1.output = True
+        action_1.update()
+
+        self.assertEqual(action_1._get_led_segments(), [0, 1])
+        self.assertEqual(action_2._get_led_segments(), [2])
+
+    def test_led_segments_enabled_flip(self):
+        appl = MockController()
+        switch = MockFootSwitch()
+        
+        cb_2 = MockEnabledCallback(output = False)
+
+        action_1 = MockAction(use_leds = True)
+        action_2 = MockAction(use_leds = True, config = { "enableCallback": cb_2 })
+
+        action_1.init(appl, switch)
+        action_2.init(appl, switch)
+
+        switch.actions = [
+            action_1,
+            action_2
+        ]
+        switch.pixels = [11, 13, 15]
+
+        self.assertEqual(action_1._get_led_segments(), [0, 1, 2])
+        self.assertEqual(action_2._get_led_segments(), [])
+
+        action_1.update()
+        action_2.update()
+
+        # No flip: The cache is kept
+        segments = action_1._get_led_segments()
+        Action.invalidate_enabled()
+        action_2.update()
+
+        self.assertIs(action_1._get_led_segments(), segments)
+
+        # Action 2 is enabled: All actions of the switch recalculate their segments after the flip 
+        # has been detected
+        cb_2.output = True
+        action_2.update()
+
+        self.assertEqual(action_1._get_led_segments(), [0, 1])
+        self.assertEqual(action_2._get_led_segments(), [2])
+
+
 ########################################################################################
 
 
@@ -546,6 +820,8 @@ class TestAction(unittest.TestCase):
         ### Only action 2 is enabled ##############################################
         cb_4.output = False
         cb_5.output = False
+        action_4.update()
+        action_5.update()
 
         # One pixel
         switch.pixels = [11]
@@ -33,6 +33,7 @@ class MockController(Updater):
 class MockFootSwitch:
     def __init__(self):
         self.id = "foo"
+        self.actions = []
 
 
 class TestActionHold(unittest.TestCase):
@@ -140,6 +141,54 @@ class TestActionHold(unittest.TestCase):
         self.assertEqual(action_3.num_release_calls, 2)
 
 
+    def test_hold_timer(self):
+        hold_period = MockPeriodCounter()
+
+        action_1 = MockAction()
+        action_2 = MockAction()
+
+        action_hold = HoldAction(
+            {
+                "actions": [
+                    action_1
+                ],
+                "actionsHold": [
+                    action_2
+                ]
+            },
+            hold_period
+        )
+
+        action_hold.init(MockController(), MockFootSwitch())
+
+        # Timer callback without push
+        hold_period.exceed_next_time = True
+        action_hold._hold_time_exceeded()
+
+        self.assertEqual(action_2.num_push_calls, 0)
+
+        # Timer callback while pushed
+        action_hold.push()
+        hold_period.exceed_next_time = True
+        action_hold._hold_time_exceeded()
+
+        self.assertEqual(action_2.num_push_calls, 1)
+        self.assertEqual(action_2.num_release_calls, 1)
+
+        action_hold.release()
+
+        self.assertEqual(action_1.num_push_calls, 0)
+        self.assertEqual(action_2.num_push_calls, 1)
+
+        # Default period counter uses the timer callback
+        action_hold = HoldAction({
+            "holdTimeMillis": 100
+        })
+
+        self.assertEqual(action_hold._period_hold.interval, 100)
+        self.assertEqual(action_hold._period_hold.callback, action_hold._hold_time_exceeded)
+
+
     def test_disabled_actions(self):
         hold_period = MockPeriodCounter()
 
@@ -13,11 +13,13 @@ with patch.dict(sys.modules, {
     "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive(),
     "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
     "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
-    "gc": MockGC()
+    "gc": MockGC(),
+    "time": MockTime
 }):
     from adafruit_midi.system_exclusive import SystemExclusive
     from adafruit_midi.control_change import ControlChange
     from lib.pyswitch.controller.Client import Client
+    from lib.pyswitch.misc import Timers
 
     from.mocks_appl import *
 
@@ -25,6 +27,25 @@ with patch.dict(sys.modules, {
 class MockParameterMapping2(MockParameterMapping):
     pass
 
+class MockIndexedParameterMapping(MockParameterMapping):
+    def __init__(self, name = "", set = None, request = None, response = None, value = None):
+        super().__init__(name = name, set = set, request = request, response = response, value = value)
+
+        self.parse_calls = []
+
+    @staticmethod
+    def message_key(midi_message):
+        if isinstance(midi_message, ControlChange):
+            return midi_message.control
+        return None
+
+    def response_keys(self):
+        return [self.response.control]
+    
+    def parse(self, midi_message):
+        self.parse_calls.append(midi_message)
+        return super().parse(midi_message)
+
 class MockClient:
     def __init__(self):
         self.debug = False
@@ -210,29 +231,29 @@ class TestClient(unittest.TestCase):
 
         self.assertEqual(len(midi.messages_sent), 0)
         
-        self.assertEqual(len(client._requests), 1)
-        req = client._requests[0]
+        self.assertEqual(len(client.requests), 1)
+        req = client.requests[0]
 
         self.assertEqual(req.listeners, [listener])
 
         # Add same listener again
         client.register(mapping_1, listener)
 
-        self.assertEqual(len(client._requests), 1)
+        self.assertEqual(len(client.requests), 1)
         self.assertEqual(req.listeners, [listener])
 
         # Add other listener 
         listener_2 = MockClientRequestListener()
         client.register(mapping_1, listener_2)
 
-        self.assertEqual(len(client._requests), 1)
+        self.assertEqual(len(client.requests), 1)
         self.assertEqual(req.listeners, [listener, listener_2])
 
         # Add other mapping
         client.register(mapping_2, listener_2)
 
-        self.assertEqual(len(client._requests), 2)
-        req_2 = client._requests[1]
+        self.assertEqual(len(client.requests), 2)
+        req_2 = client.requests[1]
 
         self.assertEqual(req.listeners, [listener, listener_2])
         self.assertEqual(req_2.listeners, [listener_2])
@@ -491,22 +512,118 @@ class TestClient(unittest.TestCase):
 
         listener = MockClientRequestListener()
 
+        Timers._scheduled = []
+        MockTime.mock["monotonicReturn"] = 1
+
         client.request(mapping_1, listener)
 
         self.assertEqual(len(midi.messages_sent), 1)
         self.assertEqual(midi.messages_sent[0], mapping_1.request)
         
         req = client.requests[0]        
-        req.lifetime = MockPeriodCounter()
-        client._cleanup_terminated_period = MockPeriodCounter()
         
-        client.receive(None)
+        MockTime.mock["monotonicReturn"] = 3
+        Timers.process()
         
         self.assertEqual(req.finished, False)
 
-        req.lifetime.exceed_next_time = True
-        client._cleanup_terminated_period.exceed_next_time = True
-        client.receive(None)
+        # The lifetime is watched by a timer
+        MockTime.mock["monotonicReturn"] = 3.001
+        Timers.process()
 
         self.assertEqual(req.finished, True)
+        self.assertEqual(listener.request_terminated_calls, [mapping_1])
+        self.assertEqual(client.requests, [])
+
+        # Answered requests do not leave timers behind
+        client.request(mapping_1, listener)
+        self.assertEqual(len(Timers._scheduled), 1)
+
+        mapping_1.outputs_parse = [{ "message": mapping_1.response }]
+        client.receive(mapping_1.response)
+
+        self.assertEqual(client.requests, [])
+        self.assertEqual(Timers._scheduled, [])
         
+
+
+##############################################################################################
+
+
+    def test_receive_dispatch(self):        
+        midi = MockAdafruitMIDI.MIDI()
+
+        client = Client(
+            midi = midi,
+            config = {
+                "maxRequestLifetimeMillis": 0
+            }
+        )
+
+        mapping_1 = MockIndexedParameterMapping(
+            response = ControlChange(10, 0)
+        )
+
+        mapping_2 = MockIndexedParameterMapping(
+            response = ControlChange(20, 0)
+        )
+
+        mapping_3 = MockParameterMapping(
+            response = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x00, 0x00, 0x09]
+            )
+        )
+
+        listener = MockClientRequestListener()
+
+        client.register(mapping_1, listener)
+        client.register(mapping_2, listener)
+        client.register(mapping_3, listener)
+
+        answer_msg_1 = ControlChange(10, 3)
+        answer_msg_2 = ControlChange(20, 4)
+        answer_msg_unknown = ControlChange(30, 5)
+
+        mapping_1.outputs_parse = [
+            {
+                "message": answer_msg_1,
+                "value": 3
+            }
+        ]
+
+        mapping_2.outputs_parse = [
+            {
+                "message": answer_msg_2,
+                "value": 4
+            }
+        ]
+
+        # Unknown message: No indexed mapping is asked to parse
+        self.assertEqual(client.receive(answer_msg_unknown), False)
+        self.assertEqual(mapping_1.parse_calls, [])
+        self.assertEqual(mapping_2.parse_calls, [])
+
+        # Messages only reach the matching mapping
+        self.assertEqual(client.receive(answer_msg_1), True)
+        self.assertEqual(mapping_1.parse_calls, [answer_msg_1])
+        self.assertEqual(mapping_2.parse_calls, [])
+        self.assertEqual(mapping_1.value, 3)
+
+        self.assertEqual(client.receive(answer_msg_2), True)
+        self.assertEqual(mapping_1.parse_calls, [answer_msg_1])
+        self.assertEqual(mapping_2.parse_calls, [answer_msg_2])
+        self.assertEqual(mapping_2.value, 4)
+
+        self.assertEqual(listener.parameter_changed_calls, [mapping_1, mapping_2])
+
+        # Terminated requests are removed from the registry and the index
+        req = client.get_matching_request(mapping_1)
+        req.terminate()
+        client._remove_request(req)
+
+        self.assertEqual(client.get_matching_request(mapping_1), None)
+
+        client.receive(answer_msg_1)
+        self.assertEqual(mapping_1.parse_calls, [answer_msg_1])
+        self.assertNotIn(10, client._dispatch)
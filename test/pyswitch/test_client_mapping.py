@@ -433,3 +433,39 @@ class TestClientMapping(unittest.TestCase):
 
         self.assertTrue(mapping_1 != mapping_2)
 
+
+##############################################################################################
+
+
+    def test_key(self):
+        def create(cls, response_data, request_data):
+            return cls(
+                request = SystemExclusive(
+                    manufacturer_id = [0x00, 0x10, 0x20],
+                    data = request_data
+                ),
+                response = SystemExclusive(
+                    manufacturer_id = [0x00, 0x10, 0x20],
+                    data = response_data
+                )
+            )
+
+        mapping_1 = create(MockParameterMapping, [0x00, 0x00, 0x09], [0x05, 0x07, 0x09])
+        mapping_2 = create(MockParameterMapping, [0x00, 0x00, 0x09], [0x05, 0x07, 0x10])
+        mapping_3 = create(MockParameterMapping, [0x00, 0x00, 0x10], [0x05, 0x07, 0x09])
+        mapping_4 = create(MockParameterMapping2, [0x00, 0x00, 0x09], [0x05, 0x07, 0x09])
+
+        mappings = [mapping_1, mapping_2, mapping_3, mapping_4, MockParameterMapping(), MockParameterMapping()]
+
+        # Keys must be equal exactly when the mappings are equal
+        for a in mappings:
+            for b in mappings:
+                if a is b:
+                    continue
+
+                self.assertEqual(a.key == b.key, a == b)
+
+        # Keys are stable
+        key = mapping_1.key
+        mapping_1.response.data = [0x00, 0x00, 0x11]
+        self.assertEqual(mapping_1.key, key)
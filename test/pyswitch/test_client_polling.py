@@ -0,0 +1,195 @@
+import sys
+import unittest
+from unittest.mock import patch   # Necessary workaround! Needs to be separated.
+
+from .mocks_lib import *
+
+# Import subject under test
+with patch.dict(sys.modules, {
+    "micropython": MockMicropython,
+    "usb_midi": MockUsbMidi(),
+    "adafruit_midi": MockAdafruitMIDI(),
+    "adafruit_midi.control_change": MockAdafruitMIDIControlChange(),
+    "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive(),
+    "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
+    "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
+    "gc": MockGC(),
+    "time": MockTime
+}):
+    from lib.pyswitch.controller.Client import Client
+    from lib.pyswitch.misc import Timers
+
+    from.mocks_appl import *
+
+
+class TestClientPolling(unittest.TestCase):
+
+    def setUp(self):
+        Timers._scheduled = []
+
+    def test_interval(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        (mapping_1, answer_1) = create_mapping(1)
+        (mapping_2, answer_2) = create_mapping(2)
+
+        client = Client(
+            midi = midi,
+            config = {},
+            polling = {
+                "mappings": [
+                    {
+                        "mapping": mapping_1,
+                        "interval": 1000
+                    }
+                ]
+            }
+        )
+
+        listener_1 = MockClientRequestListener()
+        listener_2 = MockClientRequestListener()
+
+        def request_all():
+            midi.messages_sent = []
+            client.request(mapping_1, listener_1)
+            client.request(mapping_2, listener_1)
+
+        MockTime.mock["monotonicReturn"] = 1
+        request_all()
+        self.assertEqual(midi.messages_sent, [mapping_1.request, mapping_2.request])
+
+        # Listeners are still added to pending requests
+        client.request(mapping_1, listener_2)
+
+        client.receive(answer_1)
+        client.receive(answer_2)
+
+        self.assertEqual(listener_1.parameter_changed_calls, [mapping_1, mapping_2])
+        self.assertEqual(listener_2.parameter_changed_calls, [mapping_1])
+
+        MockTime.mock["monotonicReturn"] = 1.5
+        request_all()
+        self.assertEqual(midi.messages_sent, [mapping_2.request])
+
+        client.receive(answer_2)
+
+        MockTime.mock["monotonicReturn"] = 2
+        request_all()
+        self.assertEqual(midi.messages_sent, [mapping_1.request, mapping_2.request])
+
+        client.receive(answer_1)
+        client.receive(answer_2)
+
+        # Setting the value requests the mapping again
+        MockTime.mock["monotonicReturn"] = 2.2
+        client.set(mapping_1, 3)
+
+        request_all()
+        self.assertEqual(midi.messages_sent, [mapping_1.request, mapping_2.request])
+
+    def test_interval_listeners(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        (mapping, answer) = create_mapping(1)
+        
+        client = Client(
+            midi = midi,
+            config = {},
+            polling = {
+                "mappings": [
+                    {
+                        "mapping": mapping,
+                        "interval": 1000
+                    }
+                ]
+            }
+        )
+
+        listener_1 = MockClientRequestListener()
+        listener_2 = MockClientRequestListener()
+
+        # Answers arrive between the requests of the listeners
+        for i in range(5):
+            MockTime.mock["monotonicReturn"] = 1 + i
+            
+            client.request(mapping, listener_1)
+            client.receive(answer)
+            client.request(mapping, listener_2)
+
+            # Not due: Nobody is notified again
+            MockTime.mock["monotonicReturn"] = 1.5 + i
+
+            client.request(mapping, listener_1)
+            client.request(mapping, listener_2)
+
+        self.assertEqual(len(midi.messages_sent), 5)
+        self.assertEqual(listener_1.parameter_changed_calls, [mapping] * 5)
+        self.assertEqual(listener_2.parameter_changed_calls, [mapping] * 5)
+
+    def test_spread(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        (mapping_1, answer_1) = create_mapping(1)
+        (mapping_2, answer_2) = create_mapping(2)
+        (mapping_3, answer_3) = create_mapping(3)
+        (mapping_4, answer_4) = create_mapping(4)
+
+        client = Client(
+            midi = midi,
+            config = {
+                "updateInterval": 200
+            },
+            polling = {
+                "spread": True,
+                "mappings": [
+                    {
+                        "mapping": mapping_2,
+                        "priority": 5
+                    }
+                ]
+            }
+        )
+
+        listener = MockClientRequestListener()
+
+        MockTime.mock["monotonicReturn"] = 1
+        client.request(mapping_1, listener)
+        client.request(mapping_2, listener)
+        client.request(mapping_3, listener)
+        client.request(mapping_4, listener)
+
+        self.assertEqual(midi.messages_sent, [])
+        self.assertEqual(len(client.requests), 4)
+
+        # Answered before being sent: Not sent anymore
+        client.receive(answer_4)
+        self.assertEqual(listener.parameter_changed_calls, [mapping_4])
+
+        # Highest priority first, in the next tick
+        MockTime.mock["monotonicReturn"] = 1.001
+        Timers.process()
+        self.assertEqual(midi.messages_sent, [mapping_2.request])
+
+        # The remaining requests are spread until the end of the update interval
+        MockTime.mock["monotonicReturn"] = 1.067
+        Timers.process()
+        self.assertEqual(midi.messages_sent, [mapping_2.request])
+
+        MockTime.mock["monotonicReturn"] = 1.068
+        Timers.process()
+        self.assertEqual(midi.messages_sent, [mapping_2.request, mapping_1.request])
+
+        MockTime.mock["monotonicReturn"] = 1.135
+        Timers.process()
+        self.assertEqual(midi.messages_sent, [mapping_2.request, mapping_1.request, mapping_3.request])
+
+        # Answers are processed as usual
+        client.receive(answer_1)
+        client.receive(answer_2)
+        client.receive(answer_3)
+
+        self.assertEqual(listener.parameter_changed_calls, [mapping_4, mapping_1, mapping_2, mapping_3])
+        self.assertEqual(client.requests, [])
+
+        # No timers left (neither spreading nor request lifetimes)
+        self.assertEqual(Timers._scheduled, [])
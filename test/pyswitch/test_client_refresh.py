@@ -0,0 +1,238 @@
+import sys
+import unittest
+from unittest.mock import patch   # Necessary workaround! Needs to be separated.
+
+from .mocks_lib import *
+
+# Import subject under test
+with patch.dict(sys.modules, {
+    "micropython": MockMicropython,
+    "usb_midi": MockUsbMidi(),
+    "adafruit_midi": MockAdafruitMIDI(),
+    "adafruit_midi.control_change": MockAdafruitMIDIControlChange(),
+    "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive(),
+    "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
+    "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
+    "gc": MockGC(),
+    "time": MockTime
+}):
+    from lib.pyswitch.controller.Client import Client
+    from lib.pyswitch.misc import Timers
+
+    from.mocks_appl import *
+
+
+class TestClientRefresh(unittest.TestCase):
+
+    def setUp(self):
+        Timers._scheduled = []
+
+    def test_sentinel(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        (sentinel, sentinel_answer) = create_mapping(1)
+        (mapping_1, answer_1) = create_mapping(2)
+        (mapping_2, answer_2) = create_mapping(3)
+
+        client = Client(
+            midi = midi,
+            config = {
+                "updateInterval": 200
+            },
+            refresh = {
+                "sentinel": sentinel,
+                "alwaysPoll": [mapping_2]
+            }
+        )
+
+        listener = MockClientRequestListener()
+
+        def tick(time):
+            midi.messages_sent = []
+            MockTime.mock["monotonicReturn"] = time
+            Timers.process()
+
+        def request_all():
+            client.request(mapping_1, listener)
+            client.request(mapping_2, listener)
+
+        def answer(msg, mapping, value):
+            mapping.outputs_parse = [{ "message": msg, "value": value }]
+            client.receive(msg)
+
+        # First pass: Everything is requested
+        tick(1)
+        request_all()
+        self.assertEqual(midi.messages_sent, [sentinel.request, mapping_1.request, mapping_2.request])
+
+        answer(sentinel_answer, sentinel, "date 1")
+        answer(answer_1, mapping_1, 10)
+        answer(answer_2, mapping_2, 20)
+
+        self.assertEqual(listener.parameter_changed_calls, [mapping_1, mapping_2])
+
+        # Sentinel did not change: Only the always polled mapping is requested, the sentinel only
+        # once per update interval
+        tick(1.1)
+        request_all()
+        self.assertEqual(midi.messages_sent, [mapping_2.request])
+
+        answer(answer_2, mapping_2, 20)
+
+        tick(1.201)
+        self.assertEqual(midi.messages_sent, [sentinel.request])
+
+        answer(sentinel_answer, sentinel, "date 1")
+
+        request_all()
+        self.assertEqual(midi.messages_sent, [sentinel.request, mapping_2.request])
+
+        answer(answer_2, mapping_2, 20)
+
+        # Sentinel changes: Everything is requested once
+        tick(1.402)
+        self.assertEqual(midi.messages_sent, [sentinel.request])
+
+        answer(sentinel_answer, sentinel, "date 2")
+
+        request_all()
+        self.assertEqual(midi.messages_sent, [sentinel.request, mapping_1.request, mapping_2.request])
+
+        answer(answer_1, mapping_1, 11)
+        answer(answer_2, mapping_2, 20)
+
+        tick(1.5)
+        request_all()
+        self.assertEqual(midi.messages_sent, [mapping_2.request])
+
+        answer(answer_2, mapping_2, 20)
+
+        # Setting a mapping requests it again
+        client.set(mapping_1, 1)
+
+        tick(1.55)
+        request_all()
+        self.assertEqual(midi.messages_sent, [mapping_1.request, mapping_2.request])
+
+    def test_sentinel_once_per_interval(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        (sentinel, sentinel_answer) = create_mapping(1)
+
+        mappings = []
+        for i in range(5):
+            mappings.append(create_mapping(i + 2))
+
+        client = Client(
+            midi = midi,
+            config = {
+                "updateInterval": 200
+            },
+            refresh = {
+                "sentinel": sentinel
+            }
+        )
+
+        listener = MockClientRequestListener()
+        
+        MockTime.mock["monotonicReturn"] = 1
+        
+        for i in range(3):
+            # Answers arrive between the requests of the callbacks
+            for (mapping, answer) in mappings:
+                client.request(mapping, listener)
+
+                client.receive(sentinel_answer)
+                client.receive(answer)
+
+            MockTime.mock["monotonicReturn"] += 0.1
+            Timers.process()
+
+        self.assertEqual(midi.messages_sent.count(sentinel.request), 2)
+        self.assertEqual(len(midi.messages_sent), 2 + len(mappings))
+
+    def test_sentinel_listeners(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        (sentinel, sentinel_answer) = create_mapping(1)
+        (mapping, answer) = create_mapping(2)
+
+        client = Client(
+            midi = midi,
+            config = {},
+            refresh = {
+                "sentinel": sentinel
+            }
+        )
+
+        listener_1 = MockClientRequestListener()
+        listener_2 = MockClientRequestListener()
+
+        client.request(mapping, listener_1)
+        client.receive(sentinel_answer)
+        client.receive(answer)
+
+        # The second listener gets the buffered value, without requesting it again
+        midi.messages_sent = []
+        client.request(mapping, listener_2)
+
+        self.assertEqual(midi.messages_sent, [])
+        self.assertEqual(listener_1.parameter_changed_calls, [mapping])
+        self.assertEqual(listener_2.parameter_changed_calls, [mapping])
+
+        # Only once per received value
+        client.request(mapping, listener_1)
+        client.request(mapping, listener_2)
+
+        self.assertEqual(listener_1.parameter_changed_calls, [mapping])
+        self.assertEqual(listener_2.parameter_changed_calls, [mapping])
+
+        # New value
+        client.set(mapping, 5)
+        
+        client.request(mapping, listener_1)
+        client.receive(answer)
+        client.request(mapping, listener_2)
+
+        self.assertEqual(listener_1.parameter_changed_calls, [mapping, mapping])
+        self.assertEqual(listener_2.parameter_changed_calls, [mapping, mapping])
+
+    def test_sentinel_terminated(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        (sentinel, sentinel_answer) = create_mapping(1)
+        (mapping_1, answer_1) = create_mapping(2)
+
+        client = Client(
+            midi = midi,
+            config = {},
+            refresh = {
+                "sentinel": sentinel
+            }
+        )
+
+        listener = MockClientRequestListener()
+
+        MockTime.mock["monotonicReturn"] = 1
+        client.request(mapping_1, listener)
+
+        sentinel.outputs_parse = [{ "message": sentinel_answer, "value": "date 1" }]
+        client.receive(sentinel_answer)
+
+        mapping_1.outputs_parse = [{ "message": answer_1, "value": 10 }]
+        client.receive(answer_1)
+
+        midi.messages_sent = []
+        client.request(mapping_1, listener)
+        self.assertEqual(midi.messages_sent, [])
+
+        MockTime.mock["monotonicReturn"] = 1.201
+        Timers.process()
+        self.assertEqual(midi.messages_sent, [sentinel.request])
+
+        # Device offline
+        client.get_matching_request(sentinel).terminate()
+
+        midi.messages_sent = []
+        client.request(mapping_1, listener)
+        self.assertEqual(midi.messages_sent, [mapping_1.request])
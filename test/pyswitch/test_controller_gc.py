@@ -0,0 +1,121 @@
+import sys
+import unittest
+from unittest.mock import patch   # Necessary workaround! Needs to be separated.
+
+from .mocks_lib import *
+
+# Import subject under test
+with patch.dict(sys.modules, {
+    "micropython": MockMicropython,
+    "usb_midi": MockUsbMidi(),
+    "adafruit_midi": MockAdafruitMIDI(),
+    "adafruit_midi.control_change": MockAdafruitMIDIControlChange(),
+    "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive(),
+    "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
+    "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
+    "gc": MockGC()
+}):
+    from adafruit_midi.system_exclusive import SystemExclusive
+    from gc import gc_mock_data
+    from lib.pyswitch.controller.Controller import Controller
+    from .mocks_appl import *
+
+
+class TestControllerGarbageCollection(unittest.TestCase):
+
+    def _create_appl(self, config, switch):
+        gc_mock_data().reset()
+        gc_mock_data().output_mem_alloc = 1000
+
+        (appl, midi, period) = create_appl(
+            config = config, 
+            switches = [
+                {
+                    "assignment": {
+                        "model": switch
+                    }
+                }
+            ]
+        )
+
+        return (appl, midi)
+
+
+    def test_idle_collect(self):
+        switch = MockSwitch()
+        (appl, midi) = self._create_appl({ "gcIdleCollectBytes": 500 }, switch)
+
+        # Not enough allocated
+        gc_mock_data().output_mem_alloc = 1400
+        appl.tick()
+        self.assertEqual(gc_mock_data().collect_calls, 0)
+
+        # Enough allocated, but MIDI message received
+        gc_mock_data().output_mem_alloc = 1600
+        midi.next_receive_messages.append(
+            SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x01, 0x02, 0x03, 0x04]
+            )
+        )
+        appl.tick()
+        self.assertEqual(gc_mock_data().collect_calls, 0)
+
+        # Switch pushed
+        switch.shall_be_pushed = True
+        appl.tick()
+        appl.tick()
+        self.assertEqual(gc_mock_data().collect_calls, 0)
+
+        # Switch released
+        switch.shall_be_pushed = False
+        appl.tick()
+        self.assertEqual(gc_mock_data().collect_calls, 0)
+
+        # Idle
+        appl.tick()
+        self.assertEqual(gc_mock_data().collect_calls, 1)
+        self.assertEqual(appl.get_measurement(Controller.STAT_ID_GC_TIME).calls, 1)
+
+        appl.tick()
+        self.assertEqual(gc_mock_data().collect_calls, 1)
+
+        gc_mock_data().output_mem_alloc = 2200
+        appl.tick()
+        self.assertEqual(gc_mock_data().collect_calls, 2)
+        self.assertEqual(appl.get_measurement(Controller.STAT_ID_GC_TIME).calls, 2)
+
+
+    def test_disabled(self):
+        (appl, midi) = self._create_appl({}, MockSwitch())
+
+        gc_mock_data().output_mem_alloc = 100000
+        appl.tick()
+        
+        self.assertEqual(gc_mock_data().collect_calls, 0)
+        self.assertEqual(gc_mock_data().threshold, None)
+        self.assertEqual(appl.get_measurement(Controller.STAT_ID_GC_TIME), None)
+
+
+    def test_rebaseline_after_automatic_collect(self):
+        (appl, midi) = self._create_appl({ "gcIdleCollectBytes": 500 }, MockSwitch())
+
+        # Automatic collection freed memory below the last baseline
+        gc_mock_data().output_mem_alloc = 200
+        appl.tick()
+        self.assertEqual(gc_mock_data().collect_calls, 0)
+
+        # Measured from the new baseline, not enough allocated yet
+        gc_mock_data().output_mem_alloc = 600
+        appl.tick()
+        self.assertEqual(gc_mock_data().collect_calls, 0)
+
+        gc_mock_data().output_mem_alloc = 800
+        appl.tick()
+        self.assertEqual(gc_mock_data().collect_calls, 1)
+
+
+    def test_threshold(self):
+        (appl, midi) = self._create_appl({ "gcThresholdBytes": 4096 }, MockSwitch())
+
+        self.assertEqual(gc_mock_data().threshold, 4096)
@@ -0,0 +1,165 @@
+import sys
+import unittest
+from unittest.mock import patch   # Necessary workaround! Needs to be separated.
+
+from .mocks_lib import *
+
+# Import subject under test
+with patch.dict(sys.modules, {
+    "micropython": MockMicropython,
+    "usb_midi": MockUsbMidi(),
+    "adafruit_midi": MockAdafruitMIDI(),
+    "adafruit_midi.control_change": MockAdafruitMIDIControlChange(),
+    "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive(),
+    "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
+    "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
+    "gc": MockGC()
+}):
+    from adafruit_midi.system_exclusive import SystemExclusive
+    from lib.pyswitch.controller.RuntimeMeasurement import RuntimeHistogram
+    from lib.pyswitch.misc import get_current_millis
+    from .mocks_appl import *
+
+
+class MockSendingAction(MockAction):
+    def __init__(self, mapping, brightness = None):
+        super().__init__()
+
+        self.mapping = mapping
+        self.brightness = brightness
+
+    def push(self):
+        super().push()
+
+        self.appl.client.set(self.mapping, 1)
+
+        if self.brightness != None:
+            self.switch.brightness = self.brightness
+
+
+class TestControllerLatency(unittest.TestCase):
+
+    def _create_appl(self, config, switch, action):
+        (appl, midi, period) = create_appl(
+            config = config, 
+            switches = [
+                {
+                    "assignment": {
+                        "model": switch,
+                        "name": "Switch 1",
+                        "pixels": [0, 1, 2]
+                    },
+                    "actions": [
+                        action
+                    ]
+                }
+            ]
+        )
+
+        return (appl, midi)
+
+
+    def test_disabled(self):
+        switch = MockSwitch()
+        mapping = MockParameterMapping(set = SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [0x01, 0x02]))
+        (appl, midi) = self._create_appl({}, switch, MockSendingAction(mapping))
+
+        switch.shall_be_pushed = True
+        appl.tick()
+
+        self.assertEqual(len(midi.messages_sent), 1)
+        self.assertEqual(appl.switches[0].latency, None)
+        self.assertEqual(appl.get_measurement("Switch 1 MIDI"), None)
+
+
+    def test_latency(self):
+        switch = MockSwitch()
+        mapping = MockParameterMapping(set = SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [0x01, 0x02]))
+        (appl, midi) = self._create_appl({ "traceLatency": True }, switch, MockSendingAction(mapping))
+
+        m_midi = appl.get_measurement("Switch 1 MIDI")
+        m_display = appl.get_measurement("Switch 1 Display")
+
+        self.assertIsInstance(m_midi, RuntimeHistogram)
+        self.assertIsInstance(m_display, RuntimeHistogram)
+
+        appl.tick()
+
+        self.assertEqual(m_midi.calls, 0)
+        self.assertEqual(m_display.calls, 0)
+
+        # Push (LEDs are not changed by the push itself)
+        switch.shall_be_pushed = True
+        appl.tick()
+
+        self.assertEqual(len(midi.messages_sent), 1)
+        self.assertEqual(m_midi.calls, 1)
+        self.assertEqual(m_display.calls, 0)
+
+        # Hold
+        appl.tick()
+        self.assertEqual(m_display.calls, 0)
+
+        # LEDs changed later (feedback of the device), but not written yet
+        appl.led_driver.output_show = False
+        appl.switches[0].brightness = 0.7
+        appl.tick()
+
+        self.assertEqual(m_display.calls, 0)
+
+        # Written
+        appl.led_driver.output_show = True
+        appl.tick()
+
+        self.assertEqual(m_display.calls, 1)
+
+        # Release, further changes: No more latencies
+        switch.shall_be_pushed = False
+        appl.tick()
+        appl.switches[0].brightness = 0.2
+        appl.tick()
+
+        self.assertEqual(m_midi.calls, 1)
+        self.assertEqual(m_display.calls, 1)
+
+
+    def test_latency_leds(self):
+        switch = MockSwitch()
+        mapping = MockParameterMapping(set = SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [0x01, 0x02]))
+        (appl, midi) = self._create_appl({ "traceLatency": True }, switch, MockSendingAction(mapping, brightness = 1))
+
+        m_display = appl.get_measurement("Switch 1 Display")
+
+        appl.tick()
+
+        # The push changes the LEDs, which are written in the same tick
+        switch.shall_be_pushed = True
+        appl.tick()
+
+        self.assertEqual(m_display.calls, 1)
+
+        # Setting the same values again is no change
+        switch.shall_be_pushed = False
+        appl.tick()
+        switch.shall_be_pushed = True
+        appl.tick()
+
+        self.assertEqual(m_display.calls, 1)
+
+
+    def test_latency_timestamp(self):
+        switch = MockSwitch()
+        mapping = MockParameterMapping(set = SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [0x01, 0x02]))
+        (appl, midi) = self._create_appl({ "traceLatency": True }, switch, MockSendingAction(mapping))
+
+        m_midi = appl.get_measurement("Switch 1 MIDI")
+
+        appl.tick()
+
+        # The switch model provides the time of the push
+        switch.timestamp = get_current_millis() - 100
+        switch.shall_be_pushed = True
+        appl.tick()
+
+        self.assertEqual(m_midi.calls, 1)
+        self.assertGreaterEqual(m_midi.value, 100000)
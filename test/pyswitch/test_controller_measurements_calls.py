@@ -58,7 +58,7 @@ class TestControllerMeasurementsCalls(unittest.TestCase):
             self.assertEqual(m.num_finish_calls, 6)     
 
             self.assertEqual(appl.get_measurement(Controller.STAT_ID_TICK_TIME), m)
-            self.assertEqual(appl.get_measurement(Controller.STAT_ID_TICK_TIME + 1), None)
+            self.assertEqual(appl.get_measurement(999), None)
 
             return False
 
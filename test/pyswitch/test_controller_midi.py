@@ -63,4 +63,30 @@ class TestControllerMidi(unittest.TestCase):
         self.assertEqual(len(midi.next_receive_messages), 0 if do_it else num_msgs)
 
 
+    def test_led_show_per_tick(self):
+        led_driver = MockNeoPixelDriver()
+
+        appl = MockController(
+            led_driver = led_driver,
+            midi = MockMidiController(),
+            switches = [
+                {
+                    "assignment": {
+                        "model": MockSwitch(),
+                        "pixels": (0, 1, 2)
+                    }
+                }
+            ]
+        )
+
+        def eval():
+            self.assertEqual(led_driver.num_show_calls, 4)
+            return False
+
+        appl.next_step = SceneStep(
+            num_pass_ticks = 3,
+            evaluate = eval
+        )
+
+        appl.process()
 
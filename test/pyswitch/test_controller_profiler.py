@@ -0,0 +1,80 @@
+import sys
+import unittest
+from unittest.mock import patch   # Necessary workaround! Needs to be separated.
+
+from .mocks_lib import *
+
+# Import subject under test
+with patch.dict(sys.modules, {
+    "micropython": MockMicropython,
+    "usb_midi": MockUsbMidi(),
+    "adafruit_midi": MockAdafruitMIDI(),
+    "adafruit_midi.control_change": MockAdafruitMIDIControlChange(),
+    "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive(),
+    "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
+    "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
+    "gc": MockGC()
+}):
+    from adafruit_midi.system_exclusive import SystemExclusive
+    from lib.pyswitch.controller.Controller import Controller
+    from lib.pyswitch.controller.RuntimeMeasurement import RuntimeHistogram
+    from .mocks_appl import *
+
+
+class TestControllerProfiler(unittest.TestCase):
+
+    def _create_appl(self, config):
+        return create_appl(
+            config = config, 
+            switches = [
+                {
+                    "assignment": {
+                        "model": MockSwitch()
+                    }
+                }
+            ]
+        )
+
+
+    def test_disabled(self):
+        (appl, midi, period) = self._create_appl({})
+
+        appl.tick()
+
+        self.assertEqual(appl.get_measurement(Controller.PHASE_SWITCHES), None)
+
+
+    def test_phases(self):
+        (appl, midi, period) = self._create_appl({ "profileTicks": True })
+
+        # Tick without update
+        appl.tick()
+
+        for name in [Controller.PHASE_SWITCHES, Controller.PHASE_MIDI_RECEIVE, Controller.PHASE_CLIENT, Controller.PHASE_TIMERS, Controller.PHASE_LEDS]:
+            m = appl.get_measurement(name)
+            self.assertIsInstance(m, RuntimeHistogram)
+            self.assertEqual(m.name, name)
+            self.assertEqual(m.calls, 1)
+            self.assertIsNotNone(m.percentile(50))
+
+        # Tick with update and a MIDI message: Updateables are profiled by class name
+        midi.next_receive_messages.append(
+            SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x01, 0x02, 0x03, 0x04]
+            )
+        )
+
+        period.exceed_next_time = True
+        appl.tick()
+
+        # The update has triggered the output (and reset) of the histograms, so only this tick is counted
+        self.assertEqual(appl.get_measurement(Controller.PHASE_SWITCHES).calls, 1)
+        self.assertEqual(appl.get_measurement(Controller.PHASE_CLIENT).calls, 1)
+        self.assertEqual(appl.get_measurement("RuntimeMeasurement").calls, 1)
+        self.assertEqual(appl.get_measurement("TickProfiler").calls, 1)
+
+        # Other IDs
+        self.assertIsNotNone(appl.get_measurement(Controller.STAT_ID_TICK_TIME))
+        self.assertEqual(appl.get_measurement(999), None)
+        self.assertEqual(appl.get_measurement("foo"), None)
@@ -0,0 +1,97 @@
+import sys
+import unittest
+from unittest.mock import patch   # Necessary workaround! Needs to be separated.
+
+from .mocks_lib import *
+
+# Import subject under test
+with patch.dict(sys.modules, {
+    "micropython": MockMicropython,
+    "usb_midi": MockUsbMidi(),
+    "adafruit_midi": MockAdafruitMIDI(),
+    "adafruit_midi.control_change": MockAdafruitMIDIControlChange(),
+    "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive(),
+    "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
+    "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
+    "gc": MockGC()
+}):
+    from lib.pyswitch.misc import Updateable
+    from lib.pyswitch.controller import Controller as ControllerModule
+    from .mocks_appl import *
+
+
+class MockCountingUpdateable(Updateable):
+    def __init__(self):
+        self.num_update_calls = 0
+
+    def update(self):
+        self.num_update_calls += 1
+
+
+class TestControllerUpdate(unittest.TestCase):
+
+    def _create_appl(self, config, num_updateables):
+        (appl, midi, period) = create_appl(config)
+
+        # Only use the test updateables
+        appl.updateables = []
+
+        updateables = [MockCountingUpdateable() for i in range(num_updateables)]
+        for u in updateables:
+            appl.add_updateable(u)
+
+        return (appl, period, updateables)
+
+
+    def test_no_budget(self):
+        (appl, period, updateables) = self._create_appl({}, 5)
+
+        appl.tick()
+        self.assertEqual([u.num_update_calls for u in updateables], [0, 0, 0, 0, 0])
+
+        period.exceed_next_time = True
+        appl.tick()
+        self.assertEqual([u.num_update_calls for u in updateables], [1, 1, 1, 1, 1])
+
+        appl.tick()
+        self.assertEqual([u.num_update_calls for u in updateables], [1, 1, 1, 1, 1])
+
+
+    def test_max_updateables_per_tick(self):
+        (appl, period, updateables) = self._create_appl({ "maxUpdateablesPerTick": 2 }, 5)
+
+        period.exceed_next_time = True
+        appl.tick()
+        self.assertEqual([u.num_update_calls for u in updateables], [1, 1, 0, 0, 0])
+
+        # Pass is continued without the period being exceeded
+        appl.tick()
+        self.assertEqual([u.num_update_calls for u in updateables], [1, 1, 1, 1, 0])
+
+        appl.tick()
+        self.assertEqual([u.num_update_calls for u in updateables], [1, 1, 1, 1, 1])
+
+        # Pass finished: Wait for the next period
+        appl.tick()
+        self.assertEqual([u.num_update_calls for u in updateables], [1, 1, 1, 1, 1])
+
+        period.exceed_next_time = True
+        appl.tick()
+        self.assertEqual([u.num_update_calls for u in updateables], [2, 2, 1, 1, 1])
+
+
+    def test_update_budget_millis(self):
+        (appl, period, updateables) = self._create_appl({ "updateBudgetMillis": 10 }, 5)
+
+        # Every call to get the time advances it by 4ms
+        self._time = 0
+        def get_current_millis():
+            self._time += 4
+            return self._time
+
+        with patch.object(ControllerModule, "get_current_millis", get_current_millis):
+            self.assertEqual(appl.update(), False)
+            self.assertEqual([u.num_update_calls for u in updateables], [1, 1, 1, 0, 0])
+
+            self.assertEqual(appl.update(), True)
+            self.assertEqual([u.num_update_calls for u in updateables], [1, 1, 1, 1, 1])
@@ -0,0 +1,165 @@
+import sys
+import unittest
+from unittest.mock import patch, MagicMock   # Necessary workaround! Needs to be separated.
+
+from .mocks_lib import *
+
+# Import subject under test
+with patch.dict(sys.modules, {
+    "micropython": MockMicropython,
+    "board": MagicMock(),
+    "busio": MagicMock(),
+    "displayio": MagicMock(),
+    "fourwire": MagicMock(),
+    "digitalio": MagicMock(),
+    "keypad": MockKeypad,
+    "supervisor": MockSupervisor,
+    "time": MockTime,
+    "adafruit_misc.adafruit_st7789": MagicMock(),
+    "adafruit_misc.neopixel": MagicMock(),
+    "adafruit_bitmap_font": MagicMock(),
+    "adafruit_midi": MockAdafruitMIDI(),
+    "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
+    "adafruit_midi.control_change": MockAdafruitMIDIControlChange(),
+    "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
+    "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive()
+}):
+    from lib.pyswitch.hardware.adafruit import AdafruitKeypad, AdafruitKeypadSwitch
+
+
+class TestAdafruitKeypad(unittest.TestCase):
+
+    def setUp(self):
+        # Loop clock at 5 seconds, event clock at 1 second
+        MockTime.mock["monotonicReturn"] = 5
+        MockSupervisor.mock["ticksMsReturn"] = 1000
+
+    def test_init(self):
+        keypad = AdafruitKeypad(max_events = 16)
+
+        switch_1 = AdafruitKeypadSwitch(keypad, "GP1")
+        switch_2 = AdafruitKeypadSwitch(keypad, "GP2")
+        switch_3 = AdafruitKeypadSwitch(keypad, "GP3")
+
+        self.assertEqual(repr(switch_1), repr("GP1"))
+        self.assertEqual(switch_1.pushed, False)
+        self.assertEqual(keypad._keys, None)
+
+        # Switch 3 is not used
+        switch_1.init()
+        switch_2.init()
+
+        # Only added once
+        switch_1.init()
+
+        # Keys are created on first access
+        self.assertEqual(keypad._keys, None)
+        self.assertEqual(switch_1.pushed, False)
+
+        keys = keypad._keys
+        self.assertEqual(keys.pins, ["GP1", "GP2"])
+        self.assertEqual(keys.value_when_pressed, False)
+        self.assertEqual(keys.pull, True)
+        self.assertEqual(keys.max_events, 16)
+
+        self.assertEqual(switch_2.pushed, False)
+        self.assertIs(keypad._keys, keys)
+
+        # No switches can be added anymore
+        with self.assertRaises(Exception):
+            switch_3.init()
+
+
+    def test_events(self):
+        keypad = AdafruitKeypad()
+
+        switch_1 = AdafruitKeypadSwitch(keypad, "GP1")
+        switch_2 = AdafruitKeypadSwitch(keypad, "GP2")
+
+        switch_1.init()
+        switch_2.init()
+
+        self.assertEqual(switch_1.pushed, False)
+        self.assertEqual(switch_2.pushed, False)
+
+        queue = keypad._keys.events
+
+        queue.queue.append(MockKeypad.Event(key_number = 1, pressed = True, timestamp = 100))
+
+        # Timestamps are converted to the loop clock
+        self.assertEqual(switch_1.pushed, False)
+        self.assertEqual(switch_2.pushed, True)
+        self.assertEqual(switch_2.timestamp, 4100)
+        self.assertEqual(switch_2.pushed, True)
+
+        # Short push of switch 1 between two calls must not get lost
+        queue.queue.append(MockKeypad.Event(key_number = 0, pressed = True, timestamp = 200))
+        queue.queue.append(MockKeypad.Event(key_number = 0, pressed = False, timestamp = 210))
+        queue.queue.append(MockKeypad.Event(key_number = 1, pressed = False, timestamp = 220))
+
+        self.assertEqual(switch_1.pushed, True)
+        self.assertEqual(switch_1.timestamp, 4200)
+        self.assertEqual(switch_1.pushed, False)
+        self.assertEqual(switch_1.timestamp, 4210)
+        self.assertEqual(switch_1.pushed, False)
+
+        self.assertEqual(switch_2.pushed, False)
+        self.assertEqual(switch_2.timestamp, 4220)
+
+
+    def test_timestamp_wrap(self):
+        keypad = AdafruitKeypad()
+
+        switch_1 = AdafruitKeypadSwitch(keypad, "GP1")
+        switch_1.init()
+
+        self.assertEqual(switch_1.pushed, False)
+
+        # Event before the tick counter wrapped around
+        MockSupervisor.mock["ticksMsReturn"] = 10
+        keypad._keys.events.queue.append(MockKeypad.Event(key_number = 0, pressed = True, timestamp = 0x1fffffff - 9))
+
+        self.assertEqual(switch_1.pushed, True)
+        self.assertEqual(switch_1.timestamp, 4980)
+
+
+    def test_pending_limit(self):
+        keypad = AdafruitKeypad()
+
+        switch_1 = AdafruitKeypadSwitch(keypad, "GP1")
+        switch_1.init()
+
+        self.assertEqual(switch_1.pushed, False)
+
+        # Switch not read for a long time: Only the last press/release pair is kept
+        for i in range(10):
+            switch_1.add_event(True, i * 10)
+            switch_1.add_event(False, i * 10 + 5)
+
+        self.assertEqual(len(switch_1._pending), 2)
+
+        self.assertEqual(switch_1.pushed, True)
+        self.assertEqual(switch_1.timestamp, 90)
+        self.assertEqual(switch_1.pushed, False)
+        self.assertEqual(switch_1.timestamp, 95)
+
+
+    def test_overflow(self):
+        keypad = AdafruitKeypad()
+
+        switch_1 = AdafruitKeypadSwitch(keypad, "GP1")
+        switch_1.init()
+
+        self.assertEqual(switch_1.pushed, False)
+
+        queue = keypad._keys.events
+
+        queue.queue.append(MockKeypad.Event(key_number = 0, pressed = True, timestamp = 100))
+        self.assertEqual(switch_1.pushed, True)
+
+        queue.queue.append(MockKeypad.Event(key_number = 0, pressed = False, timestamp = 200))
+        queue.overflowed = True
+
+        self.assertEqual(switch_1.pushed, False)
+        self.assertEqual(queue.overflowed, False)
+        self.assertEqual(keypad._keys.num_reset_calls, 1)
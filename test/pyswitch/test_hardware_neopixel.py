@@ -0,0 +1,84 @@
+import sys
+import unittest
+from unittest.mock import patch, MagicMock   # Necessary workaround! Needs to be separated.
+
+from .mocks_lib import *
+
+# Import subject under test
+with patch.dict(sys.modules, {
+    "micropython": MockMicropython,
+    "board": MagicMock(),
+    "busio": MagicMock(),
+    "displayio": MagicMock(),
+    "fourwire": MagicMock(),
+    "digitalio": MagicMock(),
+    "keypad": MockKeypad,
+    "supervisor": MockSupervisor,
+    "time": MockTime,
+    "adafruit_misc.adafruit_st7789": MagicMock(),
+    "adafruit_misc.neopixel": MagicMock(),
+    "adafruit_bitmap_font": MagicMock(),
+    "adafruit_midi": MockAdafruitMIDI(),
+    "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
+    "adafruit_midi.control_change": MockAdafruitMIDIControlChange(),
+    "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
+    "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive()
+}):
+    from lib.pyswitch.hardware.adafruit import AdafruitNeoPixelFrameBuffer
+
+
+class MockNeoPixel:
+    def __init__(self, num_leds):
+        self.leds = [(0, 0, 0) for i in range(num_leds)]
+        self.set_calls = []
+        self.num_show_calls = 0
+
+    def __len__(self):
+        return len(self.leds)
+
+    def __setitem__(self, index, color):
+        self.leds[index] = color
+        self.set_calls.append(index)
+
+    def show(self):
+        self.num_show_calls += 1
+
+
+class TestAdafruitNeoPixelFrameBuffer(unittest.TestCase):
+
+    def test_dirty_tracking(self):
+        pixels = MockNeoPixel(6)
+        fb = AdafruitNeoPixelFrameBuffer(pixels)
+
+        self.assertEqual(len(fb), 6)
+        self.assertEqual(fb[2], (0, 0, 0))
+
+        # Nothing changed: No output
+        fb[2] = (0, 0, 0)
+        self.assertEqual(fb.show(), False)
+
+        self.assertEqual(pixels.set_calls, [])
+        self.assertEqual(pixels.num_show_calls, 0)
+
+        # Multiple changes: One output
+        fb[2] = (10, 20, 30)
+        fb[3] = (10, 20, 30)
+        fb[2] = (10, 20, 40)
+
+        self.assertEqual(fb[2], (10, 20, 40))
+        self.assertEqual(pixels.set_calls, [2, 3, 2])
+        self.assertEqual(pixels.num_show_calls, 0)
+
+        self.assertEqual(fb.show(), True)
+        self.assertEqual(fb.show(), False)
+
+        self.assertEqual(pixels.leds[2], (10, 20, 40))
+        self.assertEqual(pixels.leds[3], (10, 20, 30))
+        self.assertEqual(pixels.num_show_calls, 1)
+
+        # Same values again: No output
+        fb[3] = (10, 20, 30)
+        fb.show()
+
+        self.assertEqual(pixels.set_calls, [2, 3, 2])
+        self.assertEqual(pixels.num_show_calls, 1)
@@ -205,3 +205,18 @@ class TestKemper(unittest.TestCase):
         self.assertIn("Sense", KemperMappings.BIDIRECTIONAL_SENSING().name)
 
         self.assertIn("Tempo", KemperMappings.TEMPO_DISPLAY().name)
+
+
+##########################################################################################################
+
+
+    def test_mappings_interned(self):
+        self.assertIs(KemperMappings.EFFECT_STATE(KemperEffectSlot.EFFECT_SLOT_ID_A), KemperMappings.EFFECT_STATE(KemperEffectSlot.EFFECT_SLOT_ID_A))
+        self.assertIsNot(KemperMappings.EFFECT_STATE(KemperEffectSlot.EFFECT_SLOT_ID_A), KemperMappings.EFFECT_STATE(KemperEffectSlot.EFFECT_SLOT_ID_B))
+        self.assertIsNot(KemperMappings.EFFECT_STATE(KemperEffectSlot.EFFECT_SLOT_ID_A), KemperMappings.EFFECT_TYPE(KemperEffectSlot.EFFECT_SLOT_ID_A))
+
+        self.assertIs(KemperMappings.RIG_SELECT(2), KemperMappings.RIG_SELECT(rig = 2))
+        self.assertIsNot(KemperMappings.RIG_SELECT(2), KemperMappings.RIG_SELECT(3))
+
+        self.assertIs(KemperMappings.RIG_NAME(), KemperMappings.RIG_NAME())
+        self.assertIsNot(KemperMappings.MORPH_BUTTON(), KemperMappings.MORPH_PEDAL())
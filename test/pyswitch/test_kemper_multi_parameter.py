@@ -0,0 +1,227 @@
+import sys
+import unittest
+from unittest.mock import patch   # Necessary workaround! Needs to be separated.
+
+from .mocks_lib import *
+
+# Import subject under test
+with patch.dict(sys.modules, {
+    "micropython": MockMicropython,
+    "displayio": MockDisplayIO(),
+    "adafruit_display_text": MockAdafruitDisplayText(),
+    "adafruit_midi.control_change": MockAdafruitMIDIControlChange(),
+    "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive(),
+    "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
+    "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
+    "adafruit_display_shapes.rect": MockDisplayShapes().rect(),
+    "gc": MockGC()
+}):
+    from lib.pyswitch.clients.kemper import *
+    from lib.pyswitch.controller.Client import Client
+
+    from .mocks_appl import *
+
+
+def create_single_mapping(address_page, address_number):
+    return KemperParameterMapping(
+        request = KemperNRPNMessage(
+            NRPN_FUNCTION_REQUEST_SINGLE_PARAMETER,
+            address_page,
+            address_number
+        ),
+        response = KemperNRPNMessage(
+            NRPN_FUNCTION_RESPONSE_SINGLE_PARAMETER,
+            address_page,
+            address_number
+        )
+    )
+
+
+def create_multi_response(address_page, first, values):
+    data = [0x00, 0x00, NRPN_FUNCTION_RESPONSE_MULTI_PARAMETER, 0x00, address_page, first]
+    for v in values:
+        data.append(int(v / 128))
+        data.append(v % 128)
+
+    return SystemExclusive(
+        manufacturer_id = NRPN_MANUFACTURER_ID,
+        data = data
+    )
+
+
+class TestKemperMultiParameterMapping(unittest.TestCase):
+
+    def test_messages(self):
+        mapping_1 = create_single_mapping(0x32, 0x03)
+        mapping_2 = create_single_mapping(0x32, 0x00)
+
+        batch = KemperMultiParameterMapping(
+            mappings = [mapping_1, mapping_2]
+        )
+
+        self.assertEqual(list(batch.request.data), [NRPN_PRODUCT_TYPE, NRPN_DEVICE_ID_OMNI, NRPN_FUNCTION_REQUEST_MULTI_PARAMETER, NRPN_INSTANCE, 0x32, 0x00])
+        self.assertEqual(list(batch.response.data), [NRPN_PRODUCT_TYPE, NRPN_DEVICE_ID_OMNI, NRPN_FUNCTION_RESPONSE_MULTI_PARAMETER, NRPN_INSTANCE, 0x32, 0x00])
+
+    def test_no_mappings(self):
+        with self.assertRaises(Exception):
+            KemperMultiParameterMapping(
+                mappings = []
+            )
+
+    def test_different_pages(self):
+        with self.assertRaises(Exception):
+            KemperMultiParameterMapping(
+                mappings = [
+                    create_single_mapping(0x32, 0x03),
+                    create_single_mapping(0x33, 0x00)
+                ]
+            )
+
+    def test_parse(self):
+        mapping_1 = create_single_mapping(0x32, 0x03)
+        mapping_2 = create_single_mapping(0x32, 0x00)
+
+        batch = KemperMultiParameterMapping(
+            mappings = [mapping_1, mapping_2]
+        )
+
+        # Other messages
+        self.assertEqual(batch.parse(ControlChange(1, 2)), False)
+        self.assertEqual(batch.parse(create_multi_response(0x33, 0x00, [1, 2, 3, 4])), False)
+        self.assertEqual(batch.parse(create_multi_response(0x32, 0x01, [1, 2, 3, 4])), False)
+
+        # Too short
+        self.assertEqual(batch.parse(create_multi_response(0x32, 0x00, [1, 2, 3])), False)
+        self.assertEqual(mapping_1.value, None)
+        self.assertEqual(mapping_2.value, None)
+
+        # Values are fanned out
+        self.assertEqual(batch.parse(create_multi_response(0x32, 0x00, [300, 2, 3, 1, 5])), True)
+        self.assertEqual(mapping_1.value, 1)
+        self.assertEqual(mapping_2.value, 300)
+
+    def test_effect_slot_parameters(self):
+        slot_id = KemperEffectSlot.EFFECT_SLOT_ID_REV
+
+        try:
+            batch = KemperMappings.EFFECT_SLOT_PARAMETERS(slot_id)
+
+            self.assertEqual(batch.mappings, [KemperMappings.EFFECT_TYPE(slot_id), KemperMappings.EFFECT_STATE(slot_id)])
+
+            self.assertEqual(batch.parse(create_multi_response(0x3d, 0x00, [23, 0, 0, 1])), True)
+            self.assertEqual(KemperMappings.EFFECT_TYPE(slot_id).value, 23)
+            self.assertEqual(KemperMappings.EFFECT_STATE(slot_id).value, 1)
+
+        finally:
+            # The mappings are shared with other tests
+            KemperMappings.EFFECT_TYPE(slot_id).value = None
+            KemperMappings.EFFECT_STATE(slot_id).value = None
+
+
+##############################################################################################
+
+
+class TestClientBatchRequests(unittest.TestCase):
+
+    def test_request(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        mapping_1 = create_single_mapping(0x32, 0x03)
+        mapping_2 = create_single_mapping(0x32, 0x00)
+
+        batch = KemperMultiParameterMapping(
+            mappings = [mapping_1, mapping_2]
+        )
+
+        client = Client(
+            midi = midi,
+            config = {},
+            polling = {
+                "batches": [batch]
+            }
+        )
+
+        listener_1 = MockClientRequestListener()
+        listener_2 = MockClientRequestListener()
+
+        client.request(mapping_1, listener_1)
+        client.request(mapping_2, listener_1)
+        client.request(mapping_2, listener_2)
+
+        # Only the batch request is sent
+        self.assertEqual(midi.messages_sent, [batch.request])
+        self.assertEqual(len(client.requests), 3)
+
+        # Single responses are still parsed
+        single = SystemExclusive(
+            manufacturer_id = NRPN_MANUFACTURER_ID,
+            data = [0x00, 0x00, NRPN_FUNCTION_RESPONSE_SINGLE_PARAMETER, 0x00, 0x32, 0x00, 0x00, 0x07]
+        )
+
+        client.receive(single)
+        self.assertEqual(listener_1.parameter_changed_calls, [mapping_2])
+        self.assertEqual(listener_2.parameter_changed_calls, [mapping_2])
+        self.assertEqual(mapping_2.value, 7)
+        self.assertEqual(len(client.requests), 2)
+
+        # Multi response
+        client.receive(create_multi_response(0x32, 0x00, [8, 0, 0, 1]))
+
+        self.assertEqual(listener_1.parameter_changed_calls, [mapping_2, mapping_1])
+        self.assertEqual(listener_2.parameter_changed_calls, [mapping_2])
+        self.assertEqual(mapping_1.value, 1)
+        self.assertEqual(mapping_2.value, 8)
+        self.assertEqual(client.requests, [])
+
+    def test_request_terminated(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        mapping_1 = create_single_mapping(0x32, 0x03)
+        mapping_2 = create_single_mapping(0x32, 0x00)
+
+        batch = KemperMultiParameterMapping(
+            mappings = [mapping_1, mapping_2]
+        )
+
+        client = Client(
+            midi = midi,
+            config = {},
+            polling = {
+                "batches": [batch]
+            }
+        )
+
+        listener = MockClientRequestListener()
+
+        client.request(mapping_1, listener)
+        client.request(mapping_2, listener)
+
+        self.assertEqual(len(client.requests), 3)
+
+        client.get_matching_request(batch).terminate()
+
+        self.assertEqual(listener.request_terminated_calls, [mapping_1, mapping_2])
+        self.assertEqual(len(client.requests), 1)
+
+    def test_not_batched(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        mapping_1 = create_single_mapping(0x32, 0x03)
+        mapping_2 = create_single_mapping(0x32, 0x00)
+
+        KemperMultiParameterMapping(
+            mappings = [mapping_1, mapping_2]
+        )
+
+        # Batches are only used by clients they have been passed to
+        client = Client(
+            midi = midi,
+            config = {}
+        )
+
+        listener = MockClientRequestListener()
+
+        client.request(mapping_1, listener)
+        client.request(mapping_2, listener)
+
+        self.assertEqual(midi.messages_sent, [mapping_1.request, mapping_2.request])
@@ -117,6 +117,50 @@ class TestKemperParameterMappings(unittest.TestCase):
         self.assertEqual(mapping.value, 111)
 
 
+####################################################################################################
+
+
+    def test_message_keys(self):
+        mapping = KemperParameterMapping(
+            response = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x00, 0x00, 0xd9, 0x01, 0x04, 0xaa, 0x00, 0x00]
+            )            
+        )
+
+        self.assertEqual(mapping.response_keys(), [bytes([0xd9, 0x01, 0x04, 0xaa])])
+
+        msg_valid = SystemExclusive(
+            manufacturer_id = [0x00, 0x10, 0x20],
+            data = [0x01, 0x02, 0xd9, 0x01, 0x04, 0xaa, 0x05, 0x06]
+        )
+
+        msg_other = SystemExclusive(
+            manufacturer_id = [0x00, 0x10, 0x20],
+            data = [0x00, 0x00, 0xd9, 0x01, 0x05, 0xaa, 0x05, 0x06]
+        )
+
+        self.assertIn(KemperParameterMapping.message_key(msg_valid), mapping.response_keys())
+        self.assertNotIn(KemperParameterMapping.message_key(msg_other), mapping.response_keys())
+
+        self.assertEqual(KemperParameterMapping.message_key(ControlChange(7, 3)), 7)
+        self.assertNotEqual(KemperParameterMapping.message_key(ProgramChange(7)), KemperParameterMapping.message_key(ControlChange(7, 3)))
+        self.assertEqual(KemperParameterMapping.message_key(self), None)
+
+        # Two-part mappings are indexed under both keys
+        mapping_2 = KemperMappings.RIG_SELECT(1)
+        self.assertEqual(mapping_2.response_keys(), [
+            KemperParameterMapping.message_key(ControlChange(CC_RIG_INDEX_PART_1, 0)),
+            KemperParameterMapping.message_key(ProgramChange(3))
+        ])
+
+        # Other response types cannot be indexed
+        mapping_3 = KemperParameterMapping(
+            response = self
+        )
+        self.assertEqual(mapping_3.response_keys(), None)
+
+
 ####################################################################################################
 
 
@@ -316,6 +360,37 @@ class TestKemperParameterMappings(unittest.TestCase):
         self.assertEqual(list(mapping.set.data[0:6]), [0x00, 0x00, 0xd9, 0x01, 0x04, 0xaa])
 
 
+    def test_set_value_nrpn(self):
+        mapping = KemperParameterMapping(
+            set = KemperNRPNMessage(
+                NRPN_FUNCTION_SET_SINGLE_PARAMETER,
+                0x04,
+                0x01
+            )
+        )
+
+        frame = mapping.set.__bytes__()
+        self.assertEqual(list(frame), [0xf0, 0x00, 0x20, 0x33, NRPN_PRODUCT_TYPE, 0x7f, 0x01, 0x00, 0x04, 0x01, 0xf7])
+        self.assertIs(mapping.set.__bytes__(), frame)
+
+        mapping.set_value(257)
+        self.assertEqual(list(mapping.set.data), [NRPN_PRODUCT_TYPE, 0x7f, 0x01, 0x00, 0x04, 0x01, 2, 1])
+
+        frame = mapping.set.__bytes__()
+        self.assertEqual(list(frame), [0xf0, 0x00, 0x20, 0x33, NRPN_PRODUCT_TYPE, 0x7f, 0x01, 0x00, 0x04, 0x01, 2, 1, 0xf7])
+
+        # Following values are patched in place
+        mapping.set_value(16383)
+        self.assertIs(mapping.set.__bytes__(), frame)
+        self.assertEqual(list(frame), [0xf0, 0x00, 0x20, 0x33, NRPN_PRODUCT_TYPE, 0x7f, 0x01, 0x00, 0x04, 0x01, 127, 127, 0xf7])
+        self.assertEqual(list(mapping.set.data[6:]), [127, 127])
+
+        mapping.set_value(0)
+        self.assertIs(mapping.set.__bytes__(), frame)
+        self.assertEqual(list(frame[-3:]), [0, 0, 0xf7])
+        self.assertEqual(list(mapping.set.data[6:]), [0, 0])
+
+
     def test_set_value_sysex_string(self):
         mapping = KemperParameterMapping(
             set = SystemExclusive(
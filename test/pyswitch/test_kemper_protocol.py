@@ -14,16 +14,20 @@ with patch.dict(sys.modules, {
     "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
     "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
     "adafruit_display_shapes.rect": MockDisplayShapes().rect(),
-    "gc": MockGC()
+    "gc": MockGC(),
+    "time": MockTime
 }):
     from lib.pyswitch.clients.kemper import *
-    from lib.pyswitch.misc import Colors, compare_midi_messages
+    from lib.pyswitch.misc import Colors, Timers, compare_midi_messages
 
     from .mocks_appl import *
 
 
 class TestKemperBidirectionalProtocol(unittest.TestCase):
 
+    def setUp(self):
+        Timers._scheduled = []
+
     def test(self):
         protocol = KemperBidirectionalProtocol(20)
 
@@ -31,9 +35,10 @@ class TestKemperBidirectionalProtocol(unittest.TestCase):
         self.assertEqual(protocol.init_period.interval, 5000)
         self.assertEqual(protocol.sensing_period.interval, 1500)
 
-        protocol.resend_period = MockPeriodCounter()
-        protocol.init_period = MockPeriodCounter()
-        protocol.sensing_period = MockPeriodCounter()
+        def tick(time):
+            MockTime.mock["monotonicReturn"] = time
+            Timers.process()
+            protocol.update()
 
         client = MockClient()
         midi = MockMidiController()
@@ -74,16 +79,20 @@ class TestKemperBidirectionalProtocol(unittest.TestCase):
         #self.assertEqual(protocol.state, protocol._STATE_OFFLINE)
 
         # First offline update: Must issue an init message
-        protocol.init_period.exceed_next_time = True
-        protocol.update()
+        tick(1)
 
         self.assertEqual(len(midi.messages_sent), 1)
         self.assertTrue(compare_midi_messages(midi.messages_sent[0], exp_msg_init))
 
         # Some updating
-        protocol.update()
+        tick(2)
         self.assertEqual(len(midi.messages_sent), 1)
 
+        # No answer: Init message is repeated
+        tick(6.001)
+        self.assertEqual(len(midi.messages_sent), 2)
+        self.assertTrue(compare_midi_messages(midi.messages_sent[1], exp_msg_init))
+
         # Receive invalid messages
         self.assertEqual(protocol.receive(ControlChange(control = 9, value = 0)), False)
         self.assertEqual(protocol.receive(SystemExclusive(
@@ -96,37 +105,45 @@ class TestKemperBidirectionalProtocol(unittest.TestCase):
         )), False)
 
         # Receive sense message
+        MockTime.mock["monotonicReturn"] = 7
         self.assertEqual(protocol.receive(KemperMappings.BIDIRECTIONAL_SENSING().response), True)
         self.assertEqual(protocol.state, protocol._STATE_RUNNING)
         self.assertEqual(protocol.get_color(), Colors.GREEN)
 
-        # Some updating
-        protocol.update()
-        self.assertEqual(len(midi.messages_sent), 1)
+        # Some updating, with sensing messages coming in (no more init messages)
+        for i in range(20):
+            tick(7.5 + i * 0.5)
+            protocol.receive(KemperMappings.BIDIRECTIONAL_SENSING().response)
 
-        # Keep-alive
-        protocol.resend_period.exceed_next_time = True
-        protocol.update()
         self.assertEqual(len(midi.messages_sent), 2)
-        self.assertTrue(compare_midi_messages(midi.messages_sent[1], exp_msg_keepalive))
+
+        # Keep-alive
+        tick(17.001)
+        self.assertEqual(len(midi.messages_sent), 3)
+        self.assertTrue(compare_midi_messages(midi.messages_sent[2], exp_msg_keepalive))
 
         # Some updating
-        protocol.update()
-        self.assertEqual(len(midi.messages_sent), 2)
+        tick(17.1)
+        self.assertEqual(len(midi.messages_sent), 3)
+
+        # Lost connection: Re-initialized immediately
+        tick(18.4)
+        self.assertEqual(protocol.state, protocol._STATE_RUNNING)
 
-        # Lost connection
-        protocol.sensing_period.exceed_next_time = True
-        protocol.update()
+        tick(18.501)
         self.assertEqual(protocol.state, protocol._STATE_OFFLINE)
         self.assertEqual(protocol.get_color(), Colors.RED)
 
-        protocol.init_period.exceed_next_time = True
-        protocol.update()
-        self.assertEqual(len(midi.messages_sent), 3)
-        self.assertTrue(compare_midi_messages(midi.messages_sent[2], exp_msg_init))
+        self.assertEqual(len(midi.messages_sent), 4)
+        self.assertTrue(compare_midi_messages(midi.messages_sent[3], exp_msg_init))
 
         self.assertEqual(client.num_notify_connection_lost_calls, 1)
 
+        # No keep-alive messages while offline
+        tick(30)
+        self.assertEqual(len(midi.messages_sent), 5)
+        self.assertTrue(compare_midi_messages(midi.messages_sent[4], exp_msg_init))
+
 
     def test_no_init(self):
         protocol = KemperBidirectionalProtocol(50)
@@ -179,6 +196,44 @@ class TestKemperBidirectionalProtocol(unittest.TestCase):
         self.assertEqual(protocol.is_bidirectional(KemperMappings.CABINET_STATE()), False)
 
 
+    def test_is_bidirectional_by_key(self):
+        protocol = KemperBidirectionalProtocol(20)
+
+        # Equal mappings which are not the interned instances
+        mapping = KemperParameterMapping(
+            response = KemperMappings.RIG_NAME().response
+        )
+        self.assertEqual(protocol.is_bidirectional(mapping), True)
+
+        mapping = KemperParameterMapping(
+            response = KemperMappings.CABINET_STATE().response
+        )
+        self.assertEqual(protocol.is_bidirectional(mapping), False)
+
+
+    def test_receive_pushed_parameters(self):
+        protocol = KemperBidirectionalProtocol(20)
+
+        client = MockClient()
+        midi = MockMidiController()
+        protocol.init(midi, client)
+
+        # Parameters of the set are swallowed without changing the state
+        self.assertEqual(protocol.receive(KemperMappings.EFFECT_STATE(KemperEffectSlot.EFFECT_SLOT_ID_B).response), True)
+        self.assertEqual(protocol.receive(KemperMappings.RIG_NAME().response), True)
+        self.assertEqual(protocol.state, protocol._STATE_OFFLINE)
+
+        # Others are not
+        self.assertEqual(protocol.receive(KemperMappings.CABINET_STATE().response), False)
+
+
+    def test_parameter_set(self):
+        protocol = KemperBidirectionalProtocol(20)
+        
+        self.assertEqual(protocol.is_bidirectional(KemperMappings.RIG_NAME()), True)
+        self.assertEqual(protocol.is_bidirectional(KemperMappings.CABINET_STATE()), False)
+
+
     def test_feedback_value(self):
         protocol = KemperBidirectionalProtocol(20)
 
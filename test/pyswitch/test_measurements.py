@@ -14,7 +14,7 @@ with patch.dict(sys.modules, {
     "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
     "time": MockTime
 }):
-    from lib.pyswitch.controller.RuntimeMeasurement import RuntimeMeasurement
+    from lib.pyswitch.controller.RuntimeMeasurement import RuntimeMeasurement, RuntimeHistogram, TickProfiler, SwitchLatency
 
 
 class MockRuntimeMeasurementListener:
@@ -116,4 +116,194 @@ class TestMeasurementRuntime(unittest.TestCase):
         self.assertEqual(listener_2.num_update_calls, 3)
 
 
+##############################################################################
 
+
+class TestMeasurementHistogram(unittest.TestCase):
+
+    def test_percentiles(self):
+        m = RuntimeHistogram(
+            interval_millis = 300
+        )
+
+        self.assertEqual(m.percentile(50), None)
+
+        for i in range(90):
+            m.add(30)
+
+        for i in range(8):
+            m.add(700)
+
+        m.add(45000)
+        m.add(1000000)
+
+        self.assertEqual(m.calls, 100)
+        self.assertEqual(m.value, 1000000)
+        
+        self.assertEqual(m.percentile(0), 50)
+        self.assertEqual(m.percentile(50), 50)
+        self.assertEqual(m.percentile(90), 50)
+        self.assertEqual(m.percentile(95), 800)
+        self.assertEqual(m.percentile(99), 50000)
+        self.assertEqual(m.percentile(100), -1)
+
+        m.reset()
+
+        self.assertEqual(m.percentile(50), None)
+        self.assertEqual(sum(m.buckets), 0)
+
+
+    def test_finish(self):
+        m = RuntimeHistogram(
+            interval_millis = 300
+        )
+
+        MockTime.mock["monotonicReturn"] = 1
+        m.start()
+        MockTime.mock["monotonicReturn"] = 1.00042
+        m.finish()
+
+        # Microseconds
+        self.assertEqual(m.value, 420)
+        self.assertEqual(m.percentile(50), 500)
+
+
+##############################################################################
+
+
+class TestMeasurementTickProfiler(unittest.TestCase):
+
+    def test_phases(self):
+        p = TickProfiler(interval_millis = 300)
+        listener = MockRuntimeMeasurementListener()
+
+        phase_1 = p.get("one", listener)
+        phase_2 = p.get("two")
+
+        self.assertIs(p.get("one"), phase_1)
+        self.assertEqual(phase_1.listeners, [listener])
+        self.assertEqual(phase_2.listeners, [])
+
+        # Tick 1: Phase 1 is entered twice
+        MockTime.mock["monotonicReturn"] = 1
+        p.start()
+
+        MockTime.mock["monotonicReturn"] = 1.001
+        p.enter(phase_1)
+
+        MockTime.mock["monotonicReturn"] = 1.003
+        p.enter(phase_2)
+
+        MockTime.mock["monotonicReturn"] = 1.010
+        p.enter(phase_1)
+
+        MockTime.mock["monotonicReturn"] = 1.014
+        p.enter(None)
+
+        MockTime.mock["monotonicReturn"] = 1.020
+        p.finish()
+
+        self.assertEqual(phase_1.calls, 1)
+        self.assertEqual(phase_1.value, 6000)
+        self.assertEqual(phase_2.calls, 1)
+        self.assertEqual(phase_2.value, 7000)
+
+        # Tick 2: Only phase 2, lasting until the end of the tick
+        MockTime.mock["monotonicReturn"] = 2
+        p.start()
+
+        p.enter(phase_2)
+
+        MockTime.mock["monotonicReturn"] = 2.00015
+        p.finish()
+
+        # Sub-millisecond resolution
+        self.assertEqual(phase_1.calls, 1)
+        self.assertEqual(phase_2.calls, 2)
+        self.assertEqual(phase_2.sum, 7150)
+        self.assertEqual(phase_2.percentile(50), 200)
+
+        # Output
+        MockTime.mock["monotonicReturn"] = 10
+        p.update()
+
+        self.assertEqual(listener.num_update_calls, 1)
+        self.assertEqual(phase_1.calls, 0)
+        self.assertEqual(phase_2.calls, 0)
+
+
+##############################################################################
+
+
+class TestMeasurementSwitchLatency(unittest.TestCase):
+
+    def test_latency(self):
+        l1 = SwitchLatency(interval_millis = 300, name = "one")
+        l2 = SwitchLatency(interval_millis = 300, name = "two")
+
+        self.assertEqual(l1.midi.name, "one MIDI")
+        self.assertEqual(l1.display.name, "one Display")
+
+        # Sending outside of a push is not accounted
+        MockTime.mock["monotonicReturn"] = 1
+        SwitchLatency.midi_sent()
+        SwitchLatency.display_updated()
+
+        self.assertEqual(l1.midi.calls, 0)
+        self.assertEqual(l1.display.calls, 0)
+
+        # Push switch one: Only the first message counts
+        l1.press(1000)
+
+        MockTime.mock["monotonicReturn"] = 1.003
+        SwitchLatency.midi_sent()
+
+        MockTime.mock["monotonicReturn"] = 1.004
+        SwitchLatency.midi_sent()
+
+        l1.end_press()
+
+        # Push switch two without sending anything
+        l2.press(1005)
+        l2.end_press()
+
+        MockTime.mock["monotonicReturn"] = 1.010
+        SwitchLatency.midi_sent()
+
+        self.assertEqual(l1.midi.calls, 1)
+        self.assertEqual(l1.midi.value, 3000)
+        self.assertEqual(l2.midi.calls, 0)
+
+        # Display output without changes of the switches is not accounted
+        MockTime.mock["monotonicReturn"] = 1.011
+        SwitchLatency.display_updated()
+
+        self.assertEqual(l1.display.calls, 0)
+        self.assertEqual(l2.display.calls, 0)
+
+        # LEDs of switch one changed: Accounted when written
+        l1.leds_changed()
+        self.assertEqual(l1.display.calls, 0)
+
+        MockTime.mock["monotonicReturn"] = 1.012
+        SwitchLatency.display_updated()
+
+        self.assertEqual(l1.display.calls, 1)
+        self.assertEqual(l1.display.value, 12000)
+        self.assertEqual(l2.display.calls, 0)
+
+        # Label of switch two changed later (for example by the feedback of the device)
+        MockTime.mock["monotonicReturn"] = 1.020
+        l2.label_changed()
+
+        self.assertEqual(l2.display.calls, 1)
+        self.assertEqual(l2.display.value, 15000)
+
+        # Only the first display change after the push counts
+        l1.leds_changed()
+        l2.label_changed()
+        l2.leds_changed()
+        SwitchLatency.display_updated()
+
+        self.assertEqual(l1.display.calls, 1)
+        self.assertEqual(l2.display.calls, 1)
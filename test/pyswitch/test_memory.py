@@ -79,3 +79,60 @@ class TestMemory(unittest.TestCase):
         self.assertIn(MockMisc.format_size(1024 * 1024 - 233), MockMisc.latest_msg())            # Free memory
         self.assertIn(MockMisc.format_size(100), MockMisc.latest_msg())  # Total memory
 
+
+    def test_telemetry(self):
+        gc_mock_data().reset()
+
+        # Not started: Nothing happens
+        Memory._samples_free = None
+        Memory.sample()
+        self.assertEqual(Memory.samples(), [])
+
+        Memory.start_telemetry(num_samples = 3)
+
+        gc_mock_data().output_mem_free = 1024 * 30
+        gc_mock_data().output_mem_alloc = 100
+        Memory.sample()
+
+        gc_mock_data().output_mem_free = 1024 * 25
+        gc_mock_data().output_mem_alloc = 200
+        Memory.sample()
+
+        self.assertEqual(Memory.samples(), [(1024 * 30, 100), (1024 * 25, 200)])
+        self.assertEqual(Memory.MIN_FREE_BYTES, 1024 * 25)
+        self.assertEqual(Memory.MAX_FREE_BYTES, 1024 * 30)
+
+        gc_mock_data().output_mem_free = 1024 * 40
+        gc_mock_data().output_mem_alloc = 300
+        Memory.sample()
+
+        gc_mock_data().output_mem_free = 1024 * 35
+        gc_mock_data().output_mem_alloc = 400
+        Memory.sample()
+
+        # Ring buffer: Only the last 3 samples
+        self.assertEqual(Memory.samples(), [(1024 * 25, 200), (1024 * 40, 300), (1024 * 35, 400)])
+        self.assertEqual(Memory.MIN_FREE_BYTES, 1024 * 25)
+        self.assertEqual(Memory.MAX_FREE_BYTES, 1024 * 40)
+
+        # No garbage collection
+        self.assertEqual(gc_mock_data().collect_calls, 0)
+
+
+    def test_telemetry_collect_interval(self):
+        gc_mock_data().reset()
+
+        Memory.start_telemetry(num_samples = 3, collect_interval = 2)
+
+        Memory.sample()
+        self.assertEqual(gc_mock_data().collect_calls, 0)
+
+        Memory.sample()
+        self.assertEqual(gc_mock_data().collect_calls, 1)
+
+        Memory.sample()
+        self.assertEqual(gc_mock_data().collect_calls, 1)
+
+        Memory.sample()
+        self.assertEqual(gc_mock_data().collect_calls, 2)
+
@@ -17,12 +17,32 @@ with patch.dict(sys.modules, {
 }):
     from adafruit_midi.system_exclusive import SystemExclusive
     from adafruit_midi.midi_message import MIDIUnknownEvent
-    from lib.pyswitch.controller.MidiController import MidiController, MidiRouting
+    from lib.pyswitch.controller.MidiController import MidiController, MidiRouting, MidiRawPassthrough
 
     from.mocks_appl import *
 
 
 
+class MockRawMidiDevice(MockMidiController):
+    def __init__(self):
+        super().__init__()
+
+        self.next_raw_data = []
+        self.raw_written = bytearray()
+
+    def read_raw(self, buffer):
+        if not self.next_raw_data:
+            return 0
+        
+        data = self.next_raw_data.pop(0)
+        buffer[:len(data)] = data
+
+        return len(data)
+    
+    def write_raw(self, buffer):
+        self.raw_written.extend(buffer)
+
+
 class TestMidiController(unittest.TestCase):
 
     def test_appl_routing(self):
@@ -157,9 +177,10 @@ class TestMidiController(unittest.TestCase):
             midi_message_3
         ]
         
+        # Sources are read round robin
         self.assertEqual(midi.receive(), midi_message_1)
-        self.assertEqual(midi.receive(), midi_message_2)
-        self.assertEqual(midi.receive(), midi_message_3)        
+        self.assertEqual(midi.receive(), midi_message_3)
+        self.assertEqual(midi.receive(), midi_message_2)        
         self.assertEqual(midi.receive(), None)
 
         self.assertEqual(sub_midi_1.messages_sent, [])
@@ -289,7 +310,334 @@ class TestMidiController(unittest.TestCase):
         self.assertEqual(sub_midi_2.messages_sent, [])
         
         
+    def test_appl_routing_fairness(self):
+        sub_midi_1 = MockMidiController()
+        sub_midi_2 = MockMidiController()
+
+        midi = MidiController(
+            routings = [
+                MidiRouting(
+                    source = sub_midi_1,
+                    target = MidiController.APPLICATION
+                ),                    
+                MidiRouting(
+                    source = sub_midi_2,
+                    target = MidiController.APPLICATION
+                )
+            ]
+        )
+
+        sub_midi_1.next_receive_messages = [ SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [i]) for i in range(5) ]
+        
+        midi_message = SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [0x55])
+
+        # The busy source must not starve the other one
+        self.assertEqual(midi.receive().data, [0])
+
+        sub_midi_2.next_receive_messages = [ midi_message ]
+
+        self.assertEqual(midi.receive(), midi_message)
+        self.assertEqual(midi.receive().data, [1])
+        self.assertEqual(midi.receive().data, [2])
+
+
+    def test_appl_and_external_routing(self):
+        sub_midi_1 = MockMidiController()
+        sub_midi_2 = MockMidiController()
+
+        midi = MidiController(
+            routings = [
+                MidiRouting(
+                    source = sub_midi_1,
+                    target = MidiController.APPLICATION
+                ),                    
+                MidiRouting(
+                    source = sub_midi_1,
+                    target = sub_midi_2
+                ),
+                MidiRouting(
+                    source = sub_midi_1,
+                    target = sub_midi_2
+                )
+            ]
+        )
+
+        midi_message_1 = SystemExclusive(
+            manufacturer_id = [0x00, 0x10, 0x20],
+            data = [0x00, 0x00, 0x07, 0x45]
+        )
+
+        midi_message_2 = SystemExclusive(
+            manufacturer_id = [0x00, 0x10, 0x22],
+            data = [0x00, 0x00, 0x07, 0x47]
+        )
+
+        sub_midi_1.next_receive_messages = [
+            midi_message_1,
+            midi_message_2
+        ]
+
+        # Both the application and the external target get all messages (duplicate routings are ignored)
+        self.assertEqual(midi.receive(), midi_message_1)
+        self.assertEqual(sub_midi_2.messages_sent, [midi_message_1])
+
+        self.assertEqual(midi.receive(), midi_message_2)
+        self.assertEqual(sub_midi_2.messages_sent, [midi_message_1, midi_message_2])
+
+        self.assertEqual(midi.receive(), None)
+
+
+    def test_external_routings_budget_messages(self):
+        sub_midi_1 = MockMidiController()
+        sub_midi_2 = MockMidiController()
+
+        midi = MidiController(
+            routings = [
+                MidiRouting(
+                    source = sub_midi_1,
+                    target = sub_midi_2
+                )
+            ],
+            max_thru_messages = 3
+        )
+
+        messages = [ SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [i]) for i in range(5) ]
+        sub_midi_1.next_receive_messages = messages.copy()
+
+        midi.receive()
+        self.assertEqual(sub_midi_2.messages_sent, messages[:3])
+
+        midi.receive()
+        self.assertEqual(sub_midi_2.messages_sent, messages)
+
+
+    def test_external_routings_budget_bytes(self):
+        sub_midi_1 = MockMidiController()
+        sub_midi_2 = MockMidiController()
+
+        midi = MidiController(
+            routings = [
+                MidiRouting(
+                    source = sub_midi_1,
+                    target = sub_midi_2
+                )
+            ],
+            max_thru_messages = 0,
+            max_thru_bytes = 20
+        )
+
+        # 9 bytes each
+        messages = [ SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [i, 0, 0, 0]) for i in range(7) ]
+        sub_midi_1.next_receive_messages = messages.copy()
+
+        midi.receive()
+        self.assertEqual(sub_midi_2.messages_sent, messages[:3])
+
+        midi.receive()
+        self.assertEqual(sub_midi_2.messages_sent, messages[:6])
+
+        midi.receive()
+        self.assertEqual(sub_midi_2.messages_sent, messages)
+
+
     def test_no_args(self):
         # Must not throw
         MidiController([])
 
+
+###################################################################################################
+
+
+    def test_raw_routing(self):
+        sub_midi_1 = MockRawMidiDevice()
+        sub_midi_2 = MockRawMidiDevice()
+        sub_midi_3 = MockRawMidiDevice()
+
+        midi = MidiController(
+            routings = [
+                MidiRouting(
+                    source = sub_midi_1,
+                    target = sub_midi_2,
+                    raw = True
+                ),
+                MidiRouting(
+                    source = sub_midi_3,
+                    target = sub_midi_2,
+                    raw = True
+                ),
+                MidiRouting(
+                    source = sub_midi_3,
+                    target = sub_midi_1
+                )
+            ]
+        )
+
+        # Source 1 is raw, source 3 is not (not all of its routings are raw)
+        midi_message = SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [0x01])
+
+        sub_midi_1.next_raw_data = [ bytes([0xb0, 0x01, 0x02]) ]
+        sub_midi_3.next_receive_messages = [ midi_message ]
+
+        midi.receive()
+
+        self.assertEqual(sub_midi_2.raw_written, bytes([0xb0, 0x01, 0x02]))
+        self.assertEqual(sub_midi_2.messages_sent, [midi_message])
+        self.assertEqual(sub_midi_1.messages_sent, [midi_message])
+
+
+    def test_raw_routing_sysex_parts(self):
+        sub_midi_1 = MockRawMidiDevice()
+        sub_midi_2 = MockRawMidiDevice()
+
+        midi = MidiController(
+            routings = [
+                MidiRouting(
+                    source = sub_midi_1,
+                    target = sub_midi_2,
+                    raw = True
+                ),
+                MidiRouting(
+                    source = MidiController.APPLICATION,
+                    target = sub_midi_2
+                )
+            ],
+            max_thru_bytes = 4
+        )
+
+        midi_message_1 = SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [0x01])
+        midi_message_2 = SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [0x02])
+
+        sub_midi_1.next_raw_data = [ 
+            bytes([0xf0, 0x01, 0x02, 0x03]),
+            bytes([0x04, 0x05]),
+            bytes([0xf7])
+        ]
+
+        # Not in a SysEx: Sent immediately
+        midi.send(midi_message_1)
+        self.assertEqual(sub_midi_2.messages_sent, [midi_message_1])
+
+        # SysEx forwarded in parts: Application messages are held back
+        midi.receive()
+        self.assertEqual(sub_midi_2.raw_written, bytes([0xf0, 0x01, 0x02, 0x03]))
+
+        midi.send(midi_message_2, True)
+        self.assertEqual(sub_midi_2.messages_sent, [midi_message_1])
+
+        midi.receive()
+        midi.send(midi_message_1)
+        self.assertEqual(sub_midi_2.messages_sent, [midi_message_1])
+
+        # End of the SysEx written: Held back messages are sent in order
+        midi.receive()
+        self.assertEqual(sub_midi_2.raw_written, bytes([0xf0, 0x01, 0x02, 0x03, 0x04, 0x05, 0xf7]))
+        self.assertEqual(sub_midi_2.messages_sent, [midi_message_1, midi_message_2, midi_message_1])
+
+        midi.send(midi_message_2)
+        self.assertEqual(sub_midi_2.messages_sent, [midi_message_1, midi_message_2, midi_message_1, midi_message_2])
+
+
+###################################################################################################
+
+
+class TestMidiRawPassthrough(unittest.TestCase):
+
+    def _create(self, buffer_size = 64):
+        source = MockRawMidiDevice()
+        target_1 = MockRawMidiDevice()
+        target_2 = MockRawMidiDevice()
+
+        p = MidiRawPassthrough(
+            source = source,
+            targets = [target_1, target_2],
+            buffer_size = buffer_size
+        )
+
+        return (p, source, target_1, target_2)
+
+
+    def test_complete_messages(self):
+        (p, source, target_1, target_2) = self._create()
+
+        self.assertEqual(p.process(), 0)
+
+        data = bytes([0x90, 0x40, 0x7f, 0xc0, 0x05, 0xf8, 0xf0, 0x00, 0x20, 0x33, 0xf7])
+        source.next_raw_data = [ data ]
+
+        self.assertEqual(p.process(), len(data))
+
+        self.assertEqual(target_1.raw_written, data)
+        self.assertEqual(target_2.raw_written, data)
+
+        
+    def test_incomplete_messages(self):
+        (p, source, target_1, target_2) = self._create()
+
+        source.next_raw_data = [ 
+            bytes([0x90, 0x40, 0x7f, 0xb0, 0x01]),
+            bytes([0x02, 0xf0, 0x01, 0x02]),
+            bytes([0x03, 0xf7])
+        ]
+
+        p.process()
+        self.assertEqual(target_1.raw_written, bytes([0x90, 0x40, 0x7f]))
+
+        p.process()
+        self.assertEqual(target_1.raw_written, bytes([0x90, 0x40, 0x7f, 0xb0, 0x01, 0x02]))
+
+        p.process()
+        self.assertEqual(target_1.raw_written, bytes([0x90, 0x40, 0x7f, 0xb0, 0x01, 0x02, 0xf0, 0x01, 0x02, 0x03, 0xf7]))
+        self.assertEqual(target_2.raw_written, target_1.raw_written)
+
+
+    def test_running_status(self):
+        (p, source, target_1, target_2) = self._create()
+
+        source.next_raw_data = [ 
+            bytes([0x90, 0x40, 0x7f, 0x41, 0x7f, 0x42]),
+            bytes([0x7f, 0x43, 0x7f])
+        ]
+
+        p.process()
+        self.assertEqual(target_1.raw_written, bytes([0x90, 0x40, 0x7f, 0x41, 0x7f]))
+
+        # The held back message is prefixed with the status
+        p.process()
+        self.assertEqual(target_1.raw_written, bytes([0x90, 0x40, 0x7f, 0x41, 0x7f, 0x90, 0x42, 0x7f, 0x43, 0x7f]))
+
+
+    def test_realtime_in_message(self):
+        (p, source, target_1, target_2) = self._create()
+
+        source.next_raw_data = [ 
+            bytes([0xb0, 0x01, 0xf8]),
+            bytes([0x02])
+        ]
+
+        p.process()
+        self.assertEqual(target_1.raw_written, bytes([]))
+
+        p.process()
+        self.assertEqual(target_1.raw_written, bytes([0xb0, 0x01, 0xf8, 0x02]))
+
+
+    def test_long_sysex(self):
+        (p, source, target_1, target_2) = self._create(buffer_size = 4)
+
+        source.next_raw_data = [ 
+            bytes([0xf0, 0x01, 0x02, 0x03]),
+            bytes([0x04, 0x05, 0xf7, 0xc0]),
+            bytes([0x01])
+        ]
+
+        # Buffer full: Forwarded in parts
+        p.process()
+        self.assertEqual(target_1.raw_written, bytes([0xf0, 0x01, 0x02, 0x03]))
+        self.assertEqual(p.sysex_open, True)
+
+        p.process()
+        self.assertEqual(target_1.raw_written, bytes([0xf0, 0x01, 0x02, 0x03, 0x04, 0x05, 0xf7]))
+        self.assertEqual(p.sysex_open, False)
+
+        p.process()
+        self.assertEqual(target_1.raw_written, bytes([0xf0, 0x01, 0x02, 0x03, 0x04, 0x05, 0xf7, 0xc0, 0x01]))
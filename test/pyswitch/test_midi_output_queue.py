@@ -0,0 +1,243 @@
+import sys
+import unittest
+from unittest.mock import patch   # Necessary workaround! Needs to be separated.
+
+from .mocks_lib import *
+
+# Import subject under test
+with patch.dict(sys.modules, {
+    "micropython": MockMicropython,
+    "usb_midi": MockUsbMidi(),
+    "adafruit_midi": MockAdafruitMIDI(),
+    "adafruit_midi.control_change": MockAdafruitMIDIControlChange(),
+    "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive(),
+    "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
+    "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
+    "gc": MockGC(),
+    "time": MockTime
+}):
+    from lib.pyswitch.controller.MidiOutputQueue import MidiOutputQueue
+    from lib.pyswitch.controller.RuntimeMeasurement import SwitchLatency
+    from lib.pyswitch.controller.MidiController import MidiController, MidiRouting
+
+    from.mocks_appl import *
+
+
+class MockPort:
+    def __init__(self):
+        self.written = bytearray()
+        self.chunks = []
+
+    def write(self, buffer):
+        self.written.extend(buffer)
+        self.chunks.append(bytes(buffer))
+
+
+class MockQueuedMidiDevice(MockMidiController):
+    def __init__(self, queue):
+        super().__init__()
+        self.output_queue = queue
+        self.priorities = []
+
+    def send(self, midi_message, priority = False):
+        super().send(midi_message)
+        self.priorities.append(priority)
+
+
+class TestMidiOutputQueue(unittest.TestCase):
+
+    def test_unlimited(self):
+        port = MockPort()
+        queue = MidiOutputQueue(port.write, size = 64)
+
+        self.assertEqual(queue.send(bytes([0xb0, 0x01, 0x02])), True)
+        self.assertEqual(queue.send(bytes([0xc0, 0x05])), True)
+        self.assertEqual(port.written, bytearray())
+        self.assertEqual(queue.depth, 9)
+
+        queue.process()
+
+        self.assertEqual(port.written, bytearray([0xb0, 0x01, 0x02, 0xc0, 0x05]))
+        self.assertEqual(queue.depth, 0)
+        self.assertEqual(queue.max_depth, 9)
+        self.assertEqual(queue.num_sent, 2)
+        self.assertEqual(queue.num_dropped, 0)
+
+    def test_priority(self):
+        port = MockPort()
+        queue = MidiOutputQueue(port.write, size = 64)
+
+        queue.send(bytes([0xb0, 0x01, 0x02]))
+        queue.send(bytes([0xb0, 0x03, 0x04]), priority = True)
+
+        queue.process()
+
+        self.assertEqual(port.written, bytearray([0xb0, 0x03, 0x04, 0xb0, 0x01, 0x02]))
+
+    def test_paced(self):
+        port = MockPort()
+
+        MockTime.mock["monotonicReturn"] = 1
+        queue = MidiOutputQueue(port.write, size = 64, bytes_per_millisecond = 2, max_burst_bytes = 8)
+
+        queue.send(bytes([0xb0, 0x01, 0x02]))
+        queue.send(bytes([0xb0, 0x03, 0x04]))
+        queue.send(bytes([0xb0, 0x05, 0x06]))
+        queue.send(bytes([0xb0, 0x07, 0x08]))
+
+        # No time passed: Nothing written
+        queue.process()
+        self.assertEqual(port.written, bytearray())
+
+        # 1ms: 2 bytes
+        MockTime.mock["monotonicReturn"] = 1.001
+        queue.process()
+        self.assertEqual(port.written, bytearray([0xb0, 0x01]))
+
+        # Split message is continued first
+        queue.send(bytes([0xc0, 0x09]), priority = True)
+
+        MockTime.mock["monotonicReturn"] = 1.002
+        queue.process()
+        self.assertEqual(port.written, bytearray([0xb0, 0x01, 0x02, 0xc0]))
+
+        # Long pause: Limited to the burst size
+        MockTime.mock["monotonicReturn"] = 2
+        queue.process()
+        self.assertEqual(port.written, bytearray([0xb0, 0x01, 0x02, 0xc0, 0x09, 0xb0, 0x03, 0x04, 0xb0, 0x05, 0x06, 0xb0]))
+
+        MockTime.mock["monotonicReturn"] = 3
+        queue.process()
+        self.assertEqual(port.written[-2:], bytearray([0x07, 0x08]))
+
+        self.assertEqual(queue.depth, 0)
+        self.assertEqual(queue.num_sent, 5)
+
+    def test_dropped(self):
+        port = MockPort()
+        queue = MidiOutputQueue(port.write, size = 10)
+
+        self.assertEqual(queue.send(bytes([0xb0, 0x01, 0x02])), True)
+        self.assertEqual(queue.send(bytes([0xb0, 0x03, 0x04])), True)
+        self.assertEqual(queue.send(bytes([0xb0, 0x05, 0x06])), False)
+
+        # Priority messages have their own queue
+        self.assertEqual(queue.send(bytes([0xc0, 0x07]), priority = True), True)
+
+        self.assertEqual(queue.num_dropped, 1)
+        self.assertEqual(queue.max_depth, 14)
+
+        queue.process()
+        self.assertEqual(port.written, bytearray([0xc0, 0x07, 0xb0, 0x01, 0x02, 0xb0, 0x03, 0x04]))
+
+        # Wrap around
+        for i in range(5):
+            self.assertEqual(queue.send(bytes([0xb0, i, 0x10])), True)
+            self.assertEqual(queue.send(bytes([0xb0, i, 0x11])), True)
+
+            queue.process()
+            self.assertEqual(port.written[-6:], bytearray([0xb0, i, 0x10, 0xb0, i, 0x11]))
+
+    def test_sysex_parts(self):
+        port = MockPort()
+        queue = MidiOutputQueue(port.write, size = 64)
+
+        queue.send(bytes([0xf0, 0x00, 0x20]))
+        queue.process()
+
+        # Priority message must wait for the end of the SysEx
+        queue.send(bytes([0xb0, 0x01, 0x02]), priority = True)
+        queue.process()
+        self.assertEqual(port.written, bytearray([0xf0, 0x00, 0x20]))
+
+        queue.send(bytes([0x33, 0xf7]))
+        queue.process()
+        self.assertEqual(port.written, bytearray([0xf0, 0x00, 0x20, 0x33, 0xf7, 0xb0, 0x01, 0x02]))
+
+    def test_latency(self):
+        port = MockPort()
+
+        MockTime.mock["monotonicReturn"] = 1
+        queue = MidiOutputQueue(port.write, size = 64, bytes_per_millisecond = 2, max_burst_bytes = 8)
+
+        latency = SwitchLatency(interval_millis = 300, name = "one")
+
+        # Messages not triggered by a switch are not accounted
+        queue.send(bytes([0xb0, 0x01, 0x02]), priority = True)
+        
+        latency.press(1000)
+        queue.send(bytes([0xb0, 0x03, 0x04]), priority = True)
+        queue.send(bytes([0xb0, 0x05, 0x06]), priority = True)
+        latency.end_press()
+
+        # Unaccounted message written completely, the switch message only partly
+        MockTime.mock["monotonicReturn"] = 1.002
+        queue.process()
+        self.assertEqual(port.written, bytearray([0xb0, 0x01, 0x02, 0xb0]))
+        self.assertEqual(latency.midi.calls, 0)
+
+        # Switch message written: Latency recorded once
+        MockTime.mock["monotonicReturn"] = 1.003
+        queue.process()
+        self.assertEqual(port.written, bytearray([0xb0, 0x01, 0x02, 0xb0, 0x03, 0x04]))
+        self.assertEqual(latency.midi.calls, 1)
+        self.assertEqual(latency.midi.value, 3000)
+
+        MockTime.mock["monotonicReturn"] = 1.01
+        queue.process()
+        self.assertEqual(latency.midi.calls, 1)
+
+        # Direct sending is still recorded immediately
+        latency.press(2000)
+        MockTime.mock["monotonicReturn"] = 2.001
+        SwitchLatency.midi_sent()
+        latency.end_press()
+
+        self.assertEqual(latency.midi.calls, 2)
+        self.assertEqual(latency.midi.value, 3000)
+        self.assertEqual(latency.midi.sum, 4000)
+
+
+###############################################################################################
+
+
+class TestMidiControllerOutputQueues(unittest.TestCase):
+
+    def test_output_queues(self):
+        port = MockPort()
+        queue = MidiOutputQueue(port.write, size = 64)
+
+        device_1 = MockQueuedMidiDevice(queue)
+        device_2 = MockMidiController()
+
+        midi = MidiController(
+            routings = [
+                MidiRouting(
+                    source = MidiController.APPLICATION,
+                    target = device_1
+                ),
+                MidiRouting(
+                    source = MidiController.APPLICATION,
+                    target = device_2
+                ),
+                MidiRouting(
+                    source = device_2,
+                    target = device_1
+                )
+            ]
+        )
+
+        self.assertEqual(midi.output_queues, [queue])
+
+        midi.send("foo")
+        midi.send("bar", priority = True)
+
+        self.assertEqual(device_1.messages_sent, ["foo", "bar"])
+        self.assertEqual(device_1.priorities, [False, True])
+        self.assertEqual(device_2.messages_sent, ["foo", "bar"])
+
+        # Queues are processed on receive
+        queue.send(bytes([0xc0, 0x01]))
+        midi.receive()
+
+        self.assertEqual(port.written, bytearray([0xc0, 0x01]))
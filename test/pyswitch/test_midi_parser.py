@@ -0,0 +1,250 @@
+import sys
+import unittest
+from unittest.mock import patch   # Necessary workaround! Needs to be separated.
+
+from .mocks_lib import *
+
+# Import subject under test
+with patch.dict(sys.modules, {
+    "micropython": MockMicropython,
+    "displayio": MockDisplayIO(),
+    "adafruit_display_text": MockAdafruitDisplayText(),
+    "adafruit_display_shapes.rect": MockDisplayShapes().rect(),
+    "gc": MockGC(),
+    "adafruit_midi.control_change": MockAdafruitMIDIControlChange(),
+    "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive(),
+    "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
+    "adafruit_midi.midi_message": MockAdafruitMIDIMessage()
+}):
+    from adafruit_midi.system_exclusive import SystemExclusive
+    from adafruit_midi.control_change import ControlChange
+    from adafruit_midi.program_change import ProgramChange
+    from adafruit_midi.midi_message import MIDIUnknownEvent
+
+    from lib.pyswitch.controller.MidiParser import MidiParser, SystemExclusiveView, get_data_length
+    from lib.pyswitch.clients.kemper import KemperParameterMapping
+
+
+class MockPortIn:
+    def __init__(self):
+        self.next_data = []
+        self.num_read_calls = 0
+
+    def readinto(self, buffer):
+        self.num_read_calls += 1
+
+        if not self.next_data:
+            return None
+        
+        data = self.next_data[0]
+        num = min(len(data), len(buffer))
+
+        buffer[:num] = data[:num]
+
+        if num < len(data):
+            self.next_data[0] = data[num:]
+        else:
+            self.next_data.pop(0)
+
+        return num
+
+
+class TestMidiParser(unittest.TestCase):
+
+    def test_data_length(self):
+        self.assertEqual(get_data_length(0x90), 2)
+        self.assertEqual(get_data_length(0xb3), 2)
+        self.assertEqual(get_data_length(0xc0), 1)
+        self.assertEqual(get_data_length(0xd0), 1)
+        self.assertEqual(get_data_length(0xe0), 2)
+        self.assertEqual(get_data_length(0xf1), 1)
+        self.assertEqual(get_data_length(0xf2), 2)
+        self.assertEqual(get_data_length(0xf3), 1)
+        self.assertEqual(get_data_length(0xf6), 0)
+        self.assertEqual(get_data_length(0xf8), 0)
+
+
+    def test_channel_messages(self):
+        port = MockPortIn()
+        parser = MidiParser(port)
+
+        self.assertEqual(parser.receive(), None)
+
+        port.next_data = [ bytes([0xb2, 0x07, 0x40, 0xc1, 0x05, 0x90, 0x40, 0x7f]) ]
+
+        msg = parser.receive()
+        self.assertIsInstance(msg, ControlChange)
+        self.assertEqual(msg.channel, 2)
+        self.assertEqual(msg.control, 7)
+        self.assertEqual(msg.value, 0x40)
+
+        msg = parser.receive()
+        self.assertIsInstance(msg, ProgramChange)
+        self.assertEqual(msg.channel, 1)
+        self.assertEqual(msg.patch, 5)
+
+        msg = parser.receive()
+        self.assertIsInstance(msg, MIDIUnknownEvent)
+        self.assertEqual(msg.status, 0x90)
+        self.assertEqual(msg.channel, 0)
+
+        self.assertEqual(parser.receive(), None)
+
+
+    def test_views_are_reused(self):
+        port = MockPortIn()
+        parser = MidiParser(port)
+
+        port.next_data = [ bytes([0xb0, 0x07, 0x40, 0xb0, 0x08, 0x41]) ]
+
+        msg_1 = parser.receive()
+        self.assertEqual(msg_1.control, 7)
+
+        msg_2 = parser.receive()
+        self.assertIs(msg_1, msg_2)
+        self.assertEqual(msg_2.control, 8)
+
+
+    def test_running_status_and_realtime(self):
+        port = MockPortIn()
+        parser = MidiParser(port)
+
+        port.next_data = [ bytes([0xb0, 0x07, 0xf8, 0x40, 0x08]), bytes([0x41]) ]
+
+        msg = parser.receive()
+        self.assertIsInstance(msg, MIDIUnknownEvent)
+        self.assertEqual(msg.status, 0xf8)
+
+        msg = parser.receive()
+        self.assertEqual((msg.control, msg.value), (7, 0x40))
+
+        msg = parser.receive()
+        self.assertEqual((msg.control, msg.value), (8, 0x41))
+
+        self.assertEqual(parser.receive(), None)
+
+
+    def test_channel_filter(self):
+        port = MockPortIn()
+        parser = MidiParser(port, in_channel = 1)
+
+        port.next_data = [ bytes([0xb0, 0x07, 0x40, 0xb1, 0x08, 0x41]) ]
+
+        msg = parser.receive()
+        self.assertEqual(msg.channel, 1)
+        self.assertEqual(msg.control, 8)
+
+        parser = MidiParser(port, in_channel = (0, 2))
+
+        port.next_data = [ bytes([0xb1, 0x07, 0x40, 0xb2, 0x08, 0x41]) ]
+
+        msg = parser.receive()
+        self.assertEqual(msg.channel, 2)
+
+
+    def test_sysex(self):
+        port = MockPortIn()
+        parser = MidiParser(port)
+
+        port.next_data = [ 
+            bytes([0xf0, 0x00, 0x20, 0x33, 0x00, 0x00, 0x01]),
+            bytes([0x00, 0x04, 0x01, 0x01, 0x05, 0xf7, 0xf0, 0x7d, 0x01, 0x02, 0xf7])
+        ]
+
+        # Incomplete
+        self.assertEqual(parser.receive(), None)
+
+        msg = parser.receive()
+        self.assertIsInstance(msg, SystemExclusive)
+        self.assertIsInstance(msg, SystemExclusiveView)
+        self.assertEqual(msg.manufacturer_id, bytes([0x00, 0x20, 0x33]))
+        self.assertEqual(bytes(msg.data), bytes([0x00, 0x00, 0x01, 0x00, 0x04, 0x01, 0x01, 0x05]))
+        self.assertEqual(msg.__bytes__(), bytes([0xf0, 0x00, 0x20, 0x33, 0x00, 0x00, 0x01, 0x00, 0x04, 0x01, 0x01, 0x05, 0xf7]))
+
+        manufacturer_id = msg.manufacturer_id
+
+        copy = msg.copy()
+        self.assertNotIsInstance(copy, SystemExclusiveView)
+        self.assertEqual(copy.data, bytes([0x00, 0x00, 0x01, 0x00, 0x04, 0x01, 0x01, 0x05]))
+
+        # One byte manufacturer ID
+        msg = parser.receive()
+        self.assertEqual(msg.manufacturer_id, bytes([0x7d]))
+        self.assertEqual(bytes(msg.data), bytes([0x01, 0x02]))
+
+        self.assertEqual(parser.receive(), None)
+
+        # Same manufacturer ID is not re-created
+        port.next_data = [ 
+            bytes([0xf0, 0x00, 0x20, 0x33, 0x00, 0xf7, 0xf0, 0x00, 0x20, 0x33, 0x01, 0xf7])
+        ]
+
+        msg = parser.receive()
+        manufacturer_id = msg.manufacturer_id
+
+        msg = parser.receive()
+        self.assertIs(msg.manufacturer_id, manufacturer_id)
+        self.assertEqual(bytes(msg.data), bytes([0x01]))
+
+
+    def test_sysex_overflow(self):
+        port = MockPortIn()
+        parser = MidiParser(port, max_sysex_size = 8)
+
+        port.next_data = [ 
+            bytes([0xf0, 0x00, 0x20, 0x33, 0x00, 0x00, 0x01, 0x02, 0x03, 0x04, 0xf7, 0xb0, 0x01, 0x02]),
+        ]
+
+        # Too long: Dropped
+        msg = parser.receive()
+        self.assertIsInstance(msg, ControlChange)
+
+
+    def test_sysex_interrupted(self):
+        port = MockPortIn()
+        parser = MidiParser(port)
+
+        port.next_data = [ 
+            bytes([0xf0, 0x00, 0x20, 0x33, 0x00, 0xb0, 0x01, 0x02]),
+        ]
+
+        # A status byte terminates the SysEx
+        msg = parser.receive()
+        self.assertIsInstance(msg, ControlChange)
+        self.assertEqual(parser.receive(), None)
+
+
+    def test_ring_buffer(self):
+        port = MockPortIn()
+        parser = MidiParser(port, buffer_size = 4)
+
+        # More data than the buffer can hold
+        port.next_data = [ bytes([0xb0, 0x01, 0x02, 0xb0, 0x03, 0x04, 0xb0, 0x05, 0x06]) ]
+
+        for i in range(3):
+            msg = parser.receive()
+            self.assertEqual(msg.control, i * 2 + 1)
+            self.assertEqual(msg.value, i * 2 + 2)
+
+        self.assertEqual(parser.receive(), None)
+
+
+    def test_kemper_mapping(self):
+        mapping = KemperParameterMapping(
+            response = SystemExclusive(
+                manufacturer_id = bytes([0x00, 0x20, 0x33]),
+                data = bytes([0x00, 0x00, 0x01, 0x00, 0x04, 0x01])
+            )
+        )
+
+        port = MockPortIn()
+        parser = MidiParser(port)
+
+        port.next_data = [ 
+            bytes([0xf0, 0x00, 0x20, 0x33, 0x00, 0x00, 0x01, 0x00, 0x04, 0x02, 0x01, 0x05, 0xf7]),
+            bytes([0xf0, 0x00, 0x20, 0x33, 0x00, 0x00, 0x01, 0x00, 0x04, 0x01, 0x01, 0x05, 0xf7])
+        ]
+
+        self.assertEqual(mapping.parse(parser.receive()), False)
+        self.assertEqual(mapping.parse(parser.receive()), True)
+        self.assertEqual(mapping.value, 133)
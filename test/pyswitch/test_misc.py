@@ -204,6 +204,49 @@ class TestMiscTools(unittest.TestCase):
         self.assertEqual(compare_midi_messages(message_1, message_2), False)
 
 
+    def test_get_midi_message_key(self):
+        messages = [
+            SystemExclusive(manufacturer_id = [0x02, 0x03], data = [0x34, 0x45, 0x67]),
+            SystemExclusive(manufacturer_id = [0x02, 0x03], data = [0x34, 0x45, 0x68]),
+            SystemExclusive(manufacturer_id = [0x02, 0x04], data = [0x34, 0x45, 0x67]),
+            ControlChange(2, 66),
+            ControlChange(3, 66),
+            ProgramChange(2),
+            ProgramChange(3),
+            MIDIUnknownEvent(2),
+            MIDIUnknownEvent(3),
+            "foo"
+        ]
+
+        copies = [
+            SystemExclusive(manufacturer_id = [0x02, 0x03], data = [0x34, 0x45, 0x67]),
+            SystemExclusive(manufacturer_id = [0x02, 0x03], data = [0x34, 0x45, 0x68]),
+            SystemExclusive(manufacturer_id = [0x02, 0x04], data = [0x34, 0x45, 0x67]),
+            ControlChange(2, 67),
+            ControlChange(3, 67),
+            ProgramChange(2),
+            ProgramChange(3),
+            MIDIUnknownEvent(2),
+            MIDIUnknownEvent(3),
+            "foo"
+        ]
+
+        # Keys must be equal exactly when the messages are regarded equal
+        for i in range(len(messages)):
+            for j in range(len(copies)):
+                self.assertEqual(
+                    get_midi_message_key(messages[i]) == get_midi_message_key(copies[j]), 
+                    compare_midi_messages(messages[i], copies[j])
+                )
+
+                hash(get_midi_message_key(messages[i]))
+
+        # Lists
+        self.assertEqual(get_midi_message_key(messages[3:5]), get_midi_message_key(copies[3:5]))
+        self.assertNotEqual(get_midi_message_key(messages[3:5]), get_midi_message_key(copies[3:6]))
+        self.assertEqual(get_midi_message_key([None, messages[0]]), get_midi_message_key([None, copies[0]]))
+
+
 
 ##############################################################################
 
@@ -353,3 +396,108 @@ class TestMiscPeriodCounter(unittest.TestCase):
 
         MockTime.mock["monotonicReturn"] = 2.702
         self.assertEqual(p.exceeded, False)
+
+
+    def test_counter_callback(self):
+        Timers._scheduled = []
+        calls = []
+
+        p = PeriodCounter(500, callback = lambda: calls.append(1))
+
+        MockTime.mock["monotonicReturn"] = 1
+        p.reset()
+
+        MockTime.mock["monotonicReturn"] = 1.5
+        Timers.process()
+        self.assertEqual(calls, [])
+
+        MockTime.mock["monotonicReturn"] = 1.501
+        Timers.process()
+        self.assertEqual(calls, [1])
+
+        # Only called once per reset
+        MockTime.mock["monotonicReturn"] = 2.2
+        Timers.process()
+        self.assertEqual(calls, [1])
+
+        # Resetting replaces the former deadline
+        p.reset()
+        MockTime.mock["monotonicReturn"] = 2.5
+        p.reset()
+
+        MockTime.mock["monotonicReturn"] = 2.8
+        Timers.process()
+        self.assertEqual(calls, [1])
+
+        MockTime.mock["monotonicReturn"] = 3.1
+        Timers.process()
+        self.assertEqual(calls, [1, 1])
+
+
+##############################################################################
+
+
+class TestMiscTimers(unittest.TestCase):
+
+    def test_order(self):
+        Timers._scheduled = []
+        calls = []
+
+        p1 = PeriodCounter(300, callback = lambda: calls.append(1))
+        p2 = PeriodCounter(100, callback = lambda: calls.append(2))
+        p3 = PeriodCounter(200, callback = lambda: calls.append(3))
+
+        MockTime.mock["monotonicReturn"] = 10
+        p1.reset()
+        p2.reset()
+        p3.reset()
+
+        self.assertEqual([e[1] for e in Timers._scheduled], [p2, p3, p1])
+
+        MockTime.mock["monotonicReturn"] = 10.25
+        Timers.process()
+        self.assertEqual(calls, [2, 3])
+
+        Timers.cancel(p1)
+
+        MockTime.mock["monotonicReturn"] = 11
+        Timers.process()
+        self.assertEqual(calls, [2, 3])
+        self.assertEqual(Timers._scheduled, [])
+
+
+##############################################################################
+
+
+class TestMiscTickClock(unittest.TestCase):
+
+    def test_tick_clock(self):
+        MockTime.mock["monotonicReturn"] = 1.5
+        self.assertEqual(get_current_millis(), 1500)
+        self.assertEqual(TickClock.now(), 1500)
+
+        TickClock.tick()
+        
+        MockTime.mock["monotonicReturn"] = 1.7
+        self.assertEqual(get_current_millis(), 1700)
+        self.assertEqual(TickClock.now(), 1500)
+
+        TickClock.stop()
+
+        self.assertEqual(TickClock.now(), 1700)
+
+    def test_period_counter_uses_tick_clock(self):
+        p = PeriodCounter(100)
+
+        MockTime.mock["monotonicReturn"] = 10
+        p.reset()
+
+        TickClock.tick()
+
+        MockTime.mock["monotonicReturn"] = 11
+        self.assertEqual(p.exceeded, False)
+
+        TickClock.stop()
+
+        self.assertEqual(p.exceeded, True)
+